@@ -0,0 +1,26 @@
+"""add composite (user_id, date, id) index for keyset pagination
+
+Revision ID: 008df0642891
+Revises: 2e74a9573f62
+Create Date: 2026-10-18 17:31:47.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008df0642891'
+down_revision: Union[str, None] = '2e74a9573f62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_expenses_user_id_date_id', 'expenses', ['user_id', 'date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_expenses_user_id_date_id', table_name='expenses')
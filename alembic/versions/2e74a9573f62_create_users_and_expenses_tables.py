@@ -0,0 +1,54 @@
+"""create users and expenses tables
+
+Revision ID: 2e74a9573f62
+Revises: 
+Create Date: 2026-10-18 17:20:04.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e74a9573f62'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=False)
+    op.create_table('expenses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('date', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_expenses_amount'), 'expenses', ['amount'], unique=False)
+    op.create_index(op.f('ix_expenses_category'), 'expenses', ['category'], unique=False)
+    op.create_index(op.f('ix_expenses_date'), 'expenses', ['date'], unique=False)
+    op.create_index(op.f('ix_expenses_id'), 'expenses', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_expenses_id'), table_name='expenses')
+    op.drop_index(op.f('ix_expenses_date'), table_name='expenses')
+    op.drop_index(op.f('ix_expenses_category'), table_name='expenses')
+    op.drop_index(op.f('ix_expenses_amount'), table_name='expenses')
+    op.drop_table('expenses')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
@@ -0,0 +1,26 @@
+"""add expense_version to users
+
+Revision ID: 4b1d7e9c2a60
+Revises: 998c28587764
+Create Date: 2026-10-18 19:12:08.415302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b1d7e9c2a60'
+down_revision: Union[str, None] = '998c28587764'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('expense_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'expense_version')
@@ -0,0 +1,114 @@
+"""normalize expense categories
+
+Revision ID: 5e2a0c7b9f13
+Revises: a83c5f1e7d24
+Create Date: 2026-10-18 20:31:54.092718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a0c7b9f13'
+down_revision: Union[str, None] = 'a83c5f1e7d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same normalization as app.utils.categories: trim, collapse whitespace, lowercase for the key
+NORMALIZED = "regexp_replace(btrim({0}), '\\s+', ' ', 'g')"
+KEY = "lower(" + NORMALIZED + ")"
+
+SEARCH_VECTOR_WITH_CATEGORY = "to_tsvector('english', coalesce(category, '') || ' ' || coalesce(description, ''))"
+SEARCH_VECTOR = "to_tsvector('english', coalesce(description, ''))"
+
+
+def _rebuild_rollups(category_column: str) -> None:
+    op.execute("DELETE FROM expense_monthly_rollups")
+    op.execute(
+        f"INSERT INTO expense_monthly_rollups (user_id, month, {category_column}, currency, total_amount, expense_count) "
+        f"SELECT user_id, to_char(date, 'YYYY-MM'), {category_column}, currency, sum(amount), count(*) "
+        "FROM expenses WHERE user_id IS NOT NULL AND date IS NOT NULL "
+        f"GROUP BY user_id, to_char(date, 'YYYY-MM'), {category_column}, currency"
+    )
+
+
+def upgrade() -> None:
+    op.create_table('categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key', name='uq_categories_key')
+    )
+    op.create_index('ix_categories_name_trgm', 'categories', ['name'], unique=False, postgresql_using='gin',
+                    postgresql_ops={'name': 'gin_trgm_ops'})
+
+    # One category per key; the earliest-sorting spelling of each variant becomes the name
+    op.execute(
+        "INSERT INTO categories (name, key) "
+        f"SELECT min({NORMALIZED.format('category')}), {KEY.format('category')} "
+        f"FROM expenses GROUP BY {KEY.format('category')}"
+    )
+
+    op.add_column('expenses', sa.Column('category_id', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE expenses SET category_id = categories.id FROM categories "
+        f"WHERE categories.key = {KEY.format('expenses.category')}"
+    )
+    op.alter_column('expenses', 'category_id', nullable=False)
+    op.create_foreign_key('expenses_category_id_fkey', 'expenses', 'categories', ['category_id'], ['id'])
+    op.create_index(op.f('ix_expenses_category_id'), 'expenses', ['category_id'], unique=False)
+
+    # The generated search column read the category text; it now covers the description only
+    op.drop_index('ix_expenses_search_vector', table_name='expenses')
+    op.drop_column('expenses', 'search_vector')
+    op.drop_index('ix_expenses_category_trgm', table_name='expenses')
+    op.drop_index(op.f('ix_expenses_category'), table_name='expenses')
+    op.drop_column('expenses', 'category')
+    op.add_column('expenses', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True))
+    op.create_index('ix_expenses_search_vector', 'expenses', ['search_vector'], unique=False, postgresql_using='gin')
+
+    # Casing variants now share a bucket, so the rollup is rebuilt rather than converted
+    op.drop_constraint('expense_monthly_rollups_pkey', 'expense_monthly_rollups', type_='primary')
+    op.drop_column('expense_monthly_rollups', 'category')
+    op.add_column('expense_monthly_rollups', sa.Column('category_id', sa.Integer(), nullable=True))
+    _rebuild_rollups('category_id')
+    op.alter_column('expense_monthly_rollups', 'category_id', nullable=False)
+    op.create_foreign_key('expense_monthly_rollups_category_id_fkey', 'expense_monthly_rollups', 'categories',
+                          ['category_id'], ['id'])
+    op.create_primary_key('expense_monthly_rollups_pkey', 'expense_monthly_rollups',
+                          ['user_id', 'month', 'category_id', 'currency'])
+
+
+def downgrade() -> None:
+    op.add_column('expenses', sa.Column('category', sa.String(), nullable=True))
+    op.execute("UPDATE expenses SET category = categories.name FROM categories WHERE categories.id = expenses.category_id")
+    op.alter_column('expenses', 'category', nullable=False)
+    op.create_index(op.f('ix_expenses_category'), 'expenses', ['category'], unique=False)
+    op.create_index('ix_expenses_category_trgm', 'expenses', ['category'], unique=False, postgresql_using='gin',
+                    postgresql_ops={'category': 'gin_trgm_ops'})
+    op.drop_index('ix_expenses_search_vector', table_name='expenses')
+    op.drop_column('expenses', 'search_vector')
+    op.add_column('expenses', sa.Column(
+        'search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_WITH_CATEGORY, persisted=True), nullable=True))
+    op.create_index('ix_expenses_search_vector', 'expenses', ['search_vector'], unique=False, postgresql_using='gin')
+
+    op.drop_constraint('expense_monthly_rollups_pkey', 'expense_monthly_rollups', type_='primary')
+    op.drop_constraint('expense_monthly_rollups_category_id_fkey', 'expense_monthly_rollups', type_='foreignkey')
+    op.drop_column('expense_monthly_rollups', 'category_id')
+    op.add_column('expense_monthly_rollups', sa.Column('category', sa.String(), nullable=True))
+    _rebuild_rollups('category')
+    op.alter_column('expense_monthly_rollups', 'category', nullable=False)
+    op.create_primary_key('expense_monthly_rollups_pkey', 'expense_monthly_rollups',
+                          ['user_id', 'month', 'category', 'currency'])
+
+    op.drop_index(op.f('ix_expenses_category_id'), table_name='expenses')
+    op.drop_constraint('expenses_category_id_fkey', 'expenses', type_='foreignkey')
+    op.drop_column('expenses', 'category_id')
+    op.drop_index('ix_categories_name_trgm', table_name='categories')
+    op.drop_table('categories')
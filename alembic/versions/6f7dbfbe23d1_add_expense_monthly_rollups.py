@@ -0,0 +1,42 @@
+"""add expense monthly rollups
+
+Revision ID: 6f7dbfbe23d1
+Revises: c5f884f28b82
+Create Date: 2026-10-18 18:24:51.306518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f7dbfbe23d1'
+down_revision: Union[str, None] = 'c5f884f28b82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('expense_monthly_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('expense_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'month', 'category', 'currency')
+    )
+    # Backfill from existing expenses; `python -m app.rollups` can rebuild it later
+    op.execute(
+        "INSERT INTO expense_monthly_rollups (user_id, month, category, currency, total_amount, expense_count) "
+        "SELECT user_id, to_char(date, 'YYYY-MM'), category, currency, sum(amount), count(*) "
+        "FROM expenses WHERE user_id IS NOT NULL AND date IS NOT NULL "
+        "GROUP BY user_id, to_char(date, 'YYYY-MM'), category, currency"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('expense_monthly_rollups')
@@ -0,0 +1,38 @@
+"""add expense search indexes
+
+Revision ID: a83c5f1e7d24
+Revises: 4b1d7e9c2a60
+Create Date: 2026-10-18 19:47:31.208664
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83c5f1e7d24'
+down_revision: Union[str, None] = '4b1d7e9c2a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # A stored generated column rewrites the table once; afterwards Postgres keeps it current
+    op.add_column('expenses', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english', coalesce(category, '') || ' ' || coalesce(description, ''))", persisted=True),
+        nullable=True))
+    op.create_index('ix_expenses_search_vector', 'expenses', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_expenses_category_trgm', 'expenses', ['category'], unique=False, postgresql_using='gin',
+                    postgresql_ops={'category': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_expenses_category_trgm', table_name='expenses')
+    op.drop_index('ix_expenses_search_vector', table_name='expenses')
+    op.drop_column('expenses', 'search_vector')
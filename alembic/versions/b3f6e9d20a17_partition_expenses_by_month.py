@@ -0,0 +1,133 @@
+"""partition expenses by month
+
+Revision ID: b3f6e9d20a17
+Revises: d71f3b8a4c26
+Create Date: 2026-10-18 23:02:41.318264
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f6e9d20a17'
+down_revision: Union[str, None] = 'd71f3b8a4c26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, category_id, amount_minor, currency, description, date, user_id"
+SEARCH_VECTOR = "to_tsvector('english', coalesce(description, ''))"
+# Same naming and lead as app.partitions at the time of this migration
+MONTHS_AHEAD = 3
+# Monthly partitions are created for at most this many months of history; older rows
+# go to the default partition, so a stray ancient date cannot create hundreds of tables
+MONTHS_BACK = 24
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _create_expenses_table(name: str, partitioned: bool) -> None:
+    op.create_table(name,
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('expenses_id_seq'::regclass)"), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('amount_minor', sa.BigInteger(), nullable=False),
+    sa.Column('currency', sa.String(length=3), server_default='USD', nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('date', sa.DateTime(), nullable=not partitioned),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True),
+    **({'postgresql_partition_by': 'RANGE (date)'} if partitioned else {})
+    )
+
+
+def _finish_expenses_table(primary_key: list) -> None:
+    # Runs once the old table is gone, so constraint and index names are free again
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY expenses.id")
+    op.create_primary_key('expenses_pkey', 'expenses', primary_key)
+    op.create_foreign_key('expenses_user_id_fkey', 'expenses', 'users', ['user_id'], ['id'])
+    op.create_foreign_key('expenses_category_id_fkey', 'expenses', 'categories', ['category_id'], ['id'])
+    op.create_index(op.f('ix_expenses_id'), 'expenses', ['id'], unique=False)
+    op.create_index(op.f('ix_expenses_category_id'), 'expenses', ['category_id'], unique=False)
+    op.create_index(op.f('ix_expenses_amount_minor'), 'expenses', ['amount_minor'], unique=False)
+    op.create_index(op.f('ix_expenses_date'), 'expenses', ['date'], unique=False)
+    op.create_index('ix_expenses_user_id_date_id', 'expenses', ['user_id', 'date', 'id'], unique=False)
+    op.create_index('ix_expenses_search_vector', 'expenses', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def upgrade() -> None:
+    # Downtime: writes to expenses block from here until the migration commits, since
+    # rows written after the copy would be lost with the old table. Reads keep working
+    # until the final swap. The copy runs one month at a time to keep each statement
+    # (and its sort and WAL burst) bounded, but the total time still grows with the
+    # table, so run this in a maintenance window on large tables.
+    op.execute("LOCK TABLE expenses IN EXCLUSIVE MODE")
+
+    # The partition key cannot be NULL. Undated rows get the migration time, and their
+    # amounts join that month's rollup, which skipped them until now.
+    op.execute(
+        "INSERT INTO expense_monthly_rollups (user_id, month, category_id, currency, total_minor, expense_count) "
+        "SELECT user_id, to_char(timezone('utc', now()), 'YYYY-MM'), category_id, currency, sum(amount_minor), count(*) "
+        "FROM expenses WHERE date IS NULL AND user_id IS NOT NULL GROUP BY user_id, category_id, currency "
+        "ON CONFLICT (user_id, month, category_id, currency) DO UPDATE SET "
+        "total_minor = expense_monthly_rollups.total_minor + excluded.total_minor, "
+        "expense_count = expense_monthly_rollups.expense_count + excluded.expense_count"
+    )
+    op.execute("UPDATE expenses SET date = timezone('utc', now()) WHERE date IS NULL")
+
+    _create_expenses_table('expenses_partitioned', partitioned=True)
+
+    # One partition per month from max(oldest row, MONTHS_BACK months ago) through
+    # MONTHS_AHEAD months from now; anything outside lands in the default partition
+    now = datetime.utcnow()
+    current = datetime(now.year, now.month, 1)
+    horizon = _add_months(current, -MONTHS_BACK)
+    if not context.is_offline_mode():
+        first = op.get_bind().execute(sa.text("SELECT min(date) FROM expenses")).scalar()
+        if first is not None:
+            horizon = max(horizon, datetime(first.year, first.month, 1))
+    months = []
+    month = horizon
+    while month <= _add_months(current, MONTHS_AHEAD):
+        months.append(month)
+        month = _add_months(month, 1)
+
+    for month in months:
+        op.execute(
+            f"CREATE TABLE expenses_p{month:%Y%m} PARTITION OF expenses_partitioned "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+        )
+    op.execute("CREATE TABLE expenses_default PARTITION OF expenses_partitioned DEFAULT")
+
+    for month in months:
+        op.execute(
+            f"INSERT INTO expenses_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM expenses "
+            f"WHERE date >= '{month:%Y-%m-%d}' AND date < '{_add_months(month, 1):%Y-%m-%d}'"
+        )
+    op.execute(
+        f"INSERT INTO expenses_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM expenses "
+        f"WHERE date < '{months[0]:%Y-%m-%d}' OR date >= '{_add_months(months[-1], 1):%Y-%m-%d}'"
+    )
+    # Keep the id sequence alive when the old table (its owner) is dropped
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY NONE")
+    op.drop_table('expenses')
+    op.rename_table('expenses_partitioned', 'expenses')
+    # A primary key on a partitioned table must include the partition key
+    _finish_expenses_table(['id', 'date'])
+    op.execute("ANALYZE expenses")
+
+
+def downgrade() -> None:
+    _create_expenses_table('expenses_unpartitioned', partitioned=False)
+    op.execute(f"INSERT INTO expenses_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM expenses")
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY NONE")
+    # Dropping the parent drops its attached partitions; detached archives are left alone
+    op.drop_table('expenses')
+    op.rename_table('expenses_unpartitioned', 'expenses')
+    _finish_expenses_table(['id'])
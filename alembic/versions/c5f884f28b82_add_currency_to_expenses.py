@@ -0,0 +1,27 @@
+"""add currency to expenses
+
+Revision ID: c5f884f28b82
+Revises: 008df0642891
+Create Date: 2026-10-18 18:02:36.774120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f884f28b82'
+down_revision: Union[str, None] = '008df0642891'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows were entered without a currency; they are recorded as USD
+    op.add_column('expenses', sa.Column('currency', sa.String(length=3), server_default='USD', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('expenses', 'currency')
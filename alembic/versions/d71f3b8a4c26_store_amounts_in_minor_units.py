@@ -0,0 +1,67 @@
+"""store amounts in minor units
+
+Revision ID: d71f3b8a4c26
+Revises: 5e2a0c7b9f13
+Create Date: 2026-10-18 21:14:09.557381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd71f3b8a4c26'
+down_revision: Union[str, None] = '5e2a0c7b9f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Snapshot of app.utils.money.MINOR_UNIT_EXPONENTS at the time of this migration
+MINOR_UNIT_EXPONENTS = {
+    "BIF": 0, "CLP": 0, "DJF": 0, "GNF": 0, "ISK": 0, "JPY": 0, "KMF": 0, "KRW": 0,
+    "PYG": 0, "RWF": 0, "UGX": 0, "UYI": 0, "VND": 0, "VUV": 0, "XAF": 0, "XOF": 0, "XPF": 0,
+    "BHD": 3, "IQD": 3, "JOD": 3, "KWD": 3, "LYD": 3, "OMR": 3, "TND": 3,
+    "CLF": 4, "UYW": 4,
+}
+
+# Minor units per major unit for each stored currency, as a NUMERIC so arithmetic stays exact
+SCALE = ("CASE currency "
+         + " ".join(f"WHEN '{code}' THEN {10 ** places}.0" for code, places in MINOR_UNIT_EXPONENTS.items())
+         + " ELSE 100.0 END")
+
+
+def upgrade() -> None:
+    op.add_column('expenses', sa.Column('amount_minor', sa.BigInteger(), nullable=True))
+    op.execute(f"UPDATE expenses SET amount_minor = round(amount::numeric * ({SCALE}))")
+    op.alter_column('expenses', 'amount_minor', nullable=False)
+    op.create_index(op.f('ix_expenses_amount_minor'), 'expenses', ['amount_minor'], unique=False)
+    op.drop_index(op.f('ix_expenses_amount'), table_name='expenses')
+    op.drop_column('expenses', 'amount')
+
+    op.add_column('expense_monthly_rollups', sa.Column('total_minor', sa.BigInteger(), nullable=True))
+    op.execute(
+        "UPDATE expense_monthly_rollups SET total_minor = sums.total FROM ("
+        "SELECT user_id, to_char(date, 'YYYY-MM') AS month, category_id, currency, sum(amount_minor) AS total "
+        "FROM expenses WHERE user_id IS NOT NULL AND date IS NOT NULL "
+        "GROUP BY user_id, to_char(date, 'YYYY-MM'), category_id, currency) AS sums "
+        "WHERE expense_monthly_rollups.user_id = sums.user_id AND expense_monthly_rollups.month = sums.month "
+        "AND expense_monthly_rollups.category_id = sums.category_id AND expense_monthly_rollups.currency = sums.currency"
+    )
+    op.execute("UPDATE expense_monthly_rollups SET total_minor = 0 WHERE total_minor IS NULL")
+    op.alter_column('expense_monthly_rollups', 'total_minor', nullable=False)
+    op.drop_column('expense_monthly_rollups', 'total_amount')
+
+
+def downgrade() -> None:
+    op.add_column('expense_monthly_rollups', sa.Column('total_amount', sa.Float(), nullable=True))
+    op.execute(f"UPDATE expense_monthly_rollups SET total_amount = total_minor / ({SCALE})")
+    op.alter_column('expense_monthly_rollups', 'total_amount', nullable=False)
+    op.drop_column('expense_monthly_rollups', 'total_minor')
+
+    op.add_column('expenses', sa.Column('amount', sa.Float(), nullable=True))
+    op.execute(f"UPDATE expenses SET amount = amount_minor / ({SCALE})")
+    op.alter_column('expenses', 'amount', nullable=False)
+    op.create_index(op.f('ix_expenses_amount'), 'expenses', ['amount'], unique=False)
+    op.drop_index(op.f('ix_expenses_amount_minor'), table_name='expenses')
+    op.drop_column('expenses', 'amount_minor')
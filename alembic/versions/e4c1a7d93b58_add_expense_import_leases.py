@@ -0,0 +1,30 @@
+"""add expense import leases
+
+Revision ID: e4c1a7d93b58
+Revises: b3f6e9d20a17
+Create Date: 2026-10-18 23:48:10.527194
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c1a7d93b58'
+down_revision: Union[str, None] = 'b3f6e9d20a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('expense_imports', sa.Column('request_hash', sa.String(length=64), nullable=True))
+    op.add_column('expense_imports', sa.Column('lease_owner', sa.String(length=36), nullable=True))
+    op.add_column('expense_imports', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('expense_imports', 'lease_expires_at')
+    op.drop_column('expense_imports', 'lease_owner')
+    op.drop_column('expense_imports', 'request_hash')
@@ -1,10 +1,13 @@
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from app import models
-from app.database import get_db
+from sqlalchemy import event, inspect
+from starlette.concurrency import run_in_threadpool
+from app import crud, models
+from app.config import settings
+from app.database import DBSession, get_db, run_db
+from app.utils.hashing import password_hasher
+from app.utils.principal_cache import InMemoryPrincipalBackend, Principal, PrincipalCache, RedisPrincipalBackend
+from app.utils.tokens import TokenError, VerifiedTokenCache, get_backend
 
 SECRET_KEY = "secret_key"
 REFRESH_SECRET_KEY = "refresh_secret_key"
@@ -13,40 +16,72 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+jwt_backend = get_backend(settings.JWT_BACKEND)
 
+# Clients resend the same access token for its whole lifetime; verify it once
+token_cache = VerifiedTokenCache(maxsize=settings.TOKEN_CACHE_SIZE)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+principal_cache = PrincipalCache(
+    InMemoryPrincipalBackend(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL),
+    shared=(RedisPrincipalBackend.from_url(settings.PRINCIPAL_CACHE_REDIS_URL, ttl=settings.PRINCIPAL_CACHE_TTL)
+            if settings.PRINCIPAL_CACHE_REDIS_URL else None),
+)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+# Drop cached principals whenever a user row changes, whichever code path changed it
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.username)
+    for old_username in inspect(target).attrs.username.history.deleted:
+        principal_cache.invalidate(old_username)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def authenticate_user(db: DBSession, username: str, password: str):
+    user = await run_db(db, crud.get_user_by_username, username)
+    if not user:
         return None
+    verified, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        user = await run_db(db, crud.update_user_password, user.id, new_hash)
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt_backend.encode(to_encode, SECRET_KEY, ALGORITHM)
 
 def create_refresh_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
+    return jwt_backend.encode(to_encode, REFRESH_SECRET_KEY, ALGORITHM)
+
+def token_claims(user) -> dict:
+    return {"sub": user.username, "uid": user.id}
 
 def verify_refresh_token(refresh_token: str):
     try:
-        payload = jwt.decode(refresh_token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
-    except JWTError:
+        payload = jwt_backend.decode(refresh_token, REFRESH_SECRET_KEY, ALGORITHM)
+        if payload.get("sub") is None:
+            return None
+        return payload
+    except TokenError:
         return None
 
+# Verified claims of an access token, from the cache when this token was seen before
+def decode_access_token(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt_backend.decode(token, SECRET_KEY, ALGORITHM)
+        token_cache.set(token, payload)
+    return payload
+
 def extract_token(request: Request):
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -57,7 +92,7 @@ def extract_token(request: Request):
         )
     return auth_header.split(" ")[1]
 
-def get_current_user(request: Request, db: Session = Depends(get_db)):
+async def get_current_user(request: Request, db: DBSession = Depends(get_db)):
     token = extract_token(request)
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -65,14 +100,30 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username = payload.get("sub")
         if username is None:
             raise credentials_exception
-    except JWTError:
+    except TokenError:
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user_id = payload.get("uid")
+    if settings.AUTH_TRUST_USER_ID_CLAIM and isinstance(user_id, int):
+        principal_cache.record_claim_hit()
+        return Principal(user_id, username)
+
+    principal = principal_cache.get_local(username)
+    if principal is None and principal_cache.shared is not None:
+        principal = await run_in_threadpool(principal_cache.get_shared, username)
+    if principal is not None:
+        return principal
+
+    user = await run_db(db, crud.get_user_by_username, username)
     if user is None:
         raise credentials_exception
-    return user
+    principal = Principal(user.id, user.username)
+    if principal_cache.shared is not None:
+        await run_in_threadpool(principal_cache.set, principal)
+    else:
+        principal_cache.set(principal)
+    return principal
@@ -4,6 +4,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
 EXCHANGE_RATE_API_KEY = os.getenv("EXCHANGE_RATE_API_KEY")
 BASE_URL = "https://v6.exchangerate-api.com/v6"
 
@@ -16,5 +20,91 @@ class Settings:
     DB_NAME: str = os.getenv("DB_NAME")
     DATABASE_URL: str = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+    # Serve requests through an AsyncEngine (asyncpg) instead of the threadpool-bound sync engine
+    DB_ASYNC: bool = _env_bool("DB_ASYNC")
+    ASYNC_DATABASE_URL: str = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+    # Connection pool sizing; DB_EXTERNAL_POOLER hands pooling to PgBouncer (NullPool)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = _env_bool("DB_POOL_PRE_PING", True)
+    DB_EXTERNAL_POOLER: bool = _env_bool("DB_EXTERNAL_POOLER")
+
+    # Authenticated principal cache; set PRINCIPAL_CACHE_REDIS_URL to share it between workers
+    PRINCIPAL_CACHE_TTL: float = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_REDIS_URL: str = os.getenv("PRINCIPAL_CACHE_REDIS_URL")
+    # Trust the signed "uid" claim so tokens carrying it never touch the users table
+    AUTH_TRUST_USER_ID_CLAIM: bool = _env_bool("AUTH_TRUST_USER_ID_CLAIM", True)
+    # JWT library ("pyjwt" or "jose") and the number of verified access tokens kept (0 disables)
+    JWT_BACKEND: str = os.getenv("JWT_BACKEND", "pyjwt")
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+    # Password hashing process pool; logins beyond workers + queue get a 503
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+    # Scheme for new hashes; existing hashes in another scheme are upgraded on login
+    PASSWORD_HASH_SCHEME: str = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+
+    # Exchange rates: the table for BASE_CURRENCY is refreshed every TTL seconds and may be
+    # served stale (while refreshing) for STALE_TTL more
+    EXCHANGE_RATE_BASE_CURRENCY: str = os.getenv("EXCHANGE_RATE_BASE_CURRENCY", "USD")
+    EXCHANGE_RATE_BACKGROUND_REFRESH: bool = _env_bool("EXCHANGE_RATE_BACKGROUND_REFRESH", True)
+    EXCHANGE_RATE_TTL: float = float(os.getenv("EXCHANGE_RATE_TTL", "300"))
+    EXCHANGE_RATE_STALE_TTL: float = float(os.getenv("EXCHANGE_RATE_STALE_TTL", "3600"))
+    EXCHANGE_RATE_TIMEOUT: float = float(os.getenv("EXCHANGE_RATE_TIMEOUT", "5"))
+    EXCHANGE_RATE_MAX_CONNECTIONS: int = int(os.getenv("EXCHANGE_RATE_MAX_CONNECTIONS", "20"))
+
+    # Per-user analytics result cache, keyed on the user's stored expense version so writes through any worker invalidate it
+    ANALYTICS_CACHE_SIZE: int = int(os.getenv("ANALYTICS_CACHE_SIZE", "1024"))
+    ANALYTICS_CACHE_TTL: float = float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+    # Per-user category lists behind the autocomplete endpoint, same invalidation as above
+    CATEGORY_CACHE_SIZE: int = int(os.getenv("CATEGORY_CACHE_SIZE", "4096"))
+    CATEGORY_CACHE_TTL: float = float(os.getenv("CATEGORY_CACHE_TTL", "300"))
+
+    # Token-bucket rate limits as "<count>/<second|minute|hour|day>"; an empty value turns one off.
+    # Auth and currency routes are limited per client IP, expense listing per user.
+    # RATE_LIMIT_REDIS_URL shares the buckets between workers.
+    RATE_LIMIT_ENABLED: bool = _env_bool("RATE_LIMIT_ENABLED", True)
+    RATE_LIMIT_AUTH: str = os.getenv("RATE_LIMIT_AUTH", "10/minute")
+    RATE_LIMIT_CURRENCY: str = os.getenv("RATE_LIMIT_CURRENCY", "60/minute")
+    RATE_LIMIT_EXPENSE_LIST: str = os.getenv("RATE_LIMIT_EXPENSE_LIST", "300/minute")
+    # An offset page costs one extra token per this many rows skipped
+    RATE_LIMIT_DEEP_PAGE_ROWS: int = int(os.getenv("RATE_LIMIT_DEEP_PAGE_ROWS", "1000"))
+    RATE_LIMIT_BUCKETS: int = int(os.getenv("RATE_LIMIT_BUCKETS", "100000"))
+    RATE_LIMIT_REDIS_URL: str = os.getenv("RATE_LIMIT_REDIS_URL")
+    # Take the client IP from the first X-Forwarded-For entry (only behind a trusted proxy)
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = _env_bool("RATE_LIMIT_TRUST_FORWARDED_FOR")
+
+    # Bulk import: rows per INSERT/commit and the most row errors reported back
+    BULK_IMPORT_CHUNK_SIZE: int = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "1000"))
+    BULK_IMPORT_MAX_ERRORS: int = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+    # How long a keyed import holds its claim without committing a chunk before a retry may take over
+    BULK_IMPORT_LEASE_SECONDS: float = float(os.getenv("BULK_IMPORT_LEASE_SECONDS", "60"))
+    # Render JSON responses with orjson when it is installed
+    USE_ORJSON: bool = _env_bool("USE_ORJSON", True)
+
+    # Rows fetched from the server-side cursor per batch when exporting
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+    # Monthly expense partitions (Postgres): kept MONTHS_AHEAD ahead by a background task;
+    # with RETENTION_MONTHS > 0 older ones are detached, and dropped with DROP_DETACHED
+    EXPENSE_PARTITION_MAINTENANCE: bool = _env_bool("EXPENSE_PARTITION_MAINTENANCE", True)
+    EXPENSE_PARTITION_MAINTENANCE_INTERVAL: float = float(os.getenv("EXPENSE_PARTITION_MAINTENANCE_INTERVAL", "21600"))
+    EXPENSE_PARTITION_MONTHS_AHEAD: int = int(os.getenv("EXPENSE_PARTITION_MONTHS_AHEAD", "3"))
+    EXPENSE_PARTITION_RETENTION_MONTHS: int = int(os.getenv("EXPENSE_PARTITION_RETENTION_MONTHS", "0"))
+    EXPENSE_PARTITION_DROP_DETACHED: bool = _env_bool("EXPENSE_PARTITION_DROP_DETACHED")
+
+    # Per-route latency and SQL-per-request histograms, served at /metrics
+    METRICS_ENABLED: bool = _env_bool("METRICS_ENABLED", True)
+    # Bearer token the /metrics routes require; while unset they answer 404
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN")
+    # Write flame-graph stacks for requests slower than this (0 disables the sampling profiler)
+    PROFILE_SLOW_REQUEST_MS: float = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    PROFILE_OUTPUT_DIR: str = os.getenv("PROFILE_OUTPUT_DIR", "profiles")
+
 settings = Settings()
 
@@ -1,66 +1,565 @@
+import re
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, delete, false, func, insert, literal_column, or_, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app import  models, schemas
+from app import  models, rollups, schemas
+from app.utils import money
+from app.utils.bulk_import import ImportInProgress
+from app.utils.categories import category_key, category_map, normalize_category
+from app.utils.pagination import CURSOR_NEXT, CURSOR_PREV, encode_cursor, decode_cursor
 
-# Get all expenses for the authenticated user
-def get_expenses(db: Session, user_id: int, skip: int = 0, limit: int = 10, category: str = None, days: int = None):
-    query = db.query(models.Expense).filter(models.Expense.user_id == user_id) 
+ANALYTICS_BUCKETS = ("day", "week", "month", "year")
+ANALYTICS_MEASURES = ("sum", "count", "avg", "min", "max")
+
+# Load names for category ids the in-process map has not seen yet (usually none)
+def _load_categories(db: Session, category_ids):
+    missing = category_map.missing(category_ids)
+    if missing:
+        for row in db.execute(select(models.Category.id, models.Category.name).where(models.Category.id.in_(missing))):
+            category_map.add(row.id, row.name)
+
+# Id of an existing category by name, or None if that name has never been used
+def _category_id(db: Session, name: str):
+    category_id = category_map.id_for(name)
+    if category_id is None:
+        row = db.execute(select(models.Category.id, models.Category.name)
+            .where(models.Category.key == category_key(name))).first()
+        if row is None:
+            return None
+        category_map.add(row.id, row.name)
+        category_id = row.id
+    return category_id
+
+# Criterion for expenses (or rollups) in the named category; an unknown name matches nothing
+def _category_criterion(db: Session, name: str, column=None):
+    column = models.Expense.category_id if column is None else column
+    category_id = _category_id(db, name)
+    return column == category_id if category_id is not None else false()
+
+# Ids for category names by key, inserting missing categories in the caller's transaction.
+# Freshly inserted ids are not put in the map; the next read loads them once committed.
+def _ensure_categories(db: Session, names) -> dict:
+    ids = {}
+    unknown = {}
+    for name in names:
+        category_id = category_map.id_for(name)
+        if category_id is not None:
+            ids[category_key(name)] = category_id
+        else:
+            unknown.setdefault(category_key(name), normalize_category(name))
+    if not unknown:
+        return ids
+
+    Category = models.Category
+    for row in db.execute(select(Category.id, Category.name, Category.key).where(Category.key.in_(unknown))):
+        category_map.add(row.id, row.name)
+        ids[row.key] = row.id
+
+    new = {key: name for key, name in unknown.items() if key not in ids}
+    if new:
+        # ON CONFLICT lets concurrent writers introduce the same name without failing
+        dialect = sqlite if db.get_bind().dialect.name == "sqlite" else postgresql
+        db.execute(dialect.insert(Category)
+            .values([{"key": key, "name": name} for key, name in new.items()])
+            .on_conflict_do_nothing(index_elements=[Category.key]))
+        for row in db.execute(select(Category.id, Category.key).where(Category.key.in_(new))):
+            ids[row.key] = row.id
+    return ids
+
+# Make expenses serializable with their API values. Entities derive category names and
+# major-unit amounts through properties; column rows become dicts with `category` and
+# `amount` in place of `category_id` and `amount_minor`.
+def _api_values(db: Session, rows, fields: tuple = None):
+    if fields is None:
+        _load_categories(db, {row.category_id for row in rows})
+        return rows
+
+    rows = [dict(row._mapping) for row in rows]
+    if "category" in fields:
+        _load_categories(db, {row["category_id"] for row in rows})
+        for row in rows:
+            row["category"] = category_map.name(row.pop("category_id"))
+    if "amount" in fields:
+        for row in rows:
+            row["amount"] = money.to_float(row.pop("amount_minor"), row["currency"])
+    return rows
+
+# The columns an expense field is read from (categories by id, amounts in minor units)
+def _expense_columns(name: str):
+    if name == "category":
+        return [models.Expense.category_id]
+    if name == "amount":
+        return [models.Expense.amount_minor, models.Expense.currency]
+    return [getattr(models.Expense, name)]
+
+# Words of a search string as a prefix tsquery, so partly typed words match: "cof sh" -> "cof:* & sh:*"
+def _prefix_tsquery(q: str):
+    return " & ".join(f"{word}:*" for word in re.findall(r"\w+", q))
+
+# LIKE patterns escape with "/" rather than a backslash: compiled for EXPLAIN outside the
+# session's dialect, a backslash escape renders as ESCAPE '\\', which Postgres rejects.
+LIKE_ESCAPE = "/"
+
+def _escape_like(value: str):
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+# Match `q` against an expense's description and category. On Postgres that is the GIN
+# indexed search_vector plus a trigram indexed substring match on category names; other
+# databases fall back to plain ILIKE.
+def _search_criterion(db: Session, q: str):
+    pattern = "%" + _escape_like(q.strip()) + "%"
+    category_match = models.Expense.category_id.in_(
+        select(models.Category.id).where(models.Category.name.ilike(pattern, escape=LIKE_ESCAPE)))
+    if db.get_bind().dialect.name != "postgresql":
+        return or_(category_match, models.Expense.description.ilike(pattern, escape=LIKE_ESCAPE))
+
+    terms = _prefix_tsquery(q)
+    if not terms:
+        return category_match
+    text_match = models.Expense.search_vector.op("@@")(func.to_tsquery(models.SEARCH_CONFIG, terms))
+    return or_(text_match, category_match)
+
+# Base query for a user's expenses with the optional list filters applied.
+# With `fields` it selects only those columns and yields plain rows instead of entities.
+def _filtered_expenses(db: Session, user_id: int, category: str = None, days: int = None, fields: tuple = None, q: str = None):
+    entities = list(dict.fromkeys(column for name in fields for column in _expense_columns(name))) if fields else [models.Expense]
+    query = db.query(*entities).filter(models.Expense.user_id == user_id)
 
     if category:
-        query = query.filter(models.Expense.category == category)
-    
+        query = query.filter(_category_criterion(db, category))
+
+    if q and q.strip():
+        query = query.filter(_search_criterion(db, q))
+
     if days:
-        from datetime import datetime, timedelta
         start_date = datetime.utcnow() - timedelta(days=days)
         query = query.filter(models.Expense.date >= start_date)
 
-    return query.offset(skip).limit(limit).all()
+    return query
+
+# Column-only statement for exporting a user's expenses in (date, id) order.
+# Executed with stream_results so rows come off a server-side cursor in batches.
+# Category names are joined in, since the rows never pass through crud.
+def export_expenses_statement(user_id: int, category: str = None, days: int = None, batch_size: int = 1000):
+    expense = models.Expense
+    statement = (select(expense.id, expense.date, models.Category.name.label("category"),
+                        money.major_amount_float(expense.amount_minor, expense.currency).label("amount"),
+                        expense.currency, expense.description)
+        .join(models.Category, models.Category.id == expense.category_id)
+        .where(expense.user_id == user_id))
+
+    if category:
+        statement = statement.where(models.Category.key == category_key(category))
+
+    if days:
+        start_date = datetime.utcnow() - timedelta(days=days)
+        statement = statement.where(expense.date >= start_date)
+
+    return (statement
+        .order_by(expense.date, expense.id)
+        .execution_options(stream_results=True, yield_per=batch_size))
+
+# Get all expenses for the authenticated user
+def get_expenses(db: Session, user_id: int, skip: int = 0, limit: int = 10, category: str = None, days: int = None, fields: tuple = None, q: str = None):
+    query = _filtered_expenses(db, user_id, category=category, days=days, fields=fields, q=q)
+    return _api_values(db, query.offset(skip).limit(limit).all(), fields)
+
+# Get one page of expenses together with the total number of matching rows.
+# The total rides along as a window aggregate, so page and count share one round-trip.
+def get_expenses_with_count(db: Session, user_id: int, skip: int = 0, limit: int = 10, category: str = None, days: int = None, fields: tuple = None, q: str = None):
+    query = _filtered_expenses(db, user_id, category=category, days=days, fields=fields, q=q)
+    rows = query.add_columns(func.count().over().label("total_count")).offset(skip).limit(limit).all()
+
+    if not rows:
+        # Past the last page the window has nothing to report on
+        return [], (get_expenses_count(db, user_id, category=category, days=days, q=q) if skip else 0)
+    # Column rows keep the extra total_count; serialization only reads the requested fields
+    return _api_values(db, rows if fields else [row[0] for row in rows], fields), rows[0].total_count
+
+# Get one page of expenses (newest first) positioned by an opaque (date, id) cursor.
+# Every page is a single index range scan on (user_id, date, id), however deep it is.
+def get_expenses_keyset(db: Session, user_id: int, limit: int = 10, cursor: str = None, category: str = None, days: int = None, fields: tuple = None, q: str = None):
+    if fields:
+        # The cursor is built from (date, id), so those always come back
+        fields = tuple(dict.fromkeys((*fields, "date", "id")))
+    query = _filtered_expenses(db, user_id, category=category, days=days, fields=fields, q=q)
+    position = tuple_(models.Expense.date, models.Expense.id)
+    direction = CURSOR_NEXT
+
+    if cursor:
+        cursor_date, cursor_id, direction = decode_cursor(cursor)
+        # The plain date bound is implied by the row comparison, but only it lets the
+        # planner skip partitions beyond the cursor
+        if direction == CURSOR_NEXT:
+            query = query.filter(position < tuple_(cursor_date, cursor_id), models.Expense.date <= cursor_date)
+        else:
+            query = query.filter(position > tuple_(cursor_date, cursor_id), models.Expense.date >= cursor_date)
+
+    if direction == CURSOR_NEXT:
+        query = query.order_by(models.Expense.date.desc(), models.Expense.id.desc())
+    else:
+        query = query.order_by(models.Expense.date.asc(), models.Expense.id.asc())
+
+    # Fetch one extra row to learn whether another page exists in this direction
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if direction == CURSOR_PREV:
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor is not None
+
+    next_cursor = encode_cursor(rows[-1].date, rows[-1].id, CURSOR_NEXT) if rows and has_next else None
+    prev_cursor = encode_cursor(rows[0].date, rows[0].id, CURSOR_PREV) if rows and has_prev else None
+    return _api_values(db, rows, fields), next_cursor, prev_cursor
+
+# Advance the user's expense version inside the current transaction. A Core UPDATE,
+# so it does not count as a User change for the ORM listeners.
+def _bump_expense_version(db: Session, user_id: int):
+    users = models.User.__table__
+    db.execute(update(users).where(users.c.id == user_id).values(expense_version=users.c.expense_version + 1))
+
+# Get the user's current expense version (changes whenever their expenses do)
+def get_expense_version(db: Session, user_id: int):
+    users = models.User.__table__
+    return db.execute(select(users.c.expense_version).where(users.c.id == user_id)).scalar() or 0
 
 # Create a new expense
 def add_expense(db: Session, expense: schemas.ExpenseCreate, user_id: int):
-    db_expense = models.Expense(user_id=user_id,**expense.dict())
+    data = expense.dict()
+    name = data.pop("category")
+    data["category_id"] = _ensure_categories(db, [name])[category_key(name)]
+    data["amount_minor"] = money.to_minor(data.pop("amount"), data["currency"])
+    db_expense = models.Expense(user_id=user_id, **data)
     db.add(db_expense)
+    db.flush()
+    rollups.apply_expense(db, db_expense)
+    _bump_expense_version(db, user_id)
     db.commit()
     db.refresh(db_expense)
+    _load_categories(db, [db_expense.category_id])
     return db_expense
 
+# Insert a chunk of already validated expense rows in one multi-row INSERT and commit.
+# Rollup buckets are updated once per bucket and, for idempotent imports, the import's
+# progress moves forward in the same transaction. That only happens while `lease_owner`
+# still holds the import's claim (which is extended); otherwise nothing is written and
+# ImportInProgress is raised.
+def add_expenses_bulk(db: Session, user_id: int, rows: list, expense_import_id: int = None,
+                      lease_owner: str = None, lease_seconds: float = None):
+    if not rows:
+        return 0
+
+    now = datetime.utcnow()
+    if expense_import_id is not None:
+        imports = models.ExpenseImport.__table__
+        progressed = db.execute(update(imports)
+            .where(imports.c.id == expense_import_id, imports.c.lease_owner == lease_owner)
+            .values(rows_committed=imports.c.rows_committed + len(rows),
+                    lease_expires_at=now + timedelta(seconds=lease_seconds)))
+        if progressed.rowcount != 1:
+            db.rollback()
+            raise ImportInProgress("The import's claim was taken over by another request")
+
+    category_ids = _ensure_categories(db, {row["category"] for row in rows})
+    values = [{
+        "user_id": user_id,
+        "amount_minor": money.to_minor(row["amount"], row.get("currency") or models.DEFAULT_CURRENCY),
+        "category_id": category_ids[category_key(row["category"])],
+        "description": row.get("description"),
+        "currency": row.get("currency") or models.DEFAULT_CURRENCY,
+        "date": row.get("date") or now,
+    } for row in rows]
+    db.execute(insert(models.Expense), values)
+
+    rollups.apply_changes(db, user_id, added=[
+        (value["date"], value["category_id"], value["currency"], value["amount_minor"]) for value in values])
+
+    _bump_expense_version(db, user_id)
+    db.commit()
+    return len(values)
+
+# Get the bulk import registered under an idempotency key, creating it on first use
+def get_or_create_expense_import(db: Session, user_id: int, idempotency_key: str, request_hash: str = None):
+    query = db.query(models.ExpenseImport).filter(
+        models.ExpenseImport.user_id == user_id,
+        models.ExpenseImport.idempotency_key == idempotency_key)
+    expense_import = query.first()
+    if expense_import:
+        return expense_import
+
+    expense_import = models.ExpenseImport(user_id=user_id, idempotency_key=idempotency_key,
+                                          request_hash=request_hash, rows_committed=0)
+    db.add(expense_import)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request with the same key got there first
+        db.rollback()
+        return query.first()
+    db.refresh(expense_import)
+    return expense_import
+
+# Claim an unfinished import for `lease_owner` until the lease runs out. Succeeds only if
+# nobody holds it or the holder's lease has expired, so one request at a time writes rows.
+# Returns the import as of the claim (its rows_committed is where to resume), or None.
+def claim_expense_import(db: Session, expense_import_id: int, lease_owner: str, lease_seconds: float):
+    imports = models.ExpenseImport.__table__
+    now = datetime.utcnow()
+    claimed = db.execute(update(imports)
+        .where(imports.c.id == expense_import_id, imports.c.status == "processing",
+               or_(imports.c.lease_owner.is_(None), imports.c.lease_expires_at < now))
+        .values(lease_owner=lease_owner, lease_expires_at=now + timedelta(seconds=lease_seconds)))
+    db.commit()
+    if claimed.rowcount != 1:
+        return None
+    return db.query(models.ExpenseImport).filter(models.ExpenseImport.id == expense_import_id).populate_existing().first()
+
+# Give up a claim after a failed attempt so a retry does not wait out the lease
+def release_expense_import(db: Session, expense_import_id: int, lease_owner: str):
+    db.rollback()
+    imports = models.ExpenseImport.__table__
+    db.execute(update(imports)
+        .where(imports.c.id == expense_import_id, imports.c.lease_owner == lease_owner)
+        .values(lease_owner=None, lease_expires_at=None))
+    db.commit()
+
+# Store the final outcome of an idempotent bulk import so retries can replay it
+def complete_expense_import(db: Session, expense_import_id: int, result: str, lease_owner: str):
+    imports = models.ExpenseImport.__table__
+    db.execute(update(imports)
+        .where(imports.c.id == expense_import_id, imports.c.lease_owner == lease_owner)
+        .values(status="completed", result=result, lease_owner=None, lease_expires_at=None))
+    db.commit()
+
 # Get an expense by ID
 # def get_expense_by_id(db: Session, expense_id: int):
 #     return db.query(models.Expense).filter(models.Expense.id == expense_id).first()
 def get_expense_by_id(db: Session, expense_id: int, user_id: int):
-    return db.query(models.Expense).filter(
+    expense = db.query(models.Expense).filter(
         models.Expense.id == expense_id,
         models.Expense.user_id == user_id).first()
+    if expense:
+        _load_categories(db, [expense.category_id])
+    return expense
 
 # Get total count of expenses
-def get_expenses_count(db: Session, user_id: int, category: str = None, days: int = None):
-    query = db.query(models.Expense).filter(models.Expense.user_id == user_id)
+def get_expenses_count(db: Session, user_id: int, category: str = None, days: int = None, q: str = None):
+    return _filtered_expenses(db, user_id, category=category, days=days, q=q).count()
 
-    if category:
-        query = query.filter(models.Expense.category == category)
+# Get the planner's row estimate for the filtered expense query.
+# Much cheaper than count() for large users; falls back to an exact count off Postgres.
+def get_expenses_count_estimate(db: Session, user_id: int, category: str = None, days: int = None, q: str = None):
+    query = _filtered_expenses(db, user_id, category=category, days=days, q=q)
+    dialect = db.get_bind().dialect
+    if dialect.name != "postgresql":
+        return query.count()
 
-    if days:
-        from datetime import datetime, timedelta
-        start_date = datetime.utcnow() - timedelta(days=days)
-        query = query.filter(models.Expense.date >= start_date)
+    plan = db.execute(_explain(query.statement)).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+# EXPLAIN of `statement` as a text() with typed binds, so each driver renders its own
+# placeholders (psycopg2's %(name)s, asyncpg's $1) as for any other statement.
+# Expanded IN lists get one bind per value, typed from the value itself.
+def _explain(statement):
+    compiled = statement.compile(dialect=postgresql.dialect(paramstyle="named"),
+                                 compile_kwargs={"render_postcompile": True})
+    types = {name: bind.type for name, bind in compiled.binds.items()}
+    return text("EXPLAIN (FORMAT JSON) " + str(compiled)).bindparams(
+        *(bindparam(name, value, type_=types.get(name)) for name, value in compiled.params.items()))
+
+EXPENSE_COLUMNS = ("id", "category_id", "amount_minor", "currency", "description", "date", "user_id")
+
+# UPDATE the user's expenses matching `criteria` in one statement. On Postgres the FROM
+# subquery reads the pre-update values, so RETURNING yields old and new rows for the rollup.
+# Other databases (SQLite) evaluate RETURNING against the updated row even for the
+# subquery's columns, so there the old values are selected first and the UPDATE targets their ids.
+def _update_expenses(db: Session, user_id: int, criteria, values: dict):
+    expenses = models.Expense.__table__
+    old = (select(expenses.c.id, expenses.c.date, expenses.c.category_id, expenses.c.currency, expenses.c.amount_minor)
+        .where(expenses.c.user_id == user_id, *criteria)
+        .with_for_update())
 
-    return query.count()
+    if db.get_bind().dialect.name == "postgresql":
+        old = old.subquery("old")
+        # Joining on the full (id, date) key lets each row's lookup prune to one partition
+        statement = (update(expenses)
+            .where(expenses.c.id == old.c.id, expenses.c.date == old.c.date)
+            .values(**values)
+            .returning(
+                *(expenses.c[name] for name in EXPENSE_COLUMNS),
+                old.c.date.label("old_date"),
+                old.c.category_id.label("old_category_id"),
+                old.c.currency.label("old_currency"),
+                old.c.amount_minor.label("old_amount_minor")))
+        rows = db.execute(statement).all()
+        removed = [(row.old_date, row.old_category_id, row.old_currency, row.old_amount_minor) for row in rows]
+    else:
+        old_rows = db.execute(old).all()
+        statement = (update(expenses)
+            .where(expenses.c.user_id == user_id, expenses.c.id.in_([row.id for row in old_rows]))
+            .values(**values)
+            .returning(*(expenses.c[name] for name in EXPENSE_COLUMNS)))
+        rows = db.execute(statement).all() if old_rows else []
+        removed = [(row.date, row.category_id, row.currency, row.amount_minor) for row in old_rows]
+
+    rollups.apply_changes(db, user_id,
+        removed=removed,
+        added=[(row.date, row.category_id, row.currency, row.amount_minor) for row in rows])
+    if rows:
+        _bump_expense_version(db, user_id)
+    db.commit()
+    return rows
+
+# DELETE the user's expenses matching `criteria` in one statement, returning what was removed
+def _delete_expenses(db: Session, user_id: int, criteria):
+    expenses = models.Expense.__table__
+    statement = (delete(expenses)
+        .where(expenses.c.user_id == user_id, *criteria)
+        .returning(expenses.c.id, expenses.c.date, expenses.c.category_id, expenses.c.currency, expenses.c.amount_minor))
+
+    rows = db.execute(statement).all()
+    rollups.apply_changes(db, user_id,
+        removed=[(row.date, row.category_id, row.currency, row.amount_minor) for row in rows])
+    if rows:
+        _bump_expense_version(db, user_id)
+    db.commit()
+    return rows
 
-# Update an existing expense
+# Update an existing expense; returns the updated row, or None if the user has no such expense.
+# Raises ValueError for an amount that is not a storable number of minor units.
+# The row is looked up first so a missing or foreign id never creates the new category.
 def update_expense(db: Session, user_id: int, expense_id: int, updated_data: schemas.ExpenseUpdate):
-    db_expense = db.query(models.Expense).filter(models.Expense.id == expense_id, models.Expense.user_id == user_id).first()
-    if db_expense:
-        update_dict = updated_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            setattr(db_expense, key, value)
-        db.commit()
-        db.refresh(db_expense)
-    return db_expense
+    expenses = models.Expense.__table__
+    current = db.execute(select(expenses.c.currency)
+        .where(expenses.c.user_id == user_id, expenses.c.id == expense_id)).first()
+    if current is None:
+        return None
+
+    values = updated_data.dict(exclude_unset=True)
+    if "amount" in values:
+        amount = values.pop("amount")
+        # Checked in the currency the row will have; raises ValueError for the router
+        money.check_expense_amount(amount, values.get("currency", current.currency))
+        # Without a new currency the stored one decides the minor unit, so SQL converts
+        values["amount_minor"] = (money.to_minor(amount, values["currency"]) if "currency" in values
+                                  else money.minor_amount(amount, models.Expense.__table__.c.currency))
+    if "category" in values:
+        name = values.pop("category")
+        values["category_id"] = _ensure_categories(db, [name])[category_key(name)]
+    rows = _update_expenses(db, user_id, [models.Expense.id == expense_id], values)
+    return _api_values(db, rows, ("category", "amount"))[0] if rows else None
 
 # Delete an expense
 def delete_expense(db: Session, user_id: int, expense_id: int):
-    db_expense = db.query(models.Expense).filter(models.Expense.id == expense_id, models.Expense.user_id == user_id).first()
-    if db_expense:
-        db.delete(db_expense)
+    return bool(_delete_expenses(db, user_id, [models.Expense.id == expense_id]))
+
+# Move many expenses to another category; returns the updated rows
+def recategorize_expenses(db: Session, user_id: int, expense_ids: list, category: str):
+    category_id = _ensure_categories(db, [category])[category_key(category)]
+    return _update_expenses(db, user_id, [models.Expense.id.in_(expense_ids)], {"category_id": category_id})
+
+# Delete expenses by id and/or filter; returns the ids that were deleted
+def delete_expenses(db: Session, user_id: int, expense_ids: list = None, category: str = None,
+                    start_date: datetime = None, end_date: datetime = None):
+    criteria = []
+    if expense_ids is not None:
+        criteria.append(models.Expense.id.in_(expense_ids))
+    if category:
+        criteria.append(_category_criterion(db, category))
+    if start_date:
+        criteria.append(models.Expense.date >= start_date)
+    if end_date:
+        criteria.append(models.Expense.date < end_date)
+    return [row.id for row in _delete_expenses(db, user_id, criteria)]
+
+# Get the monthly spending totals for a user, read from the pre-aggregated rollup.
+# Totals are summed as integers and, since amounts in different currencies do not
+# add up, stay split per currency. Returns dicts with month, total_spent and currency.
+def get_monthly_expense_report(db: Session, user_id: int, category: str = None):
+    rollup = models.ExpenseMonthlyRollup
+    query = (db.query(rollup.month, rollup.currency, func.sum(rollup.total_minor).label('total_minor'))
+        .filter(rollup.user_id == user_id)
+        .group_by(rollup.month, rollup.currency)
+        .order_by(rollup.month, rollup.currency))
+
+    if category:
+        query = query.filter(_category_criterion(db, category, rollup.category_id))
+
+    return [{"month": row.month, "total_spent": money.to_float(row.total_minor, row.currency), "currency": row.currency}
+            for row in query]
+
+# Get the distinct categories the user has expenses in. Read from the rollup table,
+# which has one row per (month, category, currency) rather than one per expense.
+def get_expense_categories(db: Session, user_id: int):
+    Rollup = models.ExpenseMonthlyRollup
+    category_ids = [row.category_id for row in db.query(Rollup.category_id).filter(Rollup.user_id == user_id).distinct()]
+    _load_categories(db, category_ids)
+    return sorted(category_map.name(category_id) for category_id in category_ids)
+
+# Aggregate a user's expenses into time buckets (optionally per category) in one query.
+# `measures` is a subset of ANALYTICS_MEASURES; `percentile` (0-1) adds a percentile_cont column.
+# Amounts in different currencies do not add up, so every bucket is also per currency.
+# Grouping runs on category ids; rows come back as dicts with category names.
+def get_expense_analytics(db: Session, user_id: int, bucket: str = "month", measures=("sum", "count"),
+                          group_by_category: bool = False, percentile: float = None,
+                          start_date: datetime = None, end_date: datetime = None, category: str = None):
+    amount = money.major_amount(models.Expense.amount_minor, models.Expense.currency)
+    if bucket not in ANALYTICS_BUCKETS:
+        raise ValueError(f"Unsupported bucket {bucket!r}")
+    # Inlined (it is whitelisted) so SELECT and GROUP BY share one identical expression
+    period = func.date_trunc(literal_column(f"'{bucket}'"), models.Expense.date).label('period')
+    aggregates = {
+        "sum": func.sum(amount),
+        "count": func.count(models.Expense.id),
+        "avg": func.avg(amount),
+        "min": func.min(amount),
+        "max": func.max(amount),
+    }
+
+    columns = [period]
+    group_by = [period]
+    if group_by_category:
+        columns.append(models.Expense.category_id)
+        group_by.append(models.Expense.category_id)
+    columns.append(models.Expense.currency)
+    group_by.append(models.Expense.currency)
+    columns += [aggregates[name].label(name) for name in measures]
+    if percentile is not None:
+        columns.append(func.percentile_cont(percentile).within_group(amount.asc()).label('percentile'))
+
+    query = db.query(*columns).filter(models.Expense.user_id == user_id)
+    if start_date:
+        query = query.filter(models.Expense.date >= start_date)
+    if end_date:
+        query = query.filter(models.Expense.date < end_date)
+    if category:
+        query = query.filter(_category_criterion(db, category))
+
+    rows = query.group_by(*group_by).order_by(*group_by).all()
+    return _api_values(db, rows, ("category",) if group_by_category else ())
+
+# Get a user by username
+def get_user_by_username(db: Session, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
+
+# Create a new user
+def create_user(db: Session, username: str, hashed_password: str):
+    db_user = models.User(username=username, hashed_password=hashed_password)
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+# Replace a user's password hash (e.g. after upgrading the hashing scheme)
+def update_user_password(db: Session, user_id: int, hashed_password: str):
+    db_user = db.query(models.User).filter(models.User.id == user_id).first()
+    if db_user:
+        db_user.hashed_password = hashed_password
         db.commit()
-        return True 
-    return False  
+        db.refresh(db_user)
+    return db_user
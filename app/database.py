@@ -1,18 +1,70 @@
+from typing import Union
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+from starlette.concurrency import run_in_threadpool
 import os
 from app.config import settings
+from app.utils.metrics import instrument_statements
+from app.utils.pool_metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool, instrument_engine
 
-engine = create_engine(settings.DATABASE_URL)
+def _pool_options(queue_pool_class):
+    # Behind PgBouncer the app must not hold connections of its own
+    if settings.DB_EXTERNAL_POOLER:
+        return {"poolclass": NullPool, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    return {
+        "poolclass": queue_pool_class,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(settings.DATABASE_URL, **_pool_options(TimedQueuePool))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine is only built when enabled, so asyncpg stays optional for sync deployments
+async_engine = (
+    create_async_engine(settings.ASYNC_DATABASE_URL, **_pool_options(TimedAsyncAdaptedQueuePool))
+    if settings.DB_ASYNC else None
+)
+
+# Only the engine that serves requests feeds the pool metrics
+serving_engine = async_engine.sync_engine if async_engine is not None else engine
+instrument_engine(serving_engine)
+if settings.METRICS_ENABLED:
+    instrument_statements(serving_engine)
+
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None else None
+)
+
 Base = declarative_base()
 
-def get_db():
+DBSession = Union[Session, AsyncSession]
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+# Run a crud function (written against a sync Session) from an async handler.
+# With an AsyncSession it runs on the event loop via the session's greenlet bridge;
+# with a sync Session it runs in the threadpool as FastAPI does for `def` routes.
+async def run_db(db: DBSession, fn, *args, **kwargs):
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
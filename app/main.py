@@ -1,10 +1,61 @@
-from fastapi import FastAPI, Request
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app import partitions
 from app.routers import expenses, users, currency
+from app.auth import principal_cache, token_cache
+from app.config import settings
+from app.utils.currency import close_http_client, rate_service, start_http_client
+from app.utils.hashing import PasswordHasherBusy, password_hasher
+from app.database import serving_engine
+from app.utils import metrics
+from app.utils.pool_metrics import pool_metrics
+from app.utils.profiler import SlowRequestProfiler
+from app.utils.rate_limit import RateLimited
+from app.rate_limits import limiter
+from app.utils.responses import FastJSONResponse
 from fastapi.openapi.utils import get_openapi
 
-app = FastAPI()
+profiler = (
+    SlowRequestProfiler(
+        threshold=settings.PROFILE_SLOW_REQUEST_MS / 1000,
+        interval=settings.PROFILE_SAMPLE_INTERVAL_MS / 1000,
+        output_dir=settings.PROFILE_OUTPUT_DIR,
+    )
+    if settings.PROFILE_SLOW_REQUEST_MS > 0 else None
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client()
+    if settings.EXCHANGE_RATE_BACKGROUND_REFRESH:
+        rate_service.start_refresher()
+    if profiler is not None:
+        profiler.start()
+    maintenance = None
+    if settings.EXPENSE_PARTITION_MAINTENANCE:
+        maintenance = asyncio.ensure_future(partitions.run_maintenance(
+            settings.EXPENSE_PARTITION_MAINTENANCE_INTERVAL,
+            months_ahead=settings.EXPENSE_PARTITION_MONTHS_AHEAD,
+            retain_months=settings.EXPENSE_PARTITION_RETENTION_MONTHS,
+            drop=settings.EXPENSE_PARTITION_DROP_DETACHED,
+        ))
+    yield
+    if maintenance is not None:
+        maintenance.cancel()
+    if profiler is not None:
+        profiler.stop()
+    await rate_service.stop_refresher()
+    await close_http_client()
+    password_hasher.shutdown()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware, profiler=profiler)
 
 app.include_router(expenses.router)
 app.include_router(users.router)
@@ -35,6 +86,56 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+# Metrics reveal traffic and cache internals, so they are only served with the METRICS_TOKEN bearer token
+async def require_metrics_token(request: Request):
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+
+# Function to expose request latency, SQL-per-request and cache counters in Prometheus text format
+@app.get("/metrics", tags=["Metrics"], response_class=PlainTextResponse, dependencies=[Depends(require_metrics_token)])
+def get_metrics():
+    caches = {
+        "rate_table_hits": rate_service.hits,
+        "rate_table_stale_hits": rate_service.stale_hits,
+        "rate_table_misses": rate_service.misses,
+        "rate_table_upstream_calls": rate_service.upstream_calls,
+        "analytics_hits": expenses.analytics_cache.hits,
+        "analytics_misses": expenses.analytics_cache.misses,
+        "categories_hits": expenses.category_cache.hits,
+        "categories_misses": expenses.category_cache.misses,
+    }
+    body = metrics.render(extra=(
+        metrics.render_gauges("db_pool", pool_metrics.snapshot(serving_engine.pool), "Connection pool metric."),
+        metrics.render_gauges("principal_cache", principal_cache.snapshot(), "Authenticated principal cache metric."),
+        metrics.render_gauges("token_cache", token_cache.snapshot(), "Verified access token cache metric."),
+        metrics.render_gauges("rate_limit", limiter.snapshot(), "Rate limiter decisions."),
+        metrics.render_gauges("cache", caches, "Application cache counter."),
+    ))
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+# Connection pool usage, for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW from real traffic
+@app.get("/metrics/pool", tags=["Metrics"], dependencies=[Depends(require_metrics_token)])
+def get_pool_metrics():
+    return {
+        "data": pool_metrics.snapshot(serving_engine.pool),
+        "success": True,
+        "statuscode": 200,
+        "message": "Connection pool metrics retrieved successfully"
+    }
+
+# Auth cache effectiveness: requests that skipped the users table (principals) or JWT verification (tokens)
+@app.get("/metrics/auth-cache", tags=["Metrics"], dependencies=[Depends(require_metrics_token)])
+def get_auth_cache_metrics():
+    return {
+        "data": {**principal_cache.snapshot(), "tokens": token_cache.snapshot()},
+        "success": True,
+        "statuscode": 200,
+        "message": "Authentication cache metrics retrieved successfully"
+    }
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     first_error = exc.errors()[0]  
@@ -49,4 +150,30 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
             "statuscode": 400,
             "message": error_message
         }
-    )
\ No newline at end of file
+    )
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "1"},
+        content={
+            "error": "Service busy",
+            "success": False,
+            "statuscode": 503,
+            "message": "Too many authentication requests in progress. Please retry shortly."
+        }
+    )
+
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request: Request, exc: RateLimited):
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": exc.retry_after_header},
+        content={
+            "error": "Too many requests",
+            "success": False,
+            "statuscode": 429,
+            "message": f"Rate limit exceeded. Please retry in {exc.retry_after_header} seconds."
+        }
+    )
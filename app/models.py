@@ -1,24 +1,108 @@
-from sqlalchemy import Column, DateTime, String, Integer, Float, ForeignKey
+from sqlalchemy import BigInteger, Column, Computed, DateTime, String, Integer, ForeignKey, Index, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from app.database import Base
 import datetime
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
+from app.utils import money
+from app.utils.categories import category_map
+
+DEFAULT_CURRENCY = "USD"
+SEARCH_CONFIG = "english"
+
+class Category(Base):
+    __tablename__ = 'categories'
+
+    # Dictionary of category names; expenses and rollups store the integer id.
+    # `key` is the lowercased, whitespace-collapsed name, so casing variants share an id
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+
+    # The trigram index serves substring matches on category names for `q=` search
+    __table_args__ = (
+        UniqueConstraint("key", name="uq_categories_key"),
+        Index("ix_categories_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"}),
+    )
 
 class Expense(Base):
     __tablename__ = 'expenses'
 
     id = Column(Integer, primary_key=True, index=True)
-    category = Column(String, index=True, nullable=False)
-    amount = Column(Float, index=True, nullable=False)
+    category_id = Column(Integer, ForeignKey('categories.id'), index=True, nullable=False)
+    # Exact integer count of the currency's minor units (cents for USD, yen for JPY)
+    amount_minor = Column(BigInteger, index=True, nullable=False)
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY)
     description = Column(String, nullable=True)
-    date = Column(DateTime, index=True, default=datetime.datetime.utcnow)
+    # Partition key: on Postgres the table is range-partitioned by month on `date` and its
+    # primary key is (id, date). Ids still come from one sequence, so the ORM keys rows by id.
+    date = Column(DateTime, index=True, nullable=False, default=datetime.datetime.utcnow)
     user_id = Column(Integer, ForeignKey('users.id')) 
+    # Maintained by Postgres from the description; only ever used in WHERE clauses
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}', coalesce(description, ''))", persisted=True)))
 
     user = relationship("User", back_populates="expenses")
 
+    # Serves the per-user (date, id) ordering used by keyset pagination; the GIN index
+    # serves `q=` full-text search
+    __table_args__ = (
+        Index("ix_expenses_user_id_date_id", "user_id", "date", "id"),
+        Index("ix_expenses_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    # Category name from the in-process map; crud loads any id the map has not seen yet
+    @property
+    def category(self):
+        return category_map.name(self.category_id)
+
+    # Amount in major units as the API reports it
+    @property
+    def amount(self):
+        return money.to_float(self.amount_minor, self.currency)
+
+class ExpenseMonthlyRollup(Base):
+    __tablename__ = 'expense_monthly_rollups'
+
+    # Pre-aggregated totals per user, month ('YYYY-MM'), category and currency, kept
+    # current by the expense writes in app/crud.py
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    month = Column(String(7), primary_key=True)
+    category_id = Column(Integer, ForeignKey('categories.id'), primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    total_minor = Column(BigInteger, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+
+class ExpenseImport(Base):
+    __tablename__ = 'expense_imports'
+
+    # One row per idempotent bulk import; rows_committed advances with each committed
+    # chunk so a retried import resumes instead of inserting duplicates.
+    # The request holding lease_owner until lease_expires_at is the only one writing rows;
+    # request_hash ties the key to one request body
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    idempotency_key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=True)
+    status = Column(String(16), nullable=False, default="processing")
+    rows_committed = Column(Integer, nullable=False, default=0)
+    lease_owner = Column(String(36), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    result = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "idempotency_key", name="uq_expense_imports_user_id_key"),
+    )
+
 class User(Base):
     __tablename__ = 'users'
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # Bumped in the same transaction as every write to this user's expenses; read to
+    # build ETags for the expense read endpoints
+    expense_version = Column(Integer, nullable=False, default=0, server_default="0")
     expenses = relationship("Expense", back_populates="user")
\ No newline at end of file
@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app import models
+
+logger = logging.getLogger(__name__)
+
+PARENT = "expenses"
+PREFIX = "expenses_p"
+DEFAULT_PARTITION = "expenses_default"
+COLUMNS = "id, category_id, amount_minor, currency, description, date, user_id"
+# pg_advisory_xact_lock key, so only one worker at a time changes the partition set
+LOCK_KEY = 0x65787061
+# Months of history that get their own partition; older rows stay in the default one,
+# as the partitioning migration left them
+MONTHS_BACK = 24
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PREFIX}{month:%Y%m}"
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:parent))"),
+        {"parent": PARENT}).scalar()
+
+
+# Attached partitions as {first day of month: name}, plus whether the default partition exists
+def list_partitions(db: Session):
+    names = db.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "WHERE i.inhparent = to_regclass(:parent)"),
+        {"parent": PARENT}).scalars().all()
+    months = {}
+    for name in names:
+        if name.startswith(PREFIX):
+            try:
+                months[datetime.strptime(name[len(PREFIX):], "%Y%m")] = name
+            except ValueError:
+                pass
+    return months, DEFAULT_PARTITION in names
+
+
+def create_partition(db: Session, month: datetime, has_default: bool = True):
+    name = partition_name(month)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    clause = f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{bounds['end']:%Y-%m-%d}')"
+    stray = has_default and db.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end)"),
+        bounds).scalar()
+
+    if not stray:
+        db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT} {clause}"))
+        return name
+
+    # The default partition already holds rows for this month, which would make the new
+    # range overlap it; detach it, move those rows across and attach it back
+    db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} {clause}"))
+    db.execute(text(f"INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM {DEFAULT_PARTITION} "
+                    "WHERE date >= :start AND date < :end"), bounds)
+    db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end"), bounds)
+    db.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return name
+
+
+# Partitions from this month through `months_ahead`, and for any month whose rows
+# ended up in the default partition (e.g. backdated imports). Only months from
+# MONTHS_BACK ago (or `not_before`, if later) through `months_ahead` are carved out;
+# rows outside that window stay in the default partition.
+def ensure_partitions(db: Session, months_ahead: int = 3, not_before: datetime = None):
+    partitions, has_default = list_partitions(db)
+    current = month_start(datetime.utcnow())
+    first = add_months(current, -MONTHS_BACK)
+    if not_before is not None:
+        first = max(first, not_before)
+    last = add_months(current, months_ahead)
+    wanted = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    if has_default:
+        wanted.update(month_start(row) for row in db.execute(
+            text(f"SELECT DISTINCT date_trunc('month', date) FROM {DEFAULT_PARTITION}")).scalars())
+    return [create_partition(db, month, has_default) for month in sorted(wanted)
+            if month not in partitions and first <= month <= last]
+
+
+# Detach partitions of months before `cutoff`, dropping them with `drop`. Their rows
+# leave every query, so their rollup buckets go too and the owners' ETags change.
+# Older rows still in the default partition stay queryable and keep their buckets.
+def detach_partitions(db: Session, cutoff: datetime, drop: bool = False):
+    partitions, _ = list_partitions(db)
+    detached = []
+    for month, name in sorted(partitions.items()):
+        if month < cutoff:
+            db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+            if drop:
+                db.execute(text(f"DROP TABLE {name}"))
+            detached.append(month)
+
+    if detached:
+        rollup = models.ExpenseMonthlyRollup.__table__
+        users = models.User.__table__
+        months = [f"{month:%Y-%m}" for month in detached]
+        db.execute(update(users)
+            .where(users.c.id.in_(select(rollup.c.user_id).where(rollup.c.month.in_(months))))
+            .values(expense_version=users.c.expense_version + 1))
+        db.execute(delete(rollup).where(rollup.c.month.in_(months)))
+    return [partition_name(month) for month in detached]
+
+
+def maintain(db: Session, months_ahead: int = 3, retain_months: int = 0, drop: bool = False):
+    """Create upcoming partitions and, with `retain_months`, detach (or drop) older ones.
+
+    A no-op unless `expenses` is a partitioned Postgres table. Safe to run from every
+    worker: an advisory lock serialises them, and a short lock_timeout keeps DDL from
+    queueing the app's queries behind a long-running one; that run just fails and the
+    next one retries.
+    """
+    if not is_partitioned(db):
+        return None
+
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+    db.execute(text("SET LOCAL lock_timeout = '5s'"))
+    cutoff = add_months(month_start(datetime.utcnow()), -retain_months) if retain_months else None
+    detached = detach_partitions(db, cutoff, drop) if cutoff else []
+    created = ensure_partitions(db, months_ahead, not_before=cutoff)
+    db.commit()
+
+    if created or detached:
+        logger.info("Expense partitions created: %s; detached%s: %s", created, " and dropped" if drop else "", detached)
+    return {"created": created, "detached": detached}
+
+
+def _maintain_with_new_session(**options):
+    # Looked up per run, so a replaced session factory is honoured
+    from app import database
+
+    with database.SessionLocal() as db:
+        return maintain(db, **options)
+
+
+async def run_maintenance(interval: float, **options):
+    """Background loop for the app lifespan: maintain now, then every `interval` seconds."""
+    while True:
+        try:
+            await run_in_threadpool(_maintain_with_new_session, **options)
+        except Exception as exc:
+            # Rows for a missing month land in the default partition meanwhile; retry next tick
+            logger.warning("Expense partition maintenance failed: %s", exc)
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create upcoming expense partitions and retire old ones.")
+    parser.add_argument("--months-ahead", type=int, default=3, help="keep partitions this many months ahead")
+    parser.add_argument("--retain-months", type=int, default=0, help="detach partitions older than this (0 keeps all)")
+    parser.add_argument("--drop", action="store_true", help="drop detached partitions instead of keeping them as tables")
+    args = parser.parse_args()
+
+    result = _maintain_with_new_session(months_ahead=args.months_ahead, retain_months=args.retain_months, drop=args.drop)
+    print("expenses is not partitioned; nothing to do." if result is None else f"Expense partitions maintained: {result}")
@@ -0,0 +1,51 @@
+from fastapi import Depends, Request
+from app import auth
+from app.config import settings
+from app.utils.rate_limit import InMemoryRateLimitBackend, Limit, RateLimiter, RedisRateLimitBackend
+
+limiter = RateLimiter(
+    InMemoryRateLimitBackend(maxsize=settings.RATE_LIMIT_BUCKETS),
+    shared=RedisRateLimitBackend.from_url(settings.RATE_LIMIT_REDIS_URL) if settings.RATE_LIMIT_REDIS_URL else None,
+)
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded_for = request.headers.get("X-Forwarded-For")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+# Dependency limiting a route per client IP, for routes used before (or without) logging in
+def limit_by_ip(scope: str, spec: str):
+    limit = Limit.parse(spec)
+
+    async def check_ip_rate_limit(request: Request):
+        if settings.RATE_LIMIT_ENABLED and limit is not None:
+            await limiter.check(f"{scope}:ip:{client_ip(request)}", limit)
+    return check_ip_rate_limit
+
+
+# Dependency limiting a route per authenticated user. `cost(request)` charges expensive
+# requests more than one token. Shares the route's own get_current_user result.
+def limit_by_user(scope: str, spec: str, cost=None):
+    limit = Limit.parse(spec)
+
+    async def check_user_rate_limit(request: Request, current_user: auth.Principal = Depends(auth.get_current_user)):
+        if settings.RATE_LIMIT_ENABLED and limit is not None:
+            await limiter.check(f"{scope}:user:{current_user.id}", limit, cost(request) if cost else 1)
+    return check_user_rate_limit
+
+
+# Offset pages make the database read and discard every skipped row, so deep pages
+# cost an extra token per RATE_LIMIT_DEEP_PAGE_ROWS skipped. Cursor pages cost one.
+def offset_page_cost(request: Request) -> int:
+    params = request.query_params
+    if params.get("pagination") == "cursor" or params.get("cursor"):
+        return 1
+    try:
+        skipped = max(int(params.get("page", 1)) - 1, 0) * max(int(params.get("limit", 10)), 0)
+    except ValueError:
+        return 1
+    return 1 + skipped // max(settings.RATE_LIMIT_DEEP_PAGE_ROWS, 1)
@@ -0,0 +1,90 @@
+import argparse
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import models
+
+Rollup = models.ExpenseMonthlyRollup
+
+
+def month_key(date) -> str:
+    return date.strftime("%Y-%m")
+
+
+def _upsert(db: Session):
+    # ON CONFLICT keeps concurrent writers to the same bucket from losing increments
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(Rollup)
+    return postgresql.insert(Rollup)
+
+
+# Add (or with sign=-1 remove) one expense's contribution to its monthly bucket.
+# Runs inside the caller's transaction, so the rollup commits or rolls back with the expense.
+def apply_expense(db: Session, expense: models.Expense, sign: int = 1):
+    apply_delta(db, expense.user_id, month_key(expense.date), expense.category_id, expense.currency, sign * expense.amount_minor, sign)
+
+
+def apply_delta(db: Session, user_id: int, month: str, category_id: int, currency: str, minor_delta: int, count_delta: int):
+    key = {"user_id": user_id, "month": month, "category_id": category_id, "currency": currency}
+    statement = _upsert(db).values(**key, total_minor=minor_delta, expense_count=count_delta)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Rollup.user_id, Rollup.month, Rollup.category_id, Rollup.currency],
+        set_={
+            "total_minor": Rollup.total_minor + statement.excluded.total_minor,
+            "expense_count": Rollup.expense_count + statement.excluded.expense_count,
+        },
+    )
+    db.execute(statement)
+
+    if count_delta < 0:
+        db.execute(delete(Rollup).filter_by(**key).where(Rollup.expense_count <= 0))
+
+
+# Fold many (date, category_id, currency, amount_minor) row changes into one upsert per touched bucket
+def apply_changes(db: Session, user_id: int, removed=(), added=()):
+    buckets = {}
+    for rows, sign in ((removed, -1), (added, 1)):
+        for date, category_id, currency, amount_minor in rows:
+            key = (month_key(date), category_id, currency)
+            total, count = buckets.get(key, (0, 0))
+            buckets[key] = (total + sign * amount_minor, count + sign)
+
+    for (month, category_id, currency), (total, count) in buckets.items():
+        if count or total:
+            apply_delta(db, user_id, month, category_id, currency, total, count)
+
+
+# Recompute the rollup from the expenses table, for one user or everybody
+def rebuild(db: Session, user_id: int = None):
+    month = func.to_char(models.Expense.date, 'YYYY-MM')
+    source = (select(
+            models.Expense.user_id,
+            month,
+            models.Expense.category_id,
+            models.Expense.currency,
+            func.sum(models.Expense.amount_minor),
+            func.count())
+        .where(models.Expense.user_id.isnot(None), models.Expense.date.isnot(None))
+        .group_by(models.Expense.user_id, month, models.Expense.category_id, models.Expense.currency))
+    clear = delete(Rollup)
+
+    if user_id is not None:
+        source = source.where(models.Expense.user_id == user_id)
+        clear = clear.where(Rollup.user_id == user_id)
+
+    db.execute(clear)
+    db.execute(insert(Rollup).from_select(
+        ["user_id", "month", "category_id", "currency", "total_minor", "expense_count"], source))
+    db.commit()
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild the monthly expense rollup table.")
+    parser.add_argument("--user-id", type=int, default=None, help="only rebuild this user's rows")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        rebuild(db, user_id=args.user_id)
+    print("Monthly expense rollup rebuilt.")
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from app.utils.currency import get_exchange_rate
+from fastapi import APIRouter, Depends, HTTPException
+from app import schemas
+from app.config import settings
+from app.rate_limits import limit_by_ip
+from app.utils import money
+from app.utils.currency import get_exchange_rate, get_rate_table
 
-router = APIRouter(prefix="/currency", tags=["Currency"])
+# Conversions can trigger upstream rate fetches, which spend the provider quota
+router = APIRouter(prefix="/currency", tags=["Currency"],
+                   dependencies=[Depends(limit_by_ip("currency", settings.RATE_LIMIT_CURRENCY))])
 
 @router.get("/convert-currency/")
 async def convert_currency(amount: float, from_currency: str, to_currency: str):
@@ -10,14 +16,40 @@ async def convert_currency(amount: float, from_currency: str, to_currency: str):
         if exchange_rate is None:
             raise HTTPException(status_code=400, detail="Invalid currency codes")
         
-        converted_amount = amount * exchange_rate
         return {
             "amount": amount,
             "from": from_currency,
             "to": to_currency,
             "exchange_rate": exchange_rate,
-            "converted_amount": round(converted_amount, 2)
+            "converted_amount": money.convert(amount, exchange_rate, to_currency)
         }
     
     except ValueError as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Convert many amounts in one request against a single snapshot of the rate table
+@router.post("/convert-batch/")
+async def convert_currency_batch(batch: schemas.CurrencyConversionBatch):
+    table = await get_rate_table()
+    amounts = [item.amount for item in batch.items]
+    from_currencies = [item.from_currency.upper() for item in batch.items]
+    to_currencies = [item.to_currency.upper() for item in batch.items]
+    converted = table.convert_many(amounts, from_currencies, to_currencies)
+
+    results = [
+        {
+            "amount": amount,
+            "from": from_currency,
+            "to": to_currency,
+            "converted_amount": money.round_amount(value, to_currency) if value is not None else None,
+            "error": None if value is not None else "Invalid currency codes"
+        }
+        for amount, from_currency, to_currency, value in zip(amounts, from_currencies, to_currencies, converted)
+    ]
+
+    return {
+        "data": results,
+        "success": True,
+        "statuscode": 200,
+        "message": "Currency conversion completed successfully"
+    }
@@ -1,21 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app import crud, schemas, auth, models
-from app.database import engine
-from app.database import get_db
-from sqlalchemy import func
-from starlette.responses import JSONResponse
+import json
+import uuid
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, Request
+from app import crud, database, schemas, auth
+from app.database import DBSession, get_db, run_db
+from starlette.responses import JSONResponse, StreamingResponse
 from app.auth import get_current_user
-from sqlalchemy import func
+from app.config import settings
+from app.rate_limits import limit_by_user, offset_page_cost
+from app.utils import bulk_import, export, http_cache, money
+from app.utils.currency import get_rate_table
+from app.utils.pagination import InvalidCursor, decode_cursor
+from app.utils.report_cache import ReportCache
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
+analytics_cache = ReportCache(maxsize=settings.ANALYTICS_CACHE_SIZE, ttl=settings.ANALYTICS_CACHE_TTL)
+category_cache = ReportCache(maxsize=settings.CATEGORY_CACHE_SIZE, ttl=settings.CATEGORY_CACHE_TTL)
+# Per-user budget for listing; deep offset pages cost more than one request
+list_rate_limit = limit_by_user("expense_list", settings.RATE_LIMIT_EXPENSE_LIST, cost=offset_page_cost)
+
+def _expense_data(expense):
+    return schemas.dump_expense(expense)
+
+def _invalid_currency_response(currency: str):
+    return JSONResponse(
+        status_code=400,
+        content={
+            "error": "Invalid currency",
+            "success": False,
+            "statuscode": 400,
+            "message": f"Unsupported currency code {currency}"
+        }
+    )
+
+# Serialize a page of expenses, entities or column-only rows limited to `fields`
+def _dump_expenses(expenses, fields: tuple = None):
+    return schemas.dump_expense_fields(expenses, fields) if fields else schemas.dump_expenses(expenses)
+
+# Add `converted_amount` in the requested currency to each expense using the cached rate table
+async def _with_converted_amounts(expenses, currency: str, fields: tuple = None):
+    table = await get_rate_table()
+    # Sparse-field pages come back from crud as dicts, full pages as entities
+    value = dict.get if fields else getattr
+    converted = table.convert_many(
+        [value(expense, "amount") for expense in expenses],
+        [value(expense, "currency") for expense in expenses],
+        [currency] * len(expenses))
+    data = _dump_expenses(expenses, fields)
+    for item, value in zip(data, converted):
+        item["converted_amount"] = money.round_amount(value, currency) if value is not None else None
+        item["converted_currency"] = currency
+    return data
+
+async def _is_supported_currency(currency: str):
+    table = await get_rate_table()
+    return currency in table.index
+
+# Weak ETag for the user's current expense version. The version lives on the users row,
+# so checking it never reads the expense tables; returns the 304 to send when it matches.
+async def _expense_etag(request: Request, db: DBSession, user_id: int):
+    version = await run_db(db, crud.get_expense_version, user_id)
+    etag = http_cache.weak_etag(user_id, version)
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return etag, http_cache.not_modified(etag)
+    return etag, None
+
+def _invalid_cursor_response():
+    return JSONResponse(
+        status_code=400,
+        content={
+            "error": "Invalid cursor",
+            "success": False,
+            "statuscode": 400,
+            "message": "The pagination cursor is malformed or expired"
+        }
+    )
+
+# Parse a `fields=` list into a tuple of known expense fields (None when not given)
+def _parse_fields(fields: str):
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in schemas.EXPENSE_FIELDS]
+    if unknown or not names:
+        raise ValueError(f"Fields must be chosen from: {', '.join(schemas.EXPENSE_FIELDS)}")
+    return names
+
 # Function to add an expense for the authenticated user
 @router.post("/")
-def create_expense(expense: schemas.ExpenseCreate, 
-                   db: Session = Depends(get_db), 
-                   current_user: models.User = Depends(auth.get_current_user)):
-    if expense.amount <= 0:
+async def create_expense(expense: schemas.ExpenseCreate, 
+                   db: DBSession = Depends(get_db), 
+                   current_user: auth.Principal = Depends(auth.get_current_user)):
+    # Compared in minor units: 0.004 USD would otherwise be stored as zero
+    if money.to_minor(expense.amount, expense.currency) < 1:
         return JSONResponse(
             status_code=400,
             content={
@@ -26,32 +105,252 @@ def create_expense(expense: schemas.ExpenseCreate,
             }
         )
 
-    new_expense = crud.add_expense(db, expense, current_user.id)
-    db.commit()
+    new_expense = await run_db(db, crud.add_expense, expense, current_user.id)
     
-    return {
-        "data": {
-            "id": new_expense.id,
-            "category": new_expense.category,
-            "amount": new_expense.amount,
-            "description": new_expense.description,
-            "date": new_expense.date,
-            "user_id": new_expense.user_id
-        },
+    return FastJSONResponse({
+        "data": _expense_data(new_expense),
         "success": True,
         "statuscode": 201,
         "message": "Expense added successfully"
-    }
+    })
     
-# Function to retrieve all expenses with pagination for the authenticated user
-@router.get("/")
-def get_expenses(page: int = 1, 
+def _import_conflict_response(status_code: int, error: str, message: str):
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "error": error,
+            "success": False,
+            "statuscode": status_code,
+            "message": message
+        }
+    )
+
+def _import_in_progress_response():
+    return _import_conflict_response(
+        409, "Import in progress", "Another request is running this import; retry once it has finished")
+
+# Function to import many expenses for the authenticated user in one request.
+# Accepts a JSON array, or a streamed NDJSON/CSV upload (by Content-Type), validates each
+# row like a single create, and writes valid rows in chunked multi-row INSERTs.
+# With an Idempotency-Key header a retry replays the stored result, or resumes an
+# interrupted import after its last committed chunk. Keyed bodies are read in full first:
+# the key is bound to a hash of the body (another body gets a 422), and only the request
+# holding the import's lease writes rows (others get a 409 until it finishes or expires).
+@router.post("/bulk")
+async def create_expenses_bulk(
+    request: Request,
+    idempotency_key: str = Header(None),
+    db: DBSession = Depends(get_db),
+    current_user: auth.Principal = Depends(get_current_user)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    body = await request.body() if idempotency_key or content_type not in bulk_import.STREAMED_CONTENT_TYPES else None
+
+    expense_import = None
+    lease_owner = None
+    lease_seconds = settings.BULK_IMPORT_LEASE_SECONDS
+    already_committed = 0
+    if idempotency_key:
+        request_hash = bulk_import.request_hash(content_type, body)
+        expense_import = await run_db(db, crud.get_or_create_expense_import, current_user.id, idempotency_key, request_hash)
+        if expense_import.request_hash is not None and expense_import.request_hash != request_hash:
+            return _import_conflict_response(
+                422, "Idempotency key reused", "This Idempotency-Key was already used with a different request body")
+        if expense_import.status == "completed":
+            return json.loads(expense_import.result)
+
+        lease_owner = str(uuid.uuid4())
+        expense_import = await run_db(db, crud.claim_expense_import, expense_import.id, lease_owner, lease_seconds)
+        if expense_import is None:
+            return _import_in_progress_response()
+        already_committed = expense_import.rows_committed
+
+    stream = bulk_import.iter_body(body) if body is not None else request.stream()
+    if content_type in bulk_import.CSV_CONTENT_TYPES:
+        raw_rows = bulk_import.iter_csv(stream)
+    elif content_type in bulk_import.NDJSON_CONTENT_TYPES:
+        raw_rows = bulk_import.iter_ndjson(stream)
+    else:
+        raw_rows = bulk_import.iter_json_array(body)
+
+    chunk_size = settings.BULK_IMPORT_CHUNK_SIZE
+    import_id = expense_import.id if expense_import else None
+    total_rows = inserted = skipped = error_count = 0
+    errors = []
+    chunk = []
+    try:
+        async for raw in raw_rows:
+            total_rows += 1
+            row, error = bulk_import.validate_row(raw)
+            if error:
+                error_count += 1
+                if len(errors) < settings.BULK_IMPORT_MAX_ERRORS:
+                    errors.append({"row": total_rows, "error": error})
+                continue
+            # Rows committed by an earlier attempt with this key are not inserted twice
+            if skipped < already_committed:
+                skipped += 1
+                continue
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                inserted += await run_db(db, crud.add_expenses_bulk, current_user.id, chunk, import_id, lease_owner, lease_seconds)
+                chunk = []
+        inserted += await run_db(db, crud.add_expenses_bulk, current_user.id, chunk, import_id, lease_owner, lease_seconds)
+    except bulk_import.ImportInProgress:
+        # Our lease ran out and a retry took over; it carries on from our last chunk
+        return _import_in_progress_response()
+    except bulk_import.InvalidImportBody as exc:
+        if import_id is not None:
+            await run_db(db, crud.release_expense_import, import_id, lease_owner)
+        return JSONResponse(
+            status_code=400,
+            content={
+                "error": "Invalid import body",
+                "success": False,
+                "statuscode": 400,
+                "message": str(exc)
+            }
+        )
+    except Exception:
+        if import_id is not None:
+            await run_db(db, crud.release_expense_import, import_id, lease_owner)
+        raise
+
+    response = {
+        "data": {
+            "total_rows": total_rows,
+            "inserted": inserted,
+            "already_imported": skipped,
+            "error_count": error_count,
+            "errors": errors
+        },
+        "success": True,
+        "statuscode": 200,
+        "message": "Bulk import completed"
+    }
+    if import_id is not None:
+        await run_db(db, crud.complete_expense_import, import_id, json.dumps(response), lease_owner)
+    return response
+
+# The export owns its session: a request-scoped one is closed before the body is streamed
+def _export_rows_sync(statement, export_format: str, batch_size: int):
+    yield export.encode_header(export_format)
+    with database.SessionLocal() as db:
+        for batch in db.execute(statement).partitions(batch_size):
+            yield export.encode_batch(export_format, batch)
+
+async def _export_rows_async(statement, export_format: str, batch_size: int):
+    yield export.encode_header(export_format)
+    async with database.AsyncSessionLocal() as db:
+        result = await db.stream(statement)
+        async for batch in result.partitions(batch_size):
+            yield export.encode_batch(export_format, batch)
+
+# Function to export all of the authenticated user's expenses as CSV, NDJSON or columnar
+# NDJSON batches, streamed from a server-side cursor so memory stays flat.
+@router.get("/export")
+async def export_expenses(
+    format: str = "csv",
+    category: str = None,
+    days: int = None,
+    current_user: auth.Principal = Depends(get_current_user)):
+    if format not in export.EXPORT_FORMATS:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "error": "Invalid export format",
+                "success": False,
+                "statuscode": 400,
+                "message": f"Format must be one of: {', '.join(export.EXPORT_FORMATS)}"
+            }
+        )
+
+    batch_size = settings.EXPORT_BATCH_SIZE
+    statement = crud.export_expenses_statement(current_user.id, category=category, days=days, batch_size=batch_size)
+    rows = (_export_rows_async if settings.DB_ASYNC else _export_rows_sync)(statement, format, batch_size)
+    media_type, extension = export.EXPORT_FORMATS[format]
+
+    return StreamingResponse(
+        rows,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="expenses.{extension}"'})
+
+# Function to retrieve all expenses with pagination for the authenticated user.
+# `pagination=cursor` (or passing a `cursor`) switches to keyset pagination,
+# whose cost does not grow with page depth; `page`/`limit` keep working as before.
+# In offset mode the total comes back with the page in one query; `include_total=false`
+# skips it and `approximate_total=true` uses the planner's estimate instead.
+# `currency` adds each amount converted into that currency.
+# `q` searches descriptions and categories, matching partly typed words.
+# `fields=id,amount,category,date` returns only those fields, read with a column-only
+# SELECT so no ORM entities are built for the page.
+# Responses carry a weak ETag of the user's expense version; a matching If-None-Match
+# gets a 304 without querying expenses. Converted amounts also depend on the rate table,
+# and a `days` window moves with the clock, so those responses are not tagged.
+@router.get("/", dependencies=[Depends(list_rate_limit)])
+async def get_expenses(request: Request,
+                 page: int = 1, 
                  limit: int = 10, 
                  category: str = None, 
                  days: int = None, 
-                 db: Session = Depends(get_db), 
-                 current_user: models.User = Depends(auth.get_current_user)):
-    if page < 1 or limit < 1:
+                 pagination: str = "offset",
+                 cursor: str = None,
+                 include_total: bool = True,
+                 approximate_total: bool = False,
+                 currency: str = None,
+                 fields: str = None,
+                 q: str = None,
+                 db: DBSession = Depends(get_db), 
+                 current_user: auth.Principal = Depends(auth.get_current_user)):
+    if pagination not in ("offset", "cursor"):
+        return JSONResponse(
+            status_code=400,
+            content={
+                "error": "Invalid pagination mode",
+                "success": False,
+                "statuscode": 400,
+                "message": "Pagination must be either 'offset' or 'cursor'"
+            }
+        )
+
+    if currency:
+        currency = currency.upper()
+        if not await _is_supported_currency(currency):
+            return _invalid_currency_response(currency)
+
+    try:
+        fields = _parse_fields(fields)
+    except ValueError as exc:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "error": "Invalid fields",
+                "success": False,
+                "statuscode": 400,
+                "message": str(exc)
+            }
+        )
+    # Conversion reads amount and currency even when the client did not ask for them
+    select_fields = tuple(dict.fromkeys((*fields, "amount", "currency"))) if fields and currency else fields
+
+    # Validated before the ETag, so a bad request never gets a 304
+    keyset = pagination == "cursor" or bool(cursor)
+    if keyset:
+        if limit < 1:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    "error": "Invalid pagination values",
+                    "success": False,
+                    "statuscode": 400,
+                    "message": "Limit value must be greater than zero"
+                }
+            )
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except InvalidCursor:
+                return _invalid_cursor_response()
+    elif page < 1 or limit < 1:
         return JSONResponse(
             status_code=400,
             content={
@@ -62,29 +361,172 @@ def get_expenses(page: int = 1,
             }
         )
 
+    headers = None
+    if not currency and not days:
+        etag, not_modified = await _expense_etag(request, db, current_user.id)
+        if not_modified:
+            return not_modified
+        headers = http_cache.validator_headers(etag)
+
+    if keyset:
+        try:
+            expenses, next_cursor, prev_cursor = await run_db(
+                db, crud.get_expenses_keyset, user_id=current_user.id, limit=limit, cursor=cursor, category=category, days=days, fields=select_fields, q=q)
+        except InvalidCursor:
+            return _invalid_cursor_response()
+
+        data = await _with_converted_amounts(expenses, currency, fields) if currency else _dump_expenses(expenses, fields)
+
+        return FastJSONResponse({
+            "data": {
+                "expenses": data,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+                "limit": limit
+            },
+            "success": True,
+            "statuscode": 200,
+            "message": "Expenses retrieved successfully"
+        }, headers=headers)
+
     skip = (page - 1) * limit
-    expenses = crud.get_expenses(db=db, skip=skip, limit=limit, category=category, days=days, user_id=current_user.id)
-    total_count = crud.get_expenses_count(db=db, category=category, days=days, user_id=current_user.id)
+    if not include_total:
+        expenses = await run_db(db, crud.get_expenses, skip=skip, limit=limit, category=category, days=days, user_id=current_user.id, fields=select_fields, q=q)
+        total_count = None
+    elif approximate_total:
+        expenses = await run_db(db, crud.get_expenses, skip=skip, limit=limit, category=category, days=days, user_id=current_user.id, fields=select_fields, q=q)
+        total_count = await run_db(db, crud.get_expenses_count_estimate, category=category, days=days, user_id=current_user.id, q=q)
+    else:
+        expenses, total_count = await run_db(db, crud.get_expenses_with_count, skip=skip, limit=limit, category=category, days=days, user_id=current_user.id, fields=select_fields, q=q)
 
-    return {
+    data = await _with_converted_amounts(expenses, currency, fields) if currency else _dump_expenses(expenses, fields)
+
+    return FastJSONResponse({
         "data": {
-            "expenses": expenses,
+            "expenses": data,
             "totalcount": total_count,
+            "totalcount_estimated": include_total and approximate_total,
             "page": page
         },
         "success": True,
         "statuscode": 200,
         "message": "Expenses retrieved successfully"
-    }
+    }, headers=headers)
 
     
+def _invalid_report_response(message: str):
+    return JSONResponse(
+        status_code=400,
+        content={
+            "error": "Invalid report parameters",
+            "success": False,
+            "statuscode": 400,
+            "message": message
+        }
+    )
+
+# Function to aggregate expenses into day/week/month/year buckets for the authenticated user.
+# Each bucket is per currency, with amounts in that currency.
+# Results are cached per user until that user's next write.
+# Registered before the /{expense_id}/ routes so "report" is not read as an id.
+@router.get("/report/")
+async def get_expense_analytics(
+    bucket: str = "month",
+    measures: str = "sum,count",
+    group_by: str = None,
+    percentile: float = None,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    category: str = None,
+    db: DBSession = Depends(get_db),
+    current_user: auth.Principal = Depends(get_current_user)):
+    if bucket not in crud.ANALYTICS_BUCKETS:
+        return _invalid_report_response(f"Bucket must be one of: {', '.join(crud.ANALYTICS_BUCKETS)}")
+
+    measure_list = tuple(dict.fromkeys(name.strip() for name in measures.split(",") if name.strip()))
+    unknown = [name for name in measure_list if name not in crud.ANALYTICS_MEASURES]
+    if unknown or (not measure_list and percentile is None):
+        return _invalid_report_response(f"Measures must be chosen from: {', '.join(crud.ANALYTICS_MEASURES)}")
+
+    if group_by not in (None, "category"):
+        return _invalid_report_response("Reports can only be grouped by category")
+
+    if percentile is not None and not 0 <= percentile <= 1:
+        return _invalid_report_response("Percentile must be between 0 and 1")
+
+    # The version is stored with the user, so every worker sees the same one after a write
+    version = await run_db(db, crud.get_expense_version, current_user.id)
+    cache_key = (current_user.id, version,
+                 bucket, measure_list, group_by, percentile, start_date, end_date, category)
+    data = analytics_cache.get(cache_key)
+    if data is None:
+        data = await run_db(
+            db, crud.get_expense_analytics, current_user.id, bucket=bucket, measures=measure_list,
+            group_by_category=group_by == "category", percentile=percentile,
+            start_date=start_date, end_date=end_date, category=category)
+        analytics_cache.set(cache_key, data)
+
+    return {
+        "data": data,
+        "success": True,
+        "statuscode": 200,
+        "message": "Expense report generated successfully."
+    }
+
+# Function to suggest category names for the authenticated user as they type.
+# Prefix matches come first, then other names containing `prefix`. The user's category
+# list is cached until their next write, so suggestions do not query the database.
+@router.get("/categories")
+async def autocomplete_categories(
+    prefix: str = "",
+    limit: int = 10,
+    db: DBSession = Depends(get_db),
+    current_user: auth.Principal = Depends(get_current_user)):
+    if limit < 1:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "error": "Invalid limit",
+                "success": False,
+                "statuscode": 400,
+                "message": "Limit value must be greater than zero"
+            }
+        )
+
+    cache_key = (current_user.id, await run_db(db, crud.get_expense_version, current_user.id))
+    categories = category_cache.get(cache_key)
+    if categories is None:
+        categories = await run_db(db, crud.get_expense_categories, current_user.id)
+        category_cache.set(cache_key, categories)
+
+    needle = prefix.strip().casefold()
+    starts, contains = [], []
+    for name in categories:
+        folded = name.casefold()
+        if folded.startswith(needle):
+            starts.append(name)
+        elif needle in folded:
+            contains.append(name)
+
+    return {
+        "data": (starts + contains)[:limit],
+        "success": True,
+        "statuscode": 200,
+        "message": "Categories retrieved successfully"
+    }
+
 # Function to retrieve a specific expense by ID for the authenticated user
 @router.get("/{expense_id}/")
-def get_expense_by_id(
+async def get_expense_by_id(
     expense_id: int, 
-    db: Session = Depends(get_db), 
-    current_user: models.User = Depends(get_current_user)):
-    expense = crud.get_expense_by_id(db=db, expense_id=expense_id, user_id=current_user.id)
+    request: Request,
+    db: DBSession = Depends(get_db), 
+    current_user: auth.Principal = Depends(get_current_user)):
+    etag, not_modified = await _expense_etag(request, db, current_user.id)
+    if not_modified:
+        return not_modified
+
+    expense = await run_db(db, crud.get_expense_by_id, expense_id=expense_id, user_id=current_user.id)
     
     if not expense:
         return JSONResponse(
@@ -97,59 +539,58 @@ def get_expense_by_id(
             }
         )
 
-    return {
-        "data": expense,
+    return FastJSONResponse({
+        "data": _expense_data(expense),
         "success": True,
         "statuscode": 200,
         "message": "Expense retrieved successfully"
-    }
+    }, headers=http_cache.validator_headers(etag))
 
 
 # Function to update an expense for the authenticated user
 @router.put("/{expense_id}/")
-def update_expense(expense_id: int, 
+async def update_expense(expense_id: int, 
                    updated_data: schemas.ExpenseUpdate, 
-                   db: Session = Depends(get_db), 
-                   current_user: models.User = Depends(get_current_user)):
-    expense = crud.get_expense_by_id(db=db, expense_id=expense_id, user_id=current_user.id)
-    if not expense:
+                   db: DBSession = Depends(get_db), 
+                   current_user: auth.Principal = Depends(get_current_user)):
+    # Without a new currency only the stored one tells how many minor units the amount is
+    try:
+        updated_expense = await run_db(db, crud.update_expense, expense_id=expense_id, updated_data=updated_data, user_id=current_user.id)
+    except ValueError as exc:
         return JSONResponse(
-            status_code=404,
+            status_code=400,
             content={
-                "error": "Invalid expense ID",
+                "error": "Invalid amount",
                 "success": False,
-                "statuscode": 404,
-                "message": f"Expense with ID {expense_id} not found."
+                "statuscode": 400,
+                "message": str(exc)
             }
         )
-
-    if updated_data.amount is not None and updated_data.amount <= 0:
+    if not updated_expense:
         return JSONResponse(
-            status_code=400,
+            status_code=404,
             content={
-                "error": "Invalid amount",
+                "error": "Invalid expense ID",
                 "success": False,
-                "statuscode": 400,
-                "message": "Expense amount must be greater than zero"
+                "statuscode": 404,
+                "message": f"Expense with ID {expense_id} not found."
             }
         )
 
-    updated_expense = crud.update_expense(db=db, expense_id=expense_id, updated_data=updated_data, user_id=current_user.id)
-
-    return {
-        "data": updated_expense,
+    return FastJSONResponse({
+        "data": _expense_data(updated_expense),
         "success": True,
         "statuscode": 200,
         "message": "Expense updated successfully"
-    }
+    })
 
 # Function to delete an expense for the authenticated user
 @router.delete("/{expense_id}/")
-def delete_expense(expense_id: int, 
-                   db: Session = Depends(get_db), 
-                   current_user: models.User = Depends(get_current_user)):
-    expense = crud.get_expense_by_id(db=db, expense_id=expense_id, user_id=current_user.id)
-    if not expense:
+async def delete_expense(expense_id: int, 
+                   db: DBSession = Depends(get_db), 
+                   current_user: auth.Principal = Depends(get_current_user)):
+    deleted = await run_db(db, crud.delete_expense, expense_id=expense_id, user_id=current_user.id)
+    if not deleted:
         return JSONResponse(
             status_code=404,
             content={
@@ -160,8 +601,6 @@ def delete_expense(expense_id: int,
             }
         )
 
-    crud.delete_expense(db=db, expense_id=expense_id, user_id=current_user.id)
-
     return {
         "data": "Expense deleted successfully",
         "success": True,
@@ -169,36 +608,117 @@ def delete_expense(expense_id: int,
         "message": f"Expense with ID {expense_id} deleted successfully"
     }
 
-# Function to generate a monthly expense report for the authenticated user
+# Function to move many of the authenticated user's expenses to another category in one UPDATE
+@router.post("/bulk/recategorize")
+async def recategorize_expenses(
+    request_data: schemas.ExpenseBulkRecategorize,
+    db: DBSession = Depends(get_db),
+    current_user: auth.Principal = Depends(get_current_user)):
+    rows = await run_db(db, crud.recategorize_expenses, current_user.id, request_data.ids, request_data.category)
+
+    return {
+        "data": {
+            "updated_ids": [row.id for row in rows],
+            "updated": len(rows)
+        },
+        "success": True,
+        "statuscode": 200,
+        "message": "Expenses updated successfully"
+    }
+
+# Function to delete the authenticated user's expenses by id and/or filter in one DELETE
+@router.post("/bulk/delete")
+async def delete_expenses(
+    request_data: schemas.ExpenseBulkDelete,
+    db: DBSession = Depends(get_db),
+    current_user: auth.Principal = Depends(get_current_user)):
+    if (request_data.ids is None and not request_data.category
+            and request_data.start_date is None and request_data.end_date is None):
+        return JSONResponse(
+            status_code=400,
+            content={
+                "error": "Missing criteria",
+                "success": False,
+                "statuscode": 400,
+                "message": "Provide ids or at least one of category, start_date, end_date"
+            }
+        )
+
+    deleted_ids = await run_db(
+        db, crud.delete_expenses, current_user.id, expense_ids=request_data.ids, category=request_data.category,
+        start_date=request_data.start_date, end_date=request_data.end_date)
+
+    return {
+        "data": {
+            "deleted_ids": deleted_ids,
+            "deleted": len(deleted_ids)
+        },
+        "success": True,
+        "statuscode": 200,
+        "message": "Expenses deleted successfully"
+    }
+
+# Function to generate a monthly expense report for the authenticated user.
+# Without `currency` there is one row per month and currency. With `currency`, each month's
+# per-currency totals are converted and summed server-side; if the rate table lacks any
+# stored currency the report is refused rather than undercounted.
 @router.get("/report/monthly")
-def get_monthly_expense_report(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-    category: str = None):
-    query = (db.query(
-        func.to_char(models.Expense.date, 'YYYY-MM').label('month'),
-        func.sum(models.Expense.amount).label('total_spent'))
-        .filter(models.Expense.user_id == current_user.id)
-        .group_by('month')
-        .order_by('month'))
-
-    if category:
-        query = query.filter(models.Expense.category == category)
-
-    result = query.all()
+async def get_monthly_expense_report(
+    request: Request,
+    db: DBSession = Depends(get_db),
+    current_user: auth.Principal = Depends(get_current_user),
+    category: str = None,
+    currency: str = None):
+    headers = None
+    if currency:
+        currency = currency.upper()
+        if not await _is_supported_currency(currency):
+            return _invalid_currency_response(currency)
+    else:
+        etag, not_modified = await _expense_etag(request, db, current_user.id)
+        if not_modified:
+            return not_modified
+        headers = http_cache.validator_headers(etag)
+
+    result = await run_db(db, crud.get_monthly_expense_report, current_user.id, category=category)
 
     if not result:
-        return {
+        return FastJSONResponse({
             "data": [],
             "success": True,
             "statuscode": 200,
             "message": "No expenses found for the given category.",
-        }
+        }, headers=headers)
 
-    return {
-        "data": [{"month": row.month, "total_spent": row.total_spent} for row in result],
+    if currency:
+        table = await get_rate_table()
+        converted = table.convert_many(
+            [row["total_spent"] for row in result],
+            [row["currency"] for row in result],
+            [currency] * len(result))
+        # Dropping totals the rate table cannot convert would make the report too low
+        unconvertible = sorted({row["currency"] for row, value in zip(result, converted) if value is None})
+        if unconvertible:
+            return JSONResponse(
+                status_code=422,
+                content={
+                    "error": "Unconvertible currency",
+                    "success": False,
+                    "statuscode": 422,
+                    "message": f"Expenses in {', '.join(unconvertible)} cannot be converted to {currency}"
+                }
+            )
+        totals = {}
+        for row, value in zip(result, converted):
+            totals[row["month"]] = totals.get(row["month"], 0.0) + value
+        data = [{"month": month, "total_spent": money.round_amount(total, currency), "currency": currency}
+                for month, total in totals.items()]
+    else:
+        data = result
+
+    return FastJSONResponse({
+        "data": data,
         "success": True,
         "statuscode": 200,
         "message": "Monthly expense report generated successfully.",
-    }
-
+    }, headers=headers)
@@ -1,15 +1,19 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from app import models, schemas, auth
-from app.database import get_db
+from app import crud, schemas, auth
+from app.config import settings
+from app.rate_limits import limit_by_ip
+from app.database import DBSession, get_db, run_db
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-@router.post("/register/")
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(models.User).filter(models.User.username == user.username).first()
+# Registration and login both run a password hash, so they share one per-IP budget
+auth_rate_limit = limit_by_ip("auth", settings.RATE_LIMIT_AUTH)
+
+@router.post("/register/", dependencies=[Depends(auth_rate_limit)])
+async def register_user(user: schemas.UserCreate, db: DBSession = Depends(get_db)):
+    existing_user = await run_db(db, crud.get_user_by_username, user.username)
     if existing_user:
         return JSONResponse(
             status_code=400,
@@ -21,11 +25,8 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
             }
         )
 
-    hashed_password = auth.get_password_hash(user.password)
-    new_user = models.User(username=user.username, hashed_password=hashed_password)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    hashed_password = await auth.hash_password(user.password)
+    new_user = await run_db(db, crud.create_user, user.username, hashed_password)
 
     return JSONResponse(
         status_code=201,
@@ -38,9 +39,9 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     )
 
 
-@router.post("/token/")
-def login_user(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = auth.authenticate_user(db, user.username, user.password)
+@router.post("/token/", dependencies=[Depends(auth_rate_limit)])
+async def login_user(user: schemas.UserLogin, db: DBSession = Depends(get_db)):
+    db_user = await auth.authenticate_user(db, user.username, user.password)
     if not db_user:
         return JSONResponse(
             status_code=400,
@@ -53,12 +54,12 @@ def login_user(user: schemas.UserLogin, db: Session = Depends(get_db)):
         )
 
     access_token = auth.create_access_token(
-        data={"sub": db_user.username}, 
+        data=auth.token_claims(db_user), 
         expires_delta=timedelta(minutes=30)
     )
 
     refresh_token = auth.create_refresh_token(
-        data={"sub": db_user.username}, 
+        data=auth.token_claims(db_user), 
         expires_delta=timedelta(days=7)
     )
 
@@ -73,9 +74,9 @@ def login_user(user: schemas.UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.post("/refresh/")
-def refresh_access_token(refresh_token: str, db: Session = Depends(get_db)):
-    username = auth.verify_refresh_token(refresh_token)
-    if not username:
+def refresh_access_token(refresh_token: str, db: DBSession = Depends(get_db)):
+    claims = auth.verify_refresh_token(refresh_token)
+    if not claims:
         return JSONResponse(
             status_code=401,
             content={
@@ -85,8 +86,9 @@ def refresh_access_token(refresh_token: str, db: Session = Depends(get_db)):
                 "message": "Token verification failed. Please log in again."
             }
         )
+    # Refresh tokens issued before the "uid" claim existed only carry "sub"
     new_access_token = auth.create_access_token(
-        data={"sub": username}, 
+        data={key: claims[key] for key in ("sub", "uid") if key in claims}, 
         expires_delta=timedelta(minutes=30)
     )
 
@@ -1,12 +1,30 @@
 import re
-from pydantic import BaseModel, Field, validator
-from typing import Optional
-from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, create_model, root_validator, validator
+from typing import List, Optional
+from datetime import datetime, timezone
+from app.utils import money
 
 class ExpenseBase(BaseModel):
-    amount: float
+    # Decimal so amounts reach minor-unit conversion without binary float error
+    amount: Decimal = Field(allow_inf_nan=False)
     category: str
     description: Optional[str] = None
+    currency: str = "USD"
+
+    @validator("currency")
+    def validate_currency(cls, value):
+        if not re.fullmatch(r"^[A-Za-z]{3}$", value):
+            raise ValueError("Currency must be a 3-letter ISO 4217 code.")
+        return value.upper()
+
+    # Out-of-range amounts would overflow the BIGINT amount_minor column
+    @root_validator(skip_on_failure=True)
+    def validate_amount_range(cls, values):
+        if not money.fits_minor(values["amount"], values["currency"]):
+            raise ValueError("Expense amount is too large")
+        return values
 
 class ExpenseCreate(ExpenseBase):
     pass
@@ -14,6 +32,70 @@ class ExpenseCreate(ExpenseBase):
 class ExpenseUpdate(ExpenseBase):
     pass
 
+class ExpenseOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    category: str
+    amount: float
+    currency: str
+    description: Optional[str] = None
+    date: Optional[datetime] = None
+    user_id: Optional[int] = None
+
+# Built once: validating and dumping a whole page is a single pydantic-core call each
+expense_out_adapter = TypeAdapter(ExpenseOut)
+expense_list_adapter = TypeAdapter(List[ExpenseOut])
+
+def dump_expense(expense) -> dict:
+    return expense_out_adapter.dump_python(expense_out_adapter.validate_python(expense, from_attributes=True), mode="json")
+
+def dump_expenses(expenses) -> list:
+    return expense_list_adapter.dump_python(expense_list_adapter.validate_python(expenses, from_attributes=True), mode="json")
+
+# Fields a client may ask for with `fields=`, in response order
+EXPENSE_FIELDS = tuple(ExpenseOut.model_fields)
+
+# One adapter per distinct field set, built on first use from the ExpenseOut field types
+@lru_cache(maxsize=128)
+def _expense_fields_adapter(fields: tuple) -> TypeAdapter:
+    model = create_model(
+        "ExpenseFields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (Optional[ExpenseOut.model_fields[name].annotation], None) for name in fields})
+    return TypeAdapter(List[model])
+
+# Dump column-only rows (or anything with those attributes) keeping just `fields`
+def dump_expense_fields(rows, fields: tuple) -> list:
+    adapter = _expense_fields_adapter(tuple(fields))
+    return adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+
+class ExpenseImportRow(ExpenseCreate):
+    date: Optional[datetime] = None
+
+    # In minor units, so 0.004 USD is refused rather than stored as zero
+    @root_validator(skip_on_failure=True)
+    def validate_amount(cls, values):
+        money.check_expense_amount(values["amount"], values["currency"])
+        return values
+
+    @validator("date")
+    def validate_date(cls, value):
+        # Stored as naive UTC like the rest of the expenses table
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+class ExpenseBulkRecategorize(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=10000)
+    category: str = Field(..., min_length=1)
+
+class ExpenseBulkDelete(BaseModel):
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+    category: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
 class UserBase(BaseModel):
     username: str
 
@@ -47,3 +129,10 @@ class UserLogin(BaseModel):
     username: str = Field(..., min_length=1, error_messages={"required": "Username is required"})
     password: str = Field(..., min_length=1, error_messages={"required": "Password is required"})
 
+class CurrencyConversion(BaseModel):
+    amount: float
+    from_currency: str
+    to_currency: str
+
+class CurrencyConversionBatch(BaseModel):
+    items: List[CurrencyConversion] = Field(..., min_length=1, max_length=10000)
@@ -0,0 +1,93 @@
+import csv
+import hashlib
+import json
+from pydantic import ValidationError
+from app import schemas
+
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+STREAMED_CONTENT_TYPES = CSV_CONTENT_TYPES + NDJSON_CONTENT_TYPES
+
+
+class InvalidImportBody(ValueError):
+    pass
+
+
+class ImportInProgress(Exception):
+    """Another request holds the claim on this idempotent import."""
+
+
+def request_hash(content_type: str, body: bytes) -> str:
+    # The same rows sent as CSV and as NDJSON are different requests
+    return hashlib.sha256(content_type.encode() + b"\n" + body).hexdigest()
+
+
+async def iter_body(body: bytes):
+    # A buffered body in the shape of request.stream(), for the streaming parsers
+    yield body
+
+
+async def _iter_lines(stream):
+    # Re-splits an async byte stream into decoded lines without buffering the whole body
+    pending = b""
+    async for chunk in stream:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_ndjson(stream):
+    async for line in _iter_lines(stream):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield InvalidImportBody("Row is not valid JSON")
+
+
+async def iter_csv(stream):
+    header = None
+    record = ""
+    async for line in _iter_lines(stream):
+        record = f"{record}\n{line}" if record else line
+        # A quoted field may contain newlines; wait until the quotes balance
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not values or not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        yield {name: (value if value != "" else None) for name, value in zip(header, values)}
+
+
+async def iter_json_array(body: bytes):
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise InvalidImportBody("Request body is not valid JSON")
+    if not isinstance(rows, list):
+        raise InvalidImportBody("Request body must be a JSON array of expenses")
+    for row in rows:
+        yield row
+
+
+def validate_row(raw):
+    """Apply the ExpenseCreate rules to one raw row; returns (row, error)."""
+    if isinstance(raw, Exception):
+        return None, str(raw)
+    if not isinstance(raw, dict):
+        return None, "Row must be an object"
+    try:
+        row = schemas.ExpenseImportRow(**raw)
+    except ValidationError as exc:
+        first_error = exc.errors()[0]
+        field = ".".join(str(loc) for loc in first_error["loc"])
+        return None, f"{field}: {first_error['msg']}" if field else first_error["msg"]
+    return row.dict(), None
@@ -0,0 +1,50 @@
+import threading
+
+
+def normalize_category(name: str) -> str:
+    """Trim and collapse inner whitespace; this is the spelling stored for a new category."""
+    return " ".join(name.split())
+
+
+def category_key(name: str) -> str:
+    """Unique key of a category name, so casing and spacing variants share one id."""
+    return normalize_category(name).lower()
+
+
+class CategoryMap:
+    """Process-wide id <-> name dictionary for the categories table.
+
+    Categories are never renamed or deleted, so entries never go stale; the map only
+    has to learn ids it has not seen yet (created by another worker, or just now).
+    Only ids known to be committed are added.
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def name(self, category_id: int):
+        return self._names.get(category_id)
+
+    def id_for(self, name: str):
+        return self._ids.get(category_key(name))
+
+    def missing(self, category_ids) -> set:
+        return {category_id for category_id in category_ids if category_id not in self._names}
+
+    def add(self, category_id: int, name: str):
+        with self._lock:
+            self._names[category_id] = name
+            self._ids[category_key(name)] = category_id
+
+    def clear(self):
+        with self._lock:
+            self._names.clear()
+            self._ids.clear()
+
+    def __len__(self):
+        return len(self._names)
+
+
+category_map = CategoryMap()
@@ -1,18 +1,201 @@
+import asyncio
+import logging
+import time
+from array import array
 from fastapi import HTTPException
 import httpx
-from app.config import EXCHANGE_RATE_API_KEY, BASE_URL
+from app.config import EXCHANGE_RATE_API_KEY, BASE_URL, settings
+from app.utils.metrics import upstream_duration
 
-async def get_exchange_rate(from_currency: str, to_currency: str):
-    url = f"{BASE_URL}/{EXCHANGE_RATE_API_KEY}/pair/{from_currency}/{to_currency}"
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url)
-    
-    if response.status_code != 200:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid currency codes. Check the currency codes and try again."
+logger = logging.getLogger(__name__)
+
+# One pooled client for the whole process, opened and closed by the app lifespan
+_http_client: httpx.AsyncClient = None
+
+
+async def start_http_client():
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.EXCHANGE_RATE_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.EXCHANGE_RATE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.EXCHANGE_RATE_MAX_CONNECTIONS,
+            ),
         )
-    
-    data = response.json()
-    return data.get("conversion_rate")
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    # Falls back to opening the shared client lazily when no lifespan ran (scripts, tests)
+    return _http_client if _http_client is not None else await start_http_client()
+
+
+class RateTable:
+    """One `/latest/{base}` snapshot: currency code -> slot in a flat array of rates.
+
+    Any pair, including inverse and cross rates, is two dict lookups and a division.
+    """
+
+    __slots__ = ("base", "index", "rates", "fetched_at")
+
+    def __init__(self, base: str, conversion_rates: dict, fetched_at: float):
+        self.base = base
+        self.index = {code: slot for slot, code in enumerate(conversion_rates)}
+        self.rates = array("d", conversion_rates.values())
+        self.fetched_at = fetched_at
+
+    def rate(self, from_currency: str, to_currency: str):
+        try:
+            from_slot = self.index[from_currency]
+            to_slot = self.index[to_currency]
+        except KeyError:
+            return None
+        return self.rates[to_slot] / self.rates[from_slot]
+
+    def convert_many(self, amounts, from_currencies, to_currencies):
+        """Convert parallel sequences in one pass; unknown codes yield None."""
+        index = self.index
+        rates = self.rates
+        results = []
+        for amount, from_currency, to_currency in zip(amounts, from_currencies, to_currencies):
+            from_slot = index.get(from_currency)
+            to_slot = index.get(to_currency)
+            if from_slot is None or to_slot is None:
+                results.append(None)
+            else:
+                results.append(amount * rates[to_slot] / rates[from_slot])
+        return results
+
+
+def _provider_unavailable():
+    return HTTPException(
+        status_code=502,
+        detail="Exchange rate provider is unavailable. Please try again later."
+    )
+
+
+class ExchangeRateService:
+    """Keeps the rate table for one base currency current.
+
+    A background refresher re-fetches the table every `ttl` seconds. Without it (or if
+    it falls behind) a table older than `ttl` is still served for up to `stale_ttl`
+    more while one refresh runs; concurrent refreshes share a single upstream request.
+    """
+
+    def __init__(self, base: str, ttl: float, stale_ttl: float):
+        self.base = base.upper()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._table = None
+        self._inflight = None
+        self._refresher = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+
+    def clear(self):
+        self._table = None
+
+    async def get_rate(self, from_currency: str, to_currency: str):
+        table = await self.table()
+        return table.rate(from_currency.upper(), to_currency.upper())
+
+    async def table(self) -> RateTable:
+        table = self._table
+        if table is not None:
+            age = time.monotonic() - table.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return table
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self.refresh()
+                return table
+
+        self.misses += 1
+        return await asyncio.shield(self.refresh())
+
+    def refresh(self):
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._on_refreshed)
+        return self._inflight
+
+    def _on_refreshed(self, task):
+        self._inflight = None
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieving the exception here also keeps background refresh failures from going unobserved
+            logger.warning("Exchange rate table refresh for %s failed: %s", self.base, task.exception())
+
+    async def _fetch(self) -> RateTable:
+        url = f"{BASE_URL}/{EXCHANGE_RATE_API_KEY}/latest/{self.base}"
+
+        self.upstream_calls += 1
+        client = await get_http_client()
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await client.get(url)
+            outcome = "ok" if response.status_code == 200 else f"http_{response.status_code}"
+        except httpx.HTTPError as exc:
+            # Timeouts and connection failures mean the provider is unavailable too
+            outcome = "timeout" if isinstance(exc, httpx.TimeoutException) else "transport_error"
+            raise _provider_unavailable() from exc
+        finally:
+            upstream_duration.observe(time.perf_counter() - start, "exchange_rate", outcome)
+
+        if response.status_code != 200:
+            raise _provider_unavailable()
+
+        try:
+            conversion_rates = response.json()["conversion_rates"]
+        except (ValueError, KeyError, TypeError) as exc:
+            raise _provider_unavailable() from exc
+        self._table = RateTable(self.base, conversion_rates, time.monotonic())
+        return self._table
+
+    async def _run_refresher(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # Keep serving the previous table; the next tick retries
+                pass
+            await asyncio.sleep(self.ttl)
+
+    def start_refresher(self):
+        if self._refresher is None:
+            self._refresher = asyncio.ensure_future(self._run_refresher())
+
+    async def stop_refresher(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+
+rate_service = ExchangeRateService(
+    base=settings.EXCHANGE_RATE_BASE_CURRENCY,
+    ttl=settings.EXCHANGE_RATE_TTL,
+    stale_ttl=settings.EXCHANGE_RATE_STALE_TTL,
+)
+
+
+async def get_exchange_rate(from_currency: str, to_currency: str):
+    return await rate_service.get_rate(from_currency, to_currency)
+
+
+async def get_rate_table() -> RateTable:
+    return await rate_service.table()
@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+
+EXPORT_COLUMNS = ("id", "date", "category", "amount", "currency", "description")
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    # One JSON object per batch holding a list per column
+    "columnar": ("application/x-ndjson", "columnar.ndjson"),
+}
+
+
+def _json_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def encode_header(export_format: str) -> str:
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(EXPORT_COLUMNS)
+        return buffer.getvalue()
+    return ""
+
+
+def encode_batch(export_format: str, rows) -> str:
+    """Encode one batch of (id, date, category, amount, currency, description) tuples."""
+    if export_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            (row[0], row[1].isoformat() if row[1] else "", *row[2:]) for row in rows)
+        return buffer.getvalue()
+
+    if export_format == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, map(_json_value, row))), separators=(",", ":")) + "\n"
+            for row in rows)
+
+    columns = list(zip(*rows))
+    batch = {name: [_json_value(value) for value in column] for name, column in zip(EXPORT_COLUMNS, columns)}
+    return json.dumps(batch, separators=(",", ":")) + "\n"
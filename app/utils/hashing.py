@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+from app.config import settings
+
+# bcrypt stays verifiable; anything but the configured scheme is rehashed on the next login
+pwd_context = CryptContext(
+    schemes=list(dict.fromkeys([settings.PASSWORD_HASH_SCHEME, "bcrypt"])),
+    default=settings.PASSWORD_HASH_SCHEME,
+    deprecated="auto",
+)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str):
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs password hashing in a dedicated process pool so it never holds a request thread.
+
+    At most `workers + queue_size` calls are admitted at once; beyond that callers
+    get PasswordHasherBusy immediately instead of queueing behind a login burst.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created on first use so importing the app never forks
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str):
+        return await self._submit(_verify_and_update, password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
@@ -0,0 +1,203 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+
+# Request latency in seconds; SQL statement counts per request use COUNT_BUCKETS
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _number(value) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in Prometheus text format."""
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (plus +Inf), then sum
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in series:
+            base = _labels(self.labelnames, labels)
+            prefix = base + "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{prefix}le="{_number(bound)}"}} {cumulative}'
+            suffix = "{" + base + "}" if base else ""
+            yield f"{self.name}_sum{suffix} {total!r}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            base = _labels(self.labelnames, labels)
+            yield f"{self.name}{{{base}}} {_number(value)}" if base else f"{self.name} {_number(value)}"
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+def render_gauges(prefix: str, values: dict, help: str):
+    """Render a flat dict of numbers (e.g. a snapshot() result) as untyped gauges."""
+    for key, value in values.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"# HELP {prefix}_{key} {help}"
+            yield f"# TYPE {prefix}_{key} gauge"
+            yield f"{prefix}_{key} {_number(value)}"
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template.",
+    ("method", "route", "status"))
+request_sql_statements = Histogram(
+    "http_request_sql_statements", "SQL statements executed per request.",
+    ("method", "route"), buckets=COUNT_BUCKETS)
+request_db_duration = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request.",
+    ("method", "route"))
+upstream_duration = Histogram(
+    "upstream_request_duration_seconds", "Time spent on calls to external services.",
+    ("upstream", "outcome"))
+sql_statements = Counter("sql_statements_total", "SQL statements executed, inside or outside requests.")
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+# Set by the middleware for the lifetime of one request. Threadpool and run_sync calls
+# copy the context, so statements run on their behalf land on the same object.
+current_request_stats: ContextVar = ContextVar("current_request_stats", default=None)
+
+
+def instrument_statements(engine):
+    """Count SQL statements and their execution time into the current request's stats."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        sql_statements.inc()
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request, labelled by route template.
+
+    Timing covers the whole response, streamed bodies included. Requests slower than
+    the profiler's threshold get their samples dumped when a profiler is attached.
+    """
+
+    def __init__(self, app, profiler=None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        wall_start = time.time()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            request_duration.observe(elapsed, method, route_path, str(status[0]))
+            request_sql_statements.observe(stats.statements, method, route_path)
+            request_db_duration.observe(stats.db_seconds, method, route_path)
+            if self.profiler is not None and elapsed >= self.profiler.threshold:
+                # File I/O, kept off the event loop
+                await run_in_threadpool(self.profiler.dump, wall_start, wall_start + elapsed, method, route_path)
+
+
+def render(extra=()):
+    """All metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in (request_duration, request_sql_statements, request_db_duration, upstream_duration, sql_statements):
+        lines.extend(metric.render())
+    for block in extra:
+        lines.extend(block)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,86 @@
+from decimal import ROUND_HALF_UP, Decimal
+from sqlalchemy import BigInteger, Float, Numeric, case, cast, func, literal, literal_column
+
+# ISO 4217 currencies whose minor unit is not 1/100 of the major unit
+MINOR_UNIT_EXPONENTS = {
+    "BIF": 0, "CLP": 0, "DJF": 0, "GNF": 0, "ISK": 0, "JPY": 0, "KMF": 0, "KRW": 0,
+    "PYG": 0, "RWF": 0, "UGX": 0, "UYI": 0, "VND": 0, "VUV": 0, "XAF": 0, "XOF": 0, "XPF": 0,
+    "BHD": 3, "IQD": 3, "JOD": 3, "KWD": 3, "LYD": 3, "OMR": 3, "TND": 3,
+    "CLF": 4, "UYW": 4,
+}
+DEFAULT_EXPONENT = 2
+# Largest amount_minor the BIGINT column holds
+MAX_MINOR = 2 ** 63 - 1
+
+
+def exponent(currency: str) -> int:
+    return MINOR_UNIT_EXPONENTS.get(currency.upper(), DEFAULT_EXPONENT)
+
+
+def _decimal(amount) -> Decimal:
+    # str() first so a float like 0.1 becomes Decimal('0.1'), not its binary expansion
+    return amount if isinstance(amount, Decimal) else Decimal(str(amount))
+
+
+def to_minor(amount, currency: str) -> int:
+    """Major-unit amount -> integer minor units, rounding half away from zero."""
+    return int(_decimal(amount).scaleb(exponent(currency)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def fits_minor(amount, currency: str) -> bool:
+    """Whether `amount` in minor units fits the BIGINT amount column.
+
+    Checked before to_minor, whose quantize cannot represent huge values."""
+    return abs(_decimal(amount).scaleb(exponent(currency))) < MAX_MINOR + Decimal("0.5")
+
+
+def check_expense_amount(amount, currency: str) -> int:
+    """Minor units of an expense amount, or ValueError if it cannot be stored as one."""
+    if not fits_minor(amount, currency):
+        raise ValueError("Expense amount is too large")
+    minor = to_minor(amount, currency)
+    if minor < 1:
+        raise ValueError("Expense amount must be greater than zero")
+    return minor
+
+
+def to_major(minor: int, currency: str) -> Decimal:
+    return Decimal(minor).scaleb(-exponent(currency))
+
+
+def to_float(minor: int, currency: str) -> float:
+    """Minor units as the JSON number the API has always returned."""
+    return float(to_major(minor, currency))
+
+
+def round_amount(amount, currency: str) -> float:
+    """Round a computed major-unit amount (e.g. a conversion) to the currency's minor unit."""
+    quantum = Decimal(1).scaleb(-exponent(currency))
+    return float(_decimal(amount).quantize(quantum, rounding=ROUND_HALF_UP))
+
+
+def convert(amount, rate, to_currency: str) -> float:
+    """Convert with decimal arithmetic and round to the target currency's minor unit."""
+    return round_amount(_decimal(amount) * _decimal(rate), to_currency)
+
+
+# SQL counterparts. The scale is a NUMERIC literal, so division stays exact in Postgres.
+def _scale(currency_column):
+    return case(
+        *[(currency_column == code, literal_column(f"{10 ** places}.0", Numeric))
+          for code, places in MINOR_UNIT_EXPONENTS.items()],
+        else_=literal_column(f"{10 ** DEFAULT_EXPONENT}.0", Numeric))
+
+
+def major_amount(minor_column, currency_column):
+    """Exact NUMERIC major-unit amount of a minor-unit column."""
+    return minor_column / _scale(currency_column)
+
+
+def major_amount_float(minor_column, currency_column):
+    return cast(major_amount(minor_column, currency_column), Float)
+
+
+def minor_amount(amount, currency_column):
+    """Minor units of `amount` in the currency held by `currency_column` (for UPDATEs)."""
+    return cast(func.round(literal(_decimal(amount), Numeric) * _scale(currency_column)), BigInteger)
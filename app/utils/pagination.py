@@ -0,0 +1,31 @@
+import base64
+import json
+from datetime import datetime
+
+CURSOR_NEXT = "next"
+CURSOR_PREV = "prev"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(date: datetime, expense_id: int, direction: str = CURSOR_NEXT) -> str:
+    payload = {"d": date.isoformat(), "i": expense_id, "dir": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        date = datetime.fromisoformat(payload["d"])
+        expense_id = int(payload["i"])
+        direction = payload.get("dir", CURSOR_NEXT)
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed pagination cursor")
+
+    if direction not in (CURSOR_NEXT, CURSOR_PREV):
+        raise InvalidCursor("Malformed pagination cursor")
+    return date, expense_id, direction
@@ -0,0 +1,97 @@
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """Connection pool counters fed by pool event listeners."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_timeouts = 0
+            self.checkout_wait_seconds_total = 0.0
+            self.checkout_wait_seconds_max = 0.0
+            self.in_use = 0
+            self.connections_opened = 0
+            self.connections_invalidated = 0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+                return
+            self.checkouts += 1
+            self.checkout_wait_seconds_total += seconds
+            self.checkout_wait_seconds_max = max(self.checkout_wait_seconds_max, seconds)
+
+    def _adjust(self, name: str, delta: int):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_seconds_total": round(self.checkout_wait_seconds_total, 6),
+                "checkout_wait_seconds_avg": round(self.checkout_wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "checkout_wait_seconds_max": round(self.checkout_wait_seconds_max, 6),
+                "in_use": self.in_use,
+                "connections_opened": self.connections_opened,
+                "connections_invalidated": self.connections_invalidated,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class _TimedCheckoutMixin:
+    # Times the whole checkout: waiting on the queue, opening overflow connections and pre-ping
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine, metrics: PoolMetrics = pool_metrics):
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics._adjust("connections_opened", 1)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics._adjust("in_use", 1)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics._adjust("in_use", -1)
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics._adjust("connections_invalidated", 1)
@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class Principal:
+    """The authenticated user as the routes see it: just enough to scope queries."""
+
+    __slots__ = ("id", "username")
+
+    def __init__(self, id: int, username: str):
+        self.id = id
+        self.username = username
+
+    def __repr__(self):
+        return f"Principal(id={self.id!r}, username={self.username!r})"
+
+
+class InMemoryPrincipalBackend:
+    """Per-process TTL + LRU map of username -> Principal."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, username: str):
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[username]
+                return None
+            self._entries.move_to_end(username)
+            return principal
+
+    def set(self, principal: Principal):
+        with self._lock:
+            self._entries[principal.username] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.username)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, username: str):
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisPrincipalBackend:
+    """Shared backend so every worker sees the same entries and invalidations.
+
+    Takes any redis-py compatible client; redis itself stays an optional dependency.
+    """
+
+    def __init__(self, client, ttl: float = 60.0, prefix: str = "principal:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, ttl: float = 60.0):
+        import redis
+
+        return cls(redis.Redis.from_url(url), ttl=ttl)
+
+    def get(self, username: str):
+        raw = self.client.get(self.prefix + username)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return Principal(data["id"], data["username"])
+
+    def set(self, principal: Principal):
+        payload = json.dumps({"id": principal.id, "username": principal.username})
+        self.client.set(self.prefix + principal.username, payload, ex=max(int(self.ttl), 1))
+
+    def delete(self, username: str):
+        self.client.delete(self.prefix + username)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+class PrincipalCache:
+    """Two-tier principal cache: a local LRU in front of an optional shared backend."""
+
+    def __init__(self, local: InMemoryPrincipalBackend, shared=None):
+        self.local = local
+        self.shared = shared
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.claim_hits = 0
+        self.invalidations = 0
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get_local(self, username: str):
+        principal = self.local.get(username)
+        if principal is not None:
+            self._count("hits")
+        elif self.shared is None:
+            self._count("misses")
+        return principal
+
+    def get_shared(self, username: str):
+        # Blocking for network backends; callers on the event loop run this in the threadpool
+        principal = self.shared.get(username)
+        if principal is None:
+            self._count("misses")
+            return None
+        self._count("shared_hits")
+        self.local.set(principal)
+        return principal
+
+    def set(self, principal: Principal):
+        self.local.set(principal)
+        if self.shared is not None:
+            self.shared.set(principal)
+
+    def record_claim_hit(self):
+        self._count("claim_hits")
+
+    def invalidate(self, username: str):
+        self._count("invalidations")
+        self.local.delete(username)
+        if self.shared is not None:
+            self.shared.delete(username)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "claim_hits": self.claim_hits,
+                "invalidations": self.invalidations,
+                "hit_ratio": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            }
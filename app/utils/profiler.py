@@ -0,0 +1,78 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+logger = logging.getLogger(__name__)
+
+
+class SlowRequestProfiler:
+    """Sampling profiler that writes flame-graph data for requests slower than a threshold.
+
+    A daemon thread snapshots every thread's stack each `interval` seconds into a ring
+    buffer. When a request finishes over `threshold`, the samples taken during it are
+    written as collapsed stacks (`frame;frame;frame count`), the input format of
+    flamegraph.pl and speedscope. Samples are per process, not per request: stacks of
+    requests that overlapped the slow one are included too.
+    """
+
+    def __init__(self, threshold: float, interval: float, output_dir: str, max_samples: int = 20000):
+        self.threshold = threshold
+        self.interval = interval
+        self.output_dir = output_dir
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.dumps = 0
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.time()
+            stacks = [_collapse(frame) for thread_id, frame in sys._current_frames().items() if thread_id != own_id]
+            with self._lock:
+                self._samples.extend((now, stack) for stack in stacks if stack)
+
+    def dump(self, start: float, end: float, method: str, route: str):
+        with self._lock:
+            counts = Counter(stack for sampled_at, stack in self._samples if start <= sampled_at <= end)
+        if not counts:
+            return None
+        name = f"{int(start * 1000)}-{method}-{route.strip('/').replace('/', '_') or 'root'}.folded"
+        path = os.path.join(self.output_dir, "".join(c if c.isalnum() or c in "-_." else "_" for c in name))
+        try:
+            with open(path, "w") as f:
+                for stack, count in counts.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as exc:
+            logger.warning("Could not write profile for slow request %s %s: %s", method, route, exc)
+            return None
+        self.dumps += 1
+        logger.info("Slow request %s %s took %.0f ms; profile written to %s", method, route, (end - start) * 1000, path)
+        return path
+
+
+def _collapse(frame) -> str:
+    # Root first, as flame graph tools expect
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
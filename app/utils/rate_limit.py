@@ -0,0 +1,159 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class Limit:
+    """`count` requests per `period` seconds, refilled continuously; a full bucket allows a burst of `count`."""
+
+    __slots__ = ("count", "period")
+
+    def __init__(self, count: int, period: float):
+        self.count = count
+        self.period = period
+
+    @property
+    def rate(self) -> float:
+        return self.count / self.period
+
+    @classmethod
+    def parse(cls, spec: str):
+        """'10/minute' -> Limit(10, 60). An empty spec means unlimited (None)."""
+        if not spec:
+            return None
+        count, _, period = spec.partition("/")
+        if period not in PERIODS or int(count) < 1:
+            raise ValueError(f"Invalid rate limit {spec!r}; expected e.g. '10/minute'")
+        return cls(int(count), PERIODS[period])
+
+    def __repr__(self):
+        return f"Limit({self.count}/{self.period}s)"
+
+
+class InMemoryRateLimitBackend:
+    """Token buckets for this process: key -> (tokens, last refill time).
+
+    Only ever called from the event loop thread, with no await between reading and
+    writing a bucket, so no lock is needed. Least recently used buckets are dropped
+    beyond `maxsize`; a dropped bucket comes back full.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+
+    def hit(self, key: str, limit: Limit, cost: float = 1):
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (limit.count, now))
+        tokens = min(limit.count, tokens + (now - updated_at) * limit.rate)
+        cost = min(cost, limit.count)
+
+        if tokens >= cost:
+            self._buckets[key] = (tokens - cost, now)
+            retry_after = None
+        else:
+            self._buckets[key] = (tokens, now)
+            retry_after = (cost - tokens) / limit.rate
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self):
+        self._buckets.clear()
+
+
+# Same refill arithmetic as the in-memory bucket, run atomically in Redis on Redis's clock
+_TOKEN_BUCKET_SCRIPT = """
+local count = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = math.min(tonumber(ARGV[3]), count)
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or count
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(count, tokens + math.max(0, now - updated_at) * rate)
+local retry_after = -1
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(count / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """Buckets shared by every worker, so a limit holds for the deployment, not per process.
+
+    Takes any redis-py compatible client; redis itself stays an optional dependency.
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str):
+        import redis
+
+        return cls(redis.Redis.from_url(url))
+
+    def hit(self, key: str, limit: Limit, cost: float = 1):
+        retry_after = float(self._script(keys=[self.prefix + key], args=[limit.count, limit.rate, cost]))
+        return retry_after if retry_after >= 0 else None
+
+
+class RateLimiter:
+    """Token-bucket limiter over a shared backend, or the in-process buckets without one.
+
+    If the shared store fails, the request is limited by the in-process buckets
+    instead, so an outage loosens limits to per-worker rather than failing requests.
+    """
+
+    def __init__(self, local: InMemoryRateLimitBackend, shared=None):
+        self.local = local
+        self.shared = shared
+        self.allowed = 0
+        self.limited = 0
+        self.shared_errors = 0
+
+    async def check(self, key: str, limit: Limit, cost: float = 1):
+        """Take `cost` tokens from the bucket for `key`, or raise RateLimited."""
+        if self.shared is not None:
+            try:
+                # Blocking network call; keep it off the event loop
+                retry_after = await run_in_threadpool(self.shared.hit, key, limit, cost)
+            except Exception as exc:
+                self.shared_errors += 1
+                logger.warning("Shared rate limit store failed, limiting per process: %s", exc)
+                retry_after = self.local.hit(key, limit, cost)
+        else:
+            retry_after = self.local.hit(key, limit, cost)
+
+        if retry_after is not None:
+            self.limited += 1
+            raise RateLimited(retry_after)
+        self.allowed += 1
+
+    def snapshot(self):
+        return {"allowed": self.allowed, "limited": self.limited, "shared_errors": self.shared_errors}
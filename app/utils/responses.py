@@ -0,0 +1,10 @@
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson is optional: without it (or with USE_ORJSON=false) responses use the stdlib encoder
+FastJSONResponse = ORJSONResponse if orjson is not None and settings.USE_ORJSON else JSONResponse
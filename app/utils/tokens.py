@@ -0,0 +1,114 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import jwt as pyjwt
+except ImportError:
+    pyjwt = None
+
+
+class TokenError(Exception):
+    """A token that is malformed, expired or carries a bad signature, whichever backend said so."""
+
+
+class JoseBackend:
+    name = "jose"
+
+    def __init__(self):
+        from jose import JWTError, jwt
+        self._jwt = jwt
+        self._error = JWTError
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict:
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._error as exc:
+            raise TokenError(str(exc)) from exc
+
+
+class PyJWTBackend:
+    """PyJWT does less work per HS256 decode than python-jose; see benchmarks/micro.py."""
+
+    name = "pyjwt"
+
+    def encode(self, claims: dict, key: str, algorithm: str) -> str:
+        return pyjwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict:
+        try:
+            return pyjwt.decode(token, key, algorithms=[algorithm])
+        except pyjwt.InvalidTokenError as exc:
+            raise TokenError(str(exc)) from exc
+
+
+def get_backend(name: str):
+    # Both produce standard HS256 tokens, so switching backends keeps issued tokens valid
+    if name == "pyjwt" and pyjwt is not None:
+        return PyJWTBackend()
+    return JoseBackend()
+
+
+class VerifiedTokenCache:
+    """LRU of already-verified tokens: SHA-256 of the token -> its decoded claims.
+
+    Entries live until the token's own `exp`, so a cached token is never accepted
+    after a fresh decode would have rejected it. Only successful verifications are
+    stored, and the claims dicts are shared between callers, which must not mutate
+    them. `maxsize=0` disables the cache.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str):
+        if not self.maxsize:
+            return None
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, token: str, claims: dict):
+        expires_at = claims.get("exp")
+        # Tokens without a numeric expiry are never cached
+        if not self.maxsize or not isinstance(expires_at, (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,11 @@
+"""Benchmarks and load tests for the expense tracker API.
+
+    python -m benchmarks seed --users 1000 --expenses-per-user 10000
+    python -m benchmarks --output before.json all
+    python -m benchmarks --output after.json all
+    python -m benchmarks compare before.json after.json
+
+Runs against an SQLite stand-in by default, or with `--database postgres` against the
+database in the DB_* settings (migrated with `alembic upgrade head`). The exchange rate
+API is always stubbed.
+"""
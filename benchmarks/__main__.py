@@ -0,0 +1,93 @@
+import argparse
+import json
+import sys
+from benchmarks.environment import DB_MODES, DEFAULT_SQLITE_PATH, BenchEnvironment
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Seed, benchmark and load-test the API.")
+    parser.add_argument("--database", choices=("sqlite", "postgres"), default="sqlite",
+                        help="sqlite: a local stand-in file; postgres: the database from the DB_* settings")
+    parser.add_argument("--sqlite-path", default=DEFAULT_SQLITE_PATH)
+    parser.add_argument("--db-mode", choices=DB_MODES, default="sync",
+                        help="serve requests from sync (threadpool) or async sessions, as DB_ASYNC does")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for data, user sampling and the request mix")
+    parser.add_argument("--output", help="write results to this JSON file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="replace the benchmark database contents with synthetic data")
+    seed.add_argument("--users", type=int, default=100)
+    seed.add_argument("--expenses-per-user", type=int, default=1000)
+    seed.add_argument("--days", type=int, default=730, help="spread expense dates over this many past days")
+    seed.add_argument("--reset", action="store_true", help="required for postgres: confirms its tables may be emptied")
+
+    for name, help in (("micro", "time crud, report, JWT and serialization calls"),
+                       ("load", "drive the ASGI app with concurrent requests"),
+                       ("all", "micro then load")):
+        command = commands.add_parser(name, help=help)
+        command.add_argument("--only", nargs="+", help="run benchmarks whose names contain any of these")
+        command.add_argument("--sample-users", type=int, default=50)
+        if name in ("micro", "all"):
+            command.add_argument("--iterations", type=int, default=200)
+            command.add_argument("--table-iterations", type=int, default=5,
+                                 help="iterations for the whole-table aggregates")
+        if name in ("load", "all"):
+            command.add_argument("--concurrency", type=int, default=16)
+            command.add_argument("--duration", type=float, default=20.0, help="seconds of measured load")
+            command.add_argument("--requests", type=int, default=0, help="stop after this many requests (0: no limit)")
+
+    storage = commands.add_parser("storage", help="compare aggregates over integer, NUMERIC and float amount columns")
+    storage.add_argument("--rows", type=int, default=10_000_000, help="amounts to load into the scratch table")
+    storage.add_argument("--iterations", type=int, default=5)
+    storage.add_argument("--reuse", action="store_true", help="keep the scratch table from an earlier run")
+
+    compare = commands.add_parser("compare", help="compare the p50 latencies of two result files")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    return parser
+
+
+def _compare(args):
+    from benchmarks import results
+
+    rows = results.compare(results.load(args.baseline), results.load(args.candidate))
+    width = max((len(row[0]) for row in rows), default=10)
+    print(f"{'benchmark':<{width}}  {'base p50':>10}  {'new p50':>10}  {'change':>8}")
+    for name, old, new, change in rows:
+        print(f"{name:<{width}}  {old:>10.3f}  {new:>10.3f}  {change:>+7.1f}%" if change is not None
+              else f"{name:<{width}}  {old:>10.3f}  {new:>10.3f}  {'n/a':>8}")
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    if args.command == "compare":
+        _compare(args)
+        return
+
+    env = BenchEnvironment(sqlite_path=args.sqlite_path if args.database == "sqlite" else None, db_mode=args.db_mode)
+    from benchmarks import load, micro, results, seed, storage
+
+    output = {"meta": results.metadata(env, command=args.command, seed=args.seed)}
+    if args.command == "seed":
+        if env.dialect == "postgresql" and not args.reset:
+            sys.exit("Seeding empties the expense tables; pass --reset to confirm this is a benchmark database.")
+        output["seed"] = seed.seed(env, users=args.users, expenses_per_user=args.expenses_per_user,
+                                   days=args.days, seed=args.seed)
+    if args.command == "storage":
+        if not args.reuse:
+            output["storage_fill"] = storage.fill(env, rows=args.rows, seed=args.seed)
+        output["storage"] = storage.run(env, iterations=args.iterations)
+    if args.command in ("micro", "all"):
+        output["micro"] = micro.run(env, iterations=args.iterations, table_iterations=args.table_iterations,
+                                    sample_users=args.sample_users, seed=args.seed, only=args.only)
+    if args.command in ("load", "all"):
+        output["load"] = load.run(env, concurrency=args.concurrency, duration=args.duration, requests=args.requests,
+                                  sample_users=args.sample_users, seed=args.seed, only=args.only)
+
+    if args.output:
+        results.save(args.output, output)
+    print(json.dumps(output, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
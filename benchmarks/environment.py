@@ -0,0 +1,180 @@
+import datetime
+import os
+import tempfile
+
+# The stub's rate table, relative to USD; enough currencies for the seeded data
+STUB_RATES = {"USD": 1.0, "EUR": 0.92, "GBP": 0.79, "INR": 83.1, "JPY": 151.4, "KWD": 0.31}
+
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), "expense_tracker_bench.sqlite3")
+DB_MODES = ("sync", "async")
+
+
+class BenchEnvironment:
+    """The app wired to the benchmark (or test) database, with the exchange rate API stubbed out.
+
+    With `sqlite_path` the app's sessions are redirected to an SQLite file that carries
+    stand-ins for the Postgres functions crud uses. Without it the app runs on its own
+    configuration (DB_* settings), which is the Postgres the numbers mean.
+
+    `db_mode` picks how requests get their session, as DB_ASYNC does for the app: "sync"
+    sessions run crud in the threadpool, "async" ones (aiosqlite or asyncpg) on the event
+    loop. Seeding and the microbenchmarks always use the sync `Session`.
+    """
+
+    def __init__(self, sqlite_path: str = None, db_mode: str = "sync"):
+        configure_environment(sqlite=bool(sqlite_path), db_mode=db_mode)
+
+        from sqlalchemy.orm import sessionmaker
+        from app import database
+        from app.main import app
+
+        self.app = app
+        self.sqlite_path = sqlite_path
+        self.async_engine = None
+        self.AsyncSession = None
+        if sqlite_path:
+            self.engine = _sqlite_engine(sqlite_path)
+            self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+            database.SessionLocal = self.Session
+        else:
+            self.engine = database.engine
+            self.Session = database.SessionLocal
+        self.use_db_mode(db_mode)
+        _stub_exchange_rates()
+
+    @property
+    def dialect(self) -> str:
+        return self.engine.dialect.name
+
+    def use_db_mode(self, db_mode: str):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from app import database
+        from app.config import settings
+
+        if db_mode not in DB_MODES:
+            raise ValueError(f"db_mode must be one of {DB_MODES}")
+        if db_mode == "async" and self.AsyncSession is None:
+            if self.sqlite_path:
+                self.async_engine = _sqlite_async_engine(self.sqlite_path)
+            elif database.async_engine is not None:
+                self.async_engine = database.async_engine
+            else:
+                raise RuntimeError("The app was imported with DB_ASYNC off; start a new process for async mode")
+            self.AsyncSession = async_sessionmaker(bind=self.async_engine, autoflush=False, expire_on_commit=False)
+
+        if db_mode == "async":
+            async def get_db():
+                async with self.AsyncSession() as db:
+                    yield db
+            database.AsyncSessionLocal = self.AsyncSession
+        else:
+            def get_db():
+                db = self.Session()
+                try:
+                    yield db
+                finally:
+                    db.close()
+
+        # The export route opens its own session and picks the kind by this setting
+        settings.DB_ASYNC = db_mode == "async"
+        self.app.dependency_overrides[database.get_db] = get_db
+        self.db_mode = db_mode
+
+    async def dispose_async_engine(self):
+        # Async connections belong to the event loop that opened them; release them
+        # before that loop closes (aiosqlite's worker threads would keep the process alive)
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+
+    def create_schema(self):
+        from app.database import Base
+
+        # Postgres schemas come from `alembic upgrade head`; the SQLite file is ours to rebuild
+        if self.sqlite_path:
+            Base.metadata.drop_all(self.engine)
+            Base.metadata.create_all(self.engine)
+
+
+def configure_environment(sqlite: bool, db_mode: str = "sync"):
+    """Settings defaults for running the app here. app.config reads the environment at
+    import time, so this has to run before anything imports the app."""
+    # The SQLite stand-in still needs the Postgres URL to be buildable
+    if sqlite:
+        for name, value in (("DB_USER", "bench"), ("DB_PASSWORD", "bench"), ("DB_HOST", "localhost"),
+                            ("DB_PORT", "5432"), ("DB_NAME", "bench")):
+            os.environ.setdefault(name, value)
+    else:
+        # Against Postgres the app builds its own engines, the async one only with DB_ASYNC
+        os.environ.setdefault("DB_ASYNC", "true" if db_mode == "async" else "false")
+    # Nothing should reach the real rate API
+    os.environ.setdefault("EXCHANGE_RATE_BACKGROUND_REFRESH", "false")
+    # The load generator would otherwise mostly measure 429s
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+
+def _sqlite_date_trunc(unit, value):
+    # Postgres date_trunc for the units crud buckets by; weeks start on Monday (ISO)
+    if value is None:
+        return None
+    day = datetime.date.fromisoformat(value[:10])
+    if unit == "week":
+        day -= datetime.timedelta(days=day.weekday())
+    elif unit == "month":
+        day = day.replace(day=1)
+    elif unit == "year":
+        day = day.replace(month=1, day=1)
+    elif unit != "day":
+        raise ValueError(f"date_trunc unit {unit!r} is not supported by the SQLite stand-in")
+    return f"{day:%Y-%m-%d} 00:00:00.000000"
+
+
+def _register_sqlite_functions(engine):
+    # SQLite stores DateTime as 'YYYY-MM-DD HH:MM:SS.ffffff' text, so slicing gives the same
+    # answers as the Postgres functions for the formats crud uses
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _register_functions(dbapi_connection, connection_record):
+        dbapi_connection.create_function("to_char", 2, lambda value, fmt: value[:7] if value else None, deterministic=True)
+        dbapi_connection.create_function("date_trunc", 2, _sqlite_date_trunc, deterministic=True)
+        dbapi_connection.create_function("to_tsvector", 2, lambda config, text: text, deterministic=True)
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.close()
+
+
+def _sqlite_engine(path: str):
+    from sqlalchemy import create_engine
+    from sqlalchemy.dialects.postgresql import TSVECTOR
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(TSVECTOR, "sqlite")
+    def _tsvector(type_, compiler, **kw):
+        return "TEXT"
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    _register_sqlite_functions(engine)
+    return engine
+
+
+def _sqlite_async_engine(path: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    _register_sqlite_functions(engine.sync_engine)
+    return engine
+
+
+def _stub_exchange_rates():
+    import httpx
+    from app.utils import currency
+
+    def handler(request: httpx.Request):
+        base = request.url.path.rstrip("/").rsplit("/", 1)[-1].upper()
+        rates = {code: rate / STUB_RATES[base] for code, rate in STUB_RATES.items()}
+        return httpx.Response(200, json={"result": "success", "base_code": base, "conversion_rates": rates})
+
+    # start_http_client() keeps an existing client, so the app never opens a real one
+    currency._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    currency.rate_service.clear()
@@ -0,0 +1,115 @@
+import asyncio
+import datetime
+import random
+import time
+import httpx
+from sqlalchemy import text
+from app import auth
+from benchmarks.results import summarize
+
+# name -> (weight, method, path template, JSON body); {expense_id} is filled with one of
+# the user's own expenses. Writes bump the user's expense version, so the cached reads
+# around them are measured invalidating as they would in production.
+SCENARIOS = {
+    "list_first_page": (30, "GET", "/expenses/?limit=10", None),
+    "list_cursor": (10, "GET", "/expenses/?pagination=cursor&limit=20", None),
+    "list_last_30_days": (10, "GET", "/expenses/?limit=10&days=30", None),
+    "list_sparse_fields": (5, "GET", "/expenses/?limit=50&fields=id,amount,date", None),
+    "list_converted": (5, "GET", "/expenses/?limit=10&currency=EUR", None),
+    "search": (5, "GET", "/expenses/?limit=10&q=groc", None),
+    "detail": (15, "GET", "/expenses/{expense_id}/", None),
+    "monthly_report": (10, "GET", "/expenses/report/monthly", None),
+    "categories": (5, "GET", "/expenses/categories?prefix=g", None),
+    "convert_currency": (5, "GET", "/currency/convert-currency/?amount=125.5&from_currency=USD&to_currency=INR", None),
+    "create_expense": (5, "POST", "/expenses/", {"amount": 12.5, "category": "Groceries", "description": "load test"}),
+    "update_expense": (3, "PUT", "/expenses/{expense_id}/", {"amount": 20.75, "category": "Dining Out"}),
+}
+
+
+def _tokens(env, sample_users: int, rng: random.Random):
+    with env.Session() as db:
+        users = db.execute(text("SELECT id, username FROM users ORDER BY id")).all()
+        if not users:
+            raise SystemExit("The benchmark database is empty; run `python -m benchmarks seed` first.")
+        users = rng.sample(users, min(sample_users, len(users)))
+        clients = []
+        for user in users:
+            expense_ids = [row.id for row in db.execute(
+                text("SELECT id FROM expenses WHERE user_id = :user_id ORDER BY id LIMIT 50"), {"user_id": user.id})]
+            # Tokens are minted directly: logging in would benchmark bcrypt, not the API
+            token = auth.create_access_token(auth.token_claims(user), datetime.timedelta(hours=1))
+            clients.append(({"Authorization": f"Bearer {token}"}, expense_ids))
+    return clients
+
+
+async def _drive(app, clients, scenarios, concurrency: int, duration: float, requests: int, rng: random.Random):
+    names = list(scenarios)
+    weights = [scenarios[name][0] for name in names]
+    latencies = {name: [] for name in names}
+    failures = {name: 0 for name in names}
+    issued = 0
+    deadline = time.perf_counter() + duration
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def worker():
+            nonlocal issued
+            while time.perf_counter() < deadline and (not requests or issued < requests):
+                issued += 1
+                name = rng.choices(names, weights)[0]
+                headers, expense_ids = rng.choice(clients)
+                _, method, path, body = scenarios[name]
+                path = path.format(expense_id=rng.choice(expense_ids) if expense_ids else 0)
+                start = time.perf_counter()
+                response = await client.request(method, path, headers=headers, json=body)
+                latencies[name].append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    failures[name] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, failures, elapsed
+
+
+def run(env, concurrency: int = 16, duration: float = 20.0, requests: int = 0, warmup: float = 2.0,
+        sample_users: int = 50, seed: int = 1, only=None) -> dict:
+    """Drive the ASGI app in-process with a weighted read/write mix; no sockets or server.
+
+    Requests use the environment's db_mode (sync threadpool sessions or async ones).
+    Reports latency percentiles, throughput and error counts per endpoint, plus the mix
+    as a whole. Client overhead is included, so compare runs with each other rather
+    than with numbers measured over the network.
+    """
+    rng = random.Random(seed)
+    clients = _tokens(env, sample_users, rng)
+    scenarios = {name: scenario for name, scenario in SCENARIOS.items()
+                 if only is None or any(part in name for part in only)}
+
+    async def warm_then_measure():
+        # One event loop for both, so async-mode connections stay on the loop that opened them
+        try:
+            if warmup:
+                await _drive(env.app, clients, scenarios, concurrency, warmup, 0, rng)
+            return await _drive(env.app, clients, scenarios, concurrency, duration, requests, rng)
+        finally:
+            await env.dispose_async_engine()
+
+    latencies, failures, elapsed = asyncio.run(warm_then_measure())
+
+    results = {}
+    for name in scenarios:
+        results[name] = {
+            **summarize(latencies[name]),
+            "errors": failures[name],
+            "throughput_rps": round(len(latencies[name]) / elapsed, 2),
+        }
+    every = [value for samples in latencies.values() for value in samples]
+    results["all"] = {
+        **summarize(every),
+        "errors": sum(failures.values()),
+        "throughput_rps": round(len(every) / elapsed, 2),
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+    }
+    return results
@@ -0,0 +1,178 @@
+import asyncio
+import datetime
+import itertools
+import random
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import func, select, text
+from starlette.requests import Request
+from app import auth, crud, models, schemas
+from app.utils import money
+from app.utils.tokens import JoseBackend, PyJWTBackend
+from app.utils.responses import FastJSONResponse
+from benchmarks.results import summarize
+
+
+def measure(fn, iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _per_request(env, users, call):
+    # A fresh session per call, as a request gets one, cycling through users so no
+    # single user's rows sit warm in every cache
+    users = itertools.cycle(users)
+
+    def run():
+        with env.Session() as db:
+            call(db, next(users))
+    return run
+
+
+def _amount_totals(expression):
+    def call(db, user_id):
+        db.execute(select(models.Expense.currency, func.sum(expression))
+                   .where(models.Expense.user_id == user_id)
+                   .group_by(models.Expense.currency)).all()
+    return call
+
+
+# The list page and its total as the endpoint used to fetch them: two round-trips
+def _page_then_count(skip: int):
+    def call(db, user_id):
+        crud.get_expenses(db, user_id, skip=skip, limit=10)
+        crud.get_expenses_count(db, user_id)
+    return call
+
+
+def _table_totals(expression):
+    def call(db, user_id):
+        db.execute(select(models.Expense.currency, func.sum(expression)).group_by(models.Expense.currency)).all()
+    return call
+
+
+def database_benchmarks():
+    expense = models.Expense
+    numeric = money.major_amount(expense.amount_minor, expense.currency)
+    double = money.major_amount_float(expense.amount_minor, expense.currency)
+    return {
+        "get_expenses_first_page": lambda db, user_id: crud.get_expenses(db, user_id, limit=10),
+        "get_expenses_page_100": lambda db, user_id: crud.get_expenses(db, user_id, skip=990, limit=10),
+        "get_expenses_last_30_days": lambda db, user_id: crud.get_expenses(db, user_id, limit=10, days=30),
+        "get_expenses_sparse_fields": lambda db, user_id: crud.get_expenses(db, user_id, limit=50, fields=("id", "amount", "date")),
+        # Page plus total: separate COUNT(*) against count() OVER (), which has to read
+        # every matching row, so the deep page is where the two can diverge
+        "page_and_count_two_queries_first_page": _page_then_count(0),
+        "page_and_count_window_first_page": lambda db, user_id: crud.get_expenses_with_count(db, user_id, limit=10),
+        "page_and_count_two_queries_page_100": _page_then_count(990),
+        "page_and_count_window_page_100": lambda db, user_id: crud.get_expenses_with_count(db, user_id, skip=990, limit=10),
+        "get_expenses_keyset": lambda db, user_id: crud.get_expenses_keyset(db, user_id, limit=10),
+        "get_expenses_search": lambda db, user_id: crud.get_expenses(db, user_id, limit=10, q="groc"),
+        "get_expenses_count": lambda db, user_id: crud.get_expenses_count(db, user_id),
+        "get_expenses_count_estimate": lambda db, user_id: crud.get_expenses_count_estimate(db, user_id),
+        "monthly_report": lambda db, user_id: crud.get_monthly_expense_report(db, user_id),
+        "analytics_monthly_by_category": lambda db, user_id: crud.get_expense_analytics(db, user_id, group_by_category=True),
+        # Query-time cost of the API's major units over the BIGINT column: none, exact
+        # NUMERIC, or float. Storing amounts as float or NUMERIC is the storage command.
+        "user_totals_minor": _amount_totals(expense.amount_minor),
+        "user_totals_major_numeric": _amount_totals(numeric),
+        "user_totals_major_float": _amount_totals(double),
+    }
+
+
+def table_benchmarks():
+    expense = models.Expense
+    return {
+        "table_totals_minor": _table_totals(expense.amount_minor),
+        "table_totals_major_numeric": _table_totals(money.major_amount(expense.amount_minor, expense.currency)),
+        "table_totals_major_float": _table_totals(money.major_amount_float(expense.amount_minor, expense.currency)),
+    }
+
+
+def _envelope(expenses):
+    return {"data": {"expenses": expenses}, "success": True, "statuscode": 200, "message": "Expenses retrieved successfully"}
+
+
+def serialization_benchmarks(env, user_id: int, size: int = 1000):
+    """Render `size` expense entities both ways: FastAPI's default path for a returned
+    dict (jsonable_encoder, then the stdlib JSONResponse) and the prebuilt TypeAdapter
+    dump rendered by FastJSONResponse."""
+    with env.Session() as db:
+        expenses = crud.get_expenses(db, user_id, limit=size)
+        db.expunge_all()
+    # Users seeded with fewer expenses repeat rows, so every run renders the same count
+    expenses = list(itertools.islice(itertools.cycle(expenses), size))
+    fast_path = "orjson" if FastJSONResponse is ORJSONResponse else "json"
+
+    def jsonable_encoder_baseline():
+        rows = [{"id": expense.id, "category": expense.category, "amount": expense.amount,
+                 "currency": expense.currency, "description": expense.description,
+                 "date": expense.date, "user_id": expense.user_id} for expense in expenses]
+        JSONResponse(content=jsonable_encoder(_envelope(rows)))
+
+    return {
+        f"serialize_{size}_jsonable_encoder": jsonable_encoder_baseline,
+        f"serialize_{size}_adapter_{fast_path}": lambda: FastJSONResponse(content=_envelope(schemas.dump_expenses(expenses))),
+    }
+
+
+def cpu_benchmarks(env, user_id: int):
+    claims = {"sub": f"bench{user_id}", "uid": user_id}
+    token = auth.create_access_token(claims, datetime.timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES))
+    with env.Session() as db:
+        page = crud.get_expenses(db, user_id, limit=100)
+        sparse = crud.get_expenses(db, user_id, limit=100, fields=("id", "amount", "date"))
+        db.expunge_all()
+
+    # Auth per request: each backend's full verification, then the cached path
+    jose, pyjwt = JoseBackend(), PyJWTBackend()
+    request = Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+    loop = asyncio.new_event_loop()
+    auth.decode_access_token(token)
+
+    def render_page():
+        FastJSONResponse(content=_envelope(schemas.dump_expenses(page)))
+
+    return {
+        "jwt_encode": lambda: auth.create_access_token(claims, datetime.timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)),
+        "jwt_decode_jose": lambda: jose.decode(token, auth.SECRET_KEY, auth.ALGORITHM),
+        "jwt_decode_pyjwt": lambda: pyjwt.decode(token, auth.SECRET_KEY, auth.ALGORITHM),
+        "jwt_decode_cached": lambda: auth.decode_access_token(token),
+        "get_current_user_cached": lambda: loop.run_until_complete(auth.get_current_user(request, db=None)),
+        "dump_expenses_100": lambda: schemas.dump_expenses(page),
+        "dump_expense_fields_100": lambda: schemas.dump_expense_fields(sparse, ("id", "amount", "date")),
+        "render_expenses_page_100": render_page,
+    }
+
+
+def run(env, iterations: int = 200, warmup: int = 20, table_iterations: int = 5, sample_users: int = 50,
+        seed: int = 1, only=None) -> dict:
+    """Time crud reads, report queries, JWT handling and serialization in-process."""
+    with env.Session() as db:
+        user_ids = [row.id for row in db.execute(text("SELECT id FROM users ORDER BY id"))]
+    if not user_ids:
+        raise SystemExit("The benchmark database is empty; run `python -m benchmarks seed` first.")
+    users = random.Random(seed).sample(user_ids, min(sample_users, len(user_ids)))
+
+    results = {}
+    selected = (lambda name: only is None or any(part in name for part in only))
+    for name, call in database_benchmarks().items():
+        if selected(name):
+            results[name] = measure(_per_request(env, users, call), iterations, warmup)
+    for name, call in table_benchmarks().items():
+        if selected(name):
+            results[name] = measure(_per_request(env, users, call), table_iterations, 1)
+    for name, fn in cpu_benchmarks(env, users[0]).items():
+        if selected(name):
+            results[name] = measure(fn, iterations * 10, warmup)
+    for name, fn in serialization_benchmarks(env, users[0]).items():
+        if selected(name):
+            results[name] = measure(fn, iterations, warmup)
+    return results
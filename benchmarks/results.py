@@ -0,0 +1,84 @@
+import datetime
+import json
+import math
+import platform
+import subprocess
+import sys
+
+
+def percentile(sorted_values, fraction: float):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(seconds) -> dict:
+    """Latency samples in seconds -> milliseconds summary."""
+    values = sorted(seconds)
+    if not values:
+        return {"count": 0}
+
+    def ms(value):
+        return round(value * 1000, 4)
+
+    return {
+        "count": len(values),
+        "mean_ms": ms(sum(values) / len(values)),
+        "min_ms": ms(values[0]),
+        "p50_ms": ms(percentile(values, 0.50)),
+        "p95_ms": ms(percentile(values, 0.95)),
+        "p99_ms": ms(percentile(values, 0.99)),
+        "max_ms": ms(values[-1]),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(env, **extra) -> dict:
+    return {
+        "created_at": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "database": env.dialect,
+        "db_mode": env.db_mode,
+        **extra,
+    }
+
+
+def save(path: str, results: dict):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _p50s(results: dict):
+    for section in ("micro", "storage", "load"):
+        for name, entry in results.get(section, {}).items():
+            if isinstance(entry, dict) and entry.get("p50_ms") is not None:
+                yield f"{section}.{name}", entry
+
+
+def compare(baseline: dict, candidate: dict):
+    """Rows of (benchmark, baseline p50, candidate p50, change %) for benchmarks in both runs."""
+    before = dict(_p50s(baseline))
+    rows = []
+    for name, entry in _p50s(candidate):
+        if name in before:
+            old, new = before[name]["p50_ms"], entry["p50_ms"]
+            change = (new - old) / old * 100 if old else None
+            rows.append((name, old, new, change))
+    return rows
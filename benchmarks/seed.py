@@ -0,0 +1,145 @@
+import csv
+import datetime
+import io
+import random
+import time
+from sqlalchemy import insert, text
+from app import models, rollups
+from app.utils import money
+from app.utils.categories import category_key, category_map
+
+CATEGORIES = (
+    "Groceries", "Rent", "Utilities", "Transport", "Fuel", "Dining Out", "Coffee", "Health",
+    "Insurance", "Gym", "Subscriptions", "Phone", "Internet", "Clothing", "Electronics", "Books",
+    "Travel", "Hotels", "Flights", "Gifts", "Charity", "Education", "Childcare", "Pets",
+    "Home Repair", "Furniture", "Entertainment", "Taxes", "Fees", "Miscellaneous",
+)
+# Mostly USD, like the real data; the rest exercises per-currency grouping and conversion
+CURRENCIES = ("USD",) * 7 + ("EUR", "INR", "JPY")
+WORDS = ("weekly", "monthly", "card", "cash", "online", "store", "market", "refund", "split",
+         "team", "family", "trip", "order", "invoice", "renewal", "deposit", "lunch", "dinner")
+
+PASSWORD = "benchmark-password"
+TABLES = ("expense_monthly_rollups", "expense_imports", "expenses", "users", "categories")
+EXPENSE_COLUMNS = ("category_id", "amount_minor", "currency", "description", "date", "user_id")
+
+
+def generate_expenses(user_ids, category_ids, per_user: int, days: int, seed: int):
+    """Yield (category_id, amount_minor, currency, description, date, user_id) rows.
+
+    The same seed always produces the same rows, relative to the day they are generated.
+    """
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow().replace(microsecond=0)
+    span = days * 86400
+    for user_id in user_ids:
+        for _ in range(per_user):
+            currency = rng.choice(CURRENCIES)
+            # Log-uniform between 1 and 2000 major units, like a long-tailed spending history
+            amount = 10 ** rng.uniform(0, 3.3) * (150 if currency == "JPY" else 80 if currency == "INR" else 1)
+            description = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+            yield (
+                rng.choice(category_ids),
+                money.to_minor(round(amount, 2), currency),
+                currency,
+                description,
+                now - datetime.timedelta(seconds=rng.randrange(span)),
+                user_id,
+            )
+
+
+def _truncate(env):
+    with env.engine.begin() as conn:
+        if env.dialect == "postgresql":
+            conn.execute(text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+        else:
+            for table in TABLES:
+                conn.execute(text(f"DELETE FROM {table}"))
+
+
+def copy_rows(env, table: str, columns, rows, chunk_size: int):
+    # COPY ... FROM STDIN in CSV chunks; far faster than INSERTs for millions of rows
+    connection = env.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        while True:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            count = 0
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+                if count == chunk_size:
+                    break
+            if not count:
+                break
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def insert_rows(env, table, columns, rows, chunk_size: int):
+    statement = insert(table)
+    with env.engine.begin() as conn:
+        chunk = []
+        for row in rows:
+            chunk.append(dict(zip(columns, row)))
+            if len(chunk) == chunk_size:
+                conn.execute(statement, chunk)
+                chunk = []
+        if chunk:
+            conn.execute(statement, chunk)
+
+
+def seed(env, users: int = 100, expenses_per_user: int = 1000, days: int = 730, seed: int = 1,
+         chunk_size: int = 50000) -> dict:
+    """Replace the benchmark database contents with synthetic users and expenses.
+
+    Every user shares one password hash, so seeding never waits on bcrypt. Returns
+    what was loaded and how long each phase took.
+    """
+    from app.utils.hashing import pwd_context
+
+    timings = {}
+    start = time.perf_counter()
+    env.create_schema()
+    _truncate(env)
+    category_map.clear()
+
+    with env.engine.begin() as conn:
+        conn.execute(insert(models.Category.__table__),
+                     [{"name": name, "key": category_key(name)} for name in CATEGORIES])
+        category_ids = [row.id for row in conn.execute(text("SELECT id FROM categories ORDER BY id"))]
+        hashed_password = pwd_context.hash(PASSWORD)
+        conn.execute(insert(models.User.__table__),
+                     [{"username": f"bench{index}", "hashed_password": hashed_password, "expense_version": 0}
+                      for index in range(users)])
+        user_ids = [row.id for row in conn.execute(text("SELECT id FROM users ORDER BY id"))]
+    timings["users_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = generate_expenses(user_ids, category_ids, expenses_per_user, days, seed)
+    if env.dialect == "postgresql":
+        copy_rows(env, "expenses", EXPENSE_COLUMNS, rows, chunk_size)
+    else:
+        insert_rows(env, models.Expense.__table__, EXPENSE_COLUMNS, rows, chunk_size)
+    timings["expenses_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with env.Session() as db:
+        rollups.rebuild(db)
+    with env.engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+    timings["rollups_and_analyze_seconds"] = time.perf_counter() - start
+
+    return {
+        "users": users,
+        "expenses_per_user": expenses_per_user,
+        "expenses": users * expenses_per_user,
+        "days": days,
+        "seed": seed,
+        **{name: round(value, 3) for name, value in timings.items()},
+    }
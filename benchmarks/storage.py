@@ -0,0 +1,68 @@
+import itertools
+import time
+from decimal import Decimal
+from sqlalchemy import BigInteger, Column, Float, Integer, MetaData, Numeric, String, Table, func, inspect, select
+from app.utils import money
+from benchmarks.micro import measure
+from benchmarks.seed import CATEGORIES, copy_rows, generate_expenses, insert_rows
+
+# The same amounts stored three ways, in a scratch table outside the app's schema so
+# filling it never touches the expenses the other benchmarks read
+metadata = MetaData()
+amounts = Table(
+    "bench_amount_storage", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("currency", String(3), nullable=False),
+    Column("amount_minor", BigInteger, nullable=False),
+    Column("amount_numeric", Numeric(18, 4), nullable=False),
+    Column("amount_float", Float(53), nullable=False),
+)
+COLUMNS = ("currency", "amount_minor", "amount_numeric", "amount_float")
+STORAGE = {"integer": amounts.c.amount_minor, "numeric": amounts.c.amount_numeric, "float": amounts.c.amount_float}
+
+
+def _amount_rows(rows: int, seed: int):
+    # Amounts and currencies from the expense generator, so the mix matches `seed`
+    users = max(rows // 10000, 1)
+    expenses = generate_expenses(range(1, users + 1), range(1, len(CATEGORIES) + 1), -(-rows // users), 730, seed)
+    for _, minor, currency, _, _, _ in itertools.islice(expenses, rows):
+        major = money.to_major(minor, currency)
+        yield currency, minor, major, float(major)
+
+
+def fill(env, rows: int = 10_000_000, seed: int = 1, chunk_size: int = 50000) -> dict:
+    """(Re)create the scratch table with `rows` amounts in every representation."""
+    start = time.perf_counter()
+    amounts.drop(env.engine, checkfirst=True)
+    amounts.create(env.engine)
+    if env.dialect == "postgresql":
+        copy_rows(env, amounts.name, COLUMNS, _amount_rows(rows, seed), chunk_size)
+        with env.engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql(f"VACUUM ANALYZE {amounts.name}")
+    else:
+        insert_rows(env, amounts, COLUMNS, _amount_rows(rows, seed), chunk_size)
+    return {"rows": rows, "seed": seed, "fill_seconds": round(time.perf_counter() - start, 3)}
+
+
+def _totals(env, column):
+    with env.engine.connect() as conn:
+        return dict(conn.execute(select(amounts.c.currency, func.sum(column)).group_by(amounts.c.currency)).all())
+
+
+def run(env, iterations: int = 5, warmup: int = 1) -> dict:
+    """Time per-currency totals over each representation, and how far each total is
+    from the exact one (the integer total in major units)."""
+    if not inspect(env.engine).has_table(amounts.name):
+        raise SystemExit("The storage table is missing; run `python -m benchmarks storage` without --reuse first.")
+
+    results = {}
+    for name, column in STORAGE.items():
+        results[f"storage_totals_{name}"] = measure(lambda column=column: _totals(env, column), iterations, warmup)
+
+    exact = {currency: money.to_major(total, currency) for currency, total in _totals(env, amounts.c.amount_minor).items()}
+    results["storage_total_error"] = {
+        name: float(max((abs(Decimal(str(total)) - exact[currency]) for currency, total in _totals(env, column).items()),
+                        default=0))
+        for name, column in STORAGE.items() if name != "integer"
+    }
+    return results
@@ -0,0 +1,80 @@
+import datetime
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from benchmarks.environment import BenchEnvironment, configure_environment
+
+# Before any test module imports the app
+configure_environment(sqlite=True)
+
+
+@pytest.fixture(scope="session")
+def env(tmp_path_factory):
+    # The app on an SQLite file with the Postgres functions crud uses, rates stubbed
+    return BenchEnvironment(sqlite_path=str(tmp_path_factory.mktemp("db") / "tests.sqlite3"))
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(env):
+    from app import auth
+    from app.rate_limits import limiter
+    from app.routers import expenses
+    from app.utils.categories import category_map
+    from app.utils.currency import rate_service
+
+    env.create_schema()
+    # Process-wide caches would otherwise carry ids and results over from earlier tests
+    for cache in (category_map, auth.principal_cache.local, auth.token_cache, expenses.analytics_cache,
+                  expenses.category_cache, limiter.local, rate_service):
+        cache.clear()
+    yield
+
+
+@pytest.fixture
+def client(env):
+    # No `with`: the lifespan (background refreshers, process pool shutdown) stays out of tests
+    return TestClient(env.app)
+
+
+@pytest.fixture
+def db(env):
+    session = env.Session()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    from app import auth, crud
+
+    def make(username: str = "alice"):
+        user = crud.create_user(db, username, "not-a-password-hash")
+        token = auth.create_access_token(auth.token_claims(user), datetime.timedelta(minutes=5))
+        return user, {"Authorization": f"Bearer {token}"}
+    return make
+
+
+@pytest.fixture
+def add_expenses(db):
+    """Insert expenses directly, bypassing the API; rows are dicts of Expense columns
+    with `category` and `amount` in major units. Keeps the rollup current."""
+    from app import crud, models, rollups
+    from app.utils import money
+    from app.utils.categories import category_key
+
+    def add(user_id: int, rows):
+        category_ids = crud._ensure_categories(db, {row["category"] for row in rows})
+        values = [{
+            "user_id": user_id,
+            "category_id": category_ids[category_key(row["category"])],
+            "amount_minor": money.to_minor(row["amount"], row.get("currency", "USD")),
+            "currency": row.get("currency", "USD"),
+            "description": row.get("description"),
+            "date": row.get("date", datetime.datetime(2026, 1, 15)),
+        } for row in rows]
+        ids = db.execute(insert(models.Expense).returning(models.Expense.id), values).scalars().all()
+        rollups.apply_changes(db, user_id, added=[
+            (value["date"], value["category_id"], value["currency"], value["amount_minor"]) for value in values])
+        db.commit()
+        return ids
+    return add
@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+import pytest
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg2
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud
+from app.database import run_db
+
+
+@pytest.fixture
+def async_mode(env):
+    env.use_db_mode("async")
+    yield env
+    env.use_db_mode("sync")
+
+
+def _run(env, scenario):
+    async def main():
+        try:
+            transport = httpx.ASGITransport(app=env.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+        finally:
+            await env.dispose_async_engine()
+    return asyncio.run(main())
+
+
+def test_run_db_uses_the_async_session_bridge(async_mode, make_user):
+    user, _ = make_user()
+
+    async def scenario(client):
+        async with async_mode.AsyncSession() as db:
+            assert isinstance(db, AsyncSession)
+            return await run_db(db, crud.get_user_by_username, "alice")
+    assert _run(async_mode, scenario).id == user.id
+
+
+def test_expense_routes_in_async_mode(async_mode, make_user):
+    _, headers = make_user()
+
+    async def scenario(client):
+        created = (await client.post("/expenses/", headers=headers,
+                                     json={"amount": 10.5, "category": "Food", "description": "lunch"})).json()["data"]
+        await client.post("/expenses/", headers=headers, json={"amount": 3, "category": "Coffee"})
+        listed = (await client.get("/expenses/?limit=10", headers=headers)).json()["data"]
+        cursor = (await client.get("/expenses/?pagination=cursor&limit=1", headers=headers)).json()["data"]
+        report = (await client.get("/expenses/report/monthly", headers=headers)).json()["data"]
+        updated = (await client.put(f"/expenses/{created['id']}/", headers=headers,
+                                    json={"amount": 12, "category": "Food"})).json()["data"]
+        report_after_update = (await client.get("/expenses/report/monthly", headers=headers)).json()["data"]
+        deleted = await client.delete(f"/expenses/{created['id']}/", headers=headers)
+        export = await client.get("/expenses/export?format=ndjson", headers=headers)
+        return listed, cursor, report, updated, report_after_update, deleted, export
+
+    listed, cursor, report, updated, report_after_update, deleted, export = _run(async_mode, scenario)
+    assert listed["totalcount"] == 2
+    assert len(cursor["expenses"]) == 1 and cursor["next_cursor"]
+    assert [row["total_spent"] for row in report] == [13.5]
+    assert updated["amount"] == 12.0
+    assert [row["total_spent"] for row in report_after_update] == [15.0]
+    assert deleted.status_code == 200
+    # The export streams from its own async session
+    assert len(export.text.splitlines()) == 1
+
+
+def test_approximate_total_falls_back_to_count_in_async_mode(async_mode, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 1}, {"category": "Rent", "amount": 2}])
+
+    async def scenario(client):
+        return (await client.get("/expenses/?approximate_total=true&q=foo", headers=headers)).json()["data"]
+    listed = _run(async_mode, scenario)
+    assert (listed["totalcount"], listed["totalcount_estimated"]) == (1, True)
+
+
+@pytest.mark.parametrize("dialect, placeholder", [(asyncpg.dialect(), "$1::INTEGER"), (psycopg2.dialect(), "%(user_id_1)s")])
+def test_count_estimate_explain_binds_for_each_driver(db, make_user, add_expenses, dialect, placeholder):
+    user, _ = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 1}])
+    query = crud._filtered_expenses(db, user.id, category="Food", days=30, q="lunch")
+    compiled = crud._explain(query.statement).compile(dialect=dialect)
+    assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert placeholder in str(compiled)
+    params = compiled.construct_params()
+    assert params["user_id_1"] == user.id and "%lunch%" in params.values()
+
+
+@pytest.mark.parametrize("dialect", [asyncpg.dialect(), psycopg2.dialect()])
+def test_count_estimate_with_search_on_postgres(db, make_user, monkeypatch, dialect):
+    user, _ = make_user()
+    executed = []
+
+    def execute(statement, *args, **kwargs):
+        executed.append(statement)
+        return SimpleNamespace(scalar=lambda: [{"Plan": {"Plan Rows": 42}}])
+    # Postgres as far as crud can tell, so the EXPLAIN path and the full-text criterion run
+    monkeypatch.setattr(db, "get_bind", lambda *args, **kwargs: SimpleNamespace(dialect=dialect))
+    monkeypatch.setattr(db, "execute", execute)
+
+    assert crud.get_expenses_count_estimate(db, user.id, q="50%_off") == 42
+    sql = str(executed[0].compile(dialect=dialect))
+    # A backslash escape would render as ESCAPE '\\', which the server rejects
+    assert "ESCAPE '/'" in sql and "\\" not in sql
+    assert "%50/%/_off%" in executed[0].compile(dialect=dialect).construct_params().values()
@@ -0,0 +1,79 @@
+import json
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+from app import models
+from app.utils import money
+from benchmarks import __main__ as cli, load, results, seed, storage
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert [results.percentile(values, fraction) for fraction in (0.5, 0.95, 0.99, 1.0)] == [50, 95, 99, 100]
+    assert results.percentile([7], 0.99) == 7
+    assert results.percentile([], 0.5) is None
+
+
+def test_summarize_reports_milliseconds():
+    summary = results.summarize([0.003, 0.001, 0.002])
+    assert (summary["count"], summary["min_ms"], summary["p50_ms"], summary["max_ms"]) == (3, 1.0, 2.0, 3.0)
+    assert results.summarize([]) == {"count": 0}
+
+
+def test_compare_matches_benchmarks_present_in_both(tmp_path, capsys):
+    baseline = {"micro": {"a": {"p50_ms": 2.0}, "gone": {"p50_ms": 1.0}}, "load": {"all": {"p50_ms": 10.0}}}
+    candidate = {"micro": {"a": {"p50_ms": 1.5}, "new": {"p50_ms": 1.0}}, "load": {"all": {"p50_ms": 0}}}
+    assert results.compare(baseline, candidate) == [("micro.a", 2.0, 1.5, -25.0), ("load.all", 10.0, 0, -100.0)]
+
+    for name, content in (("before.json", baseline), ("after.json", candidate)):
+        results.save(str(tmp_path / name), content)
+    cli.main(["compare", str(tmp_path / "before.json"), str(tmp_path / "after.json")])
+    assert "-25.0%" in capsys.readouterr().out
+
+
+def test_generated_data_depends_only_on_the_seed():
+    def rows(seed_value):
+        # Dates are relative to now; everything else must repeat exactly
+        return [row[:4] + row[5:] for row in seed.generate_expenses([1, 2], [10, 11, 12], 50, 365, seed_value)]
+
+    assert rows(7) == rows(7)
+    assert rows(7) != rows(8)
+    assert len(rows(7)) == 100
+
+
+def test_seed_loads_users_expenses_and_rollups(env, db):
+    summary = seed.seed(env, users=3, expenses_per_user=20, days=90, seed=5)
+    assert (summary["users"], summary["expenses"]) == (3, 60)
+    assert db.scalar(select(func.count()).select_from(models.Expense)) == 60
+    rollup_total = db.scalar(select(func.sum(models.ExpenseMonthlyRollup.total_minor)))
+    assert rollup_total == db.scalar(select(func.sum(models.Expense.amount_minor)))
+
+
+def test_load_run_drives_the_mix_without_errors(env):
+    seed.seed(env, users=2, expenses_per_user=20, days=60, seed=3)
+    report = load.run(env, concurrency=2, duration=5, requests=40, warmup=0, sample_users=2)
+    assert report["all"]["count"] == 40 and report["all"]["errors"] == 0
+    assert set(report) == set(load.SCENARIOS) | {"all"}
+    json.dumps(report)
+
+
+def test_storage_benchmark_loads_each_representation(env):
+    assert storage.fill(env, rows=500, seed=4)["rows"] == 500
+    report = storage.run(env, iterations=2, warmup=0)
+    assert [report[f"storage_totals_{name}"]["count"] for name in ("integer", "numeric", "float")] == [2, 2, 2]
+    # Errors are measured against the integer total, the exact one
+    assert set(report["storage_total_error"]) == {"numeric", "float"}
+    with env.engine.connect() as conn:
+        rows = conn.execute(select(storage.amounts.c.currency, storage.amounts.c.amount_minor,
+                                   storage.amounts.c.amount_float)).all()
+    assert len(rows) == 500
+    assert all(abs(value - minor / 10 ** money.exponent(currency)) < 1e-9 for currency, minor, value in rows)
+
+
+def test_sqlite_date_trunc_rejects_units_it_does_not_implement(db):
+    value = "2026-05-14 10:30:00.000000"
+    truncated = [db.execute(text("SELECT date_trunc(:unit, :value)"), {"unit": unit, "value": value}).scalar()
+                 for unit in ("day", "week", "month", "year")]
+    assert [item[:10] for item in truncated] == ["2026-05-14", "2026-05-11", "2026-05-01", "2026-01-01"]
+    with pytest.raises(OperationalError):
+        db.execute(text("SELECT date_trunc('quarter', :value)"), {"value": value})
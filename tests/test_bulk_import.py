@@ -0,0 +1,163 @@
+import datetime
+import json
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from app import crud, models
+from app.config import settings
+from app.utils import bulk_import
+
+ROWS = [{"amount": amount, "category": "Food", "description": f"row {amount}"} for amount in range(1, 8)]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_IMPORT_CHUNK_SIZE", 2)
+
+
+def _body(rows):
+    return json.dumps(rows).encode()
+
+
+def _post(client, headers, rows=ROWS, key=None):
+    headers = {**headers, "Content-Type": "application/json"}
+    if key:
+        headers["Idempotency-Key"] = key
+    return client.post("/expenses/bulk", headers=headers, content=_body(rows))
+
+
+def _amounts(db, user_id):
+    db.expire_all()
+    return sorted(expense.amount for expense in db.query(models.Expense).filter(models.Expense.user_id == user_id))
+
+
+def _import(db, key):
+    db.expire_all()
+    return db.query(models.ExpenseImport).filter(models.ExpenseImport.idempotency_key == key).one()
+
+
+def test_rows_are_validated_and_inserted(client, db, make_user, small_chunks):
+    user, headers = make_user()
+    response = _post(client, headers, ROWS[:3] + [{"amount": -1, "category": "Food"}, "nope"])
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert (data["total_rows"], data["inserted"], data["error_count"]) == (5, 3, 2)
+    assert [error["row"] for error in data["errors"]] == [4, 5]
+    assert _amounts(db, user.id) == [1, 2, 3]
+
+
+def test_ndjson_and_csv_bodies(client, db, make_user):
+    user, headers = make_user()
+    ndjson = "\n".join(json.dumps(row) for row in ROWS[:2]) + "\n{broken\n"
+    response = client.post("/expenses/bulk", headers={**headers, "Content-Type": "application/x-ndjson"}, content=ndjson)
+    assert response.json()["data"]["inserted"] == 2 and response.json()["data"]["error_count"] == 1
+
+    csv_body = 'amount,category,description\n10,Rent,"two\nlines"\n20,Rent,\n'
+    response = client.post("/expenses/bulk", headers={**headers, "Content-Type": "text/csv"}, content=csv_body)
+    assert response.json()["data"]["inserted"] == 2
+    assert _amounts(db, user.id) == [1, 2, 10, 20]
+
+
+def test_invalid_json_body_is_400(client, make_user):
+    _, headers = make_user()
+    response = client.post("/expenses/bulk", headers={**headers, "Content-Type": "application/json"}, content="{")
+    assert response.status_code == 400
+    assert response.json()["error"] == "Invalid import body"
+
+
+def test_retry_replays_the_stored_result(client, db, make_user, small_chunks):
+    user, headers = make_user()
+    first = _post(client, headers, key="k1")
+    again = _post(client, headers, key="k1")
+    assert again.json() == first.json()
+    assert _amounts(db, user.id) == list(range(1, 8))
+    assert _import(db, "k1").lease_owner is None
+
+
+def test_key_reused_with_another_body_is_422(client, db, make_user):
+    user, headers = make_user()
+    _post(client, headers, ROWS[:2], key="k1")
+    response = _post(client, headers, ROWS[:3], key="k1")
+    assert response.status_code == 422
+    assert response.json()["error"] == "Idempotency key reused"
+    assert _amounts(db, user.id) == [1, 2]
+
+
+def test_held_claim_is_409_until_it_expires(client, db, make_user, small_chunks):
+    user, headers = make_user()
+    # An earlier attempt claimed the import, committed two rows and is still running
+    _post(client, headers, ROWS[:2])
+    started = crud.get_or_create_expense_import(db, user.id, "k1", bulk_import.request_hash("application/json", _body(ROWS)))
+    assert crud.claim_expense_import(db, started.id, "other-request", 60) is not None
+    db.query(models.ExpenseImport).filter_by(id=started.id).update({"rows_committed": 2})
+    db.commit()
+
+    response = _post(client, headers, key="k1")
+    assert response.status_code == 409
+    assert _amounts(db, user.id) == [1, 2]
+
+    # Its lease runs out without another chunk: the retry takes over after row 2
+    db.query(models.ExpenseImport).filter_by(id=started.id).update(
+        {"lease_expires_at": datetime.datetime.utcnow() - datetime.timedelta(seconds=1)})
+    db.commit()
+    data = _post(client, headers, key="k1").json()["data"]
+    assert (data["already_imported"], data["inserted"]) == (2, 5)
+    assert _amounts(db, user.id) == list(range(1, 8))
+
+
+def test_chunks_need_the_claim(db, make_user):
+    user, _ = make_user()
+    expense_import = crud.get_or_create_expense_import(db, user.id, "k1")
+    crud.claim_expense_import(db, expense_import.id, "owner", 60)
+
+    with pytest.raises(bulk_import.ImportInProgress):
+        crud.add_expenses_bulk(db, user.id, ROWS[:2], expense_import.id, "someone-else", 60)
+    assert _amounts(db, user.id) == []
+    assert crud.add_expenses_bulk(db, user.id, ROWS[:2], expense_import.id, "owner", 60) == 2
+    assert _import(db, "k1").rows_committed == 2
+
+
+def test_failed_attempt_releases_its_claim(env, db, make_user, small_chunks, monkeypatch):
+    user, headers = make_user()
+    add_expenses_bulk = crud.add_expenses_bulk
+    calls = []
+
+    def fail_second_chunk(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        return add_expenses_bulk(*args)
+
+    monkeypatch.setattr(crud, "add_expenses_bulk", fail_second_chunk)
+    response = _post(TestClient(env.app, raise_server_exceptions=False), headers, key="k1")
+    assert response.status_code == 500
+    assert _import(db, "k1").lease_owner is None
+
+    # The retry does not wait out the lease, and resumes after the committed chunk
+    monkeypatch.setattr(crud, "add_expenses_bulk", add_expenses_bulk)
+    data = _post(TestClient(env.app), headers, key="k1").json()["data"]
+    assert (data["already_imported"], data["inserted"]) == (2, 5)
+    assert _amounts(db, user.id) == list(range(1, 8))
+
+
+def test_concurrent_retries_insert_each_row_once(env, db, make_user, small_chunks):
+    user, headers = make_user()
+    rows = [{"amount": amount, "category": "Food"} for amount in range(1, 41)]
+    start = threading.Barrier(4)
+    statuses = []
+
+    def retry():
+        client = TestClient(env.app)
+        start.wait()
+        statuses.append(_post(client, headers, rows, key="k1").status_code)
+
+    threads = [threading.Thread(target=retry) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert set(statuses) <= {200, 409} and 200 in statuses
+    # Whoever lost the race now gets the stored result
+    assert _post(TestClient(env.app), headers, rows, key="k1").json()["data"]["inserted"] == 40
+    assert _amounts(db, user.id) == list(range(1, 41))
@@ -0,0 +1,54 @@
+from app import crud, models
+from app.utils.categories import CategoryMap, category_key, category_map, normalize_category
+
+
+def test_names_are_normalized_and_keyed():
+    assert normalize_category("  Dining   Out ") == "Dining Out"
+    assert category_key("DINING\tout") == "dining out"
+
+
+def test_spelling_variants_share_one_category(client, db, make_user):
+    _, headers = make_user()
+    for name in ("Dining Out", "  dining  OUT", "DINING out"):
+        response = client.post("/expenses/", headers=headers, json={"amount": 1, "category": name})
+        assert response.json()["data"]["category"] == "Dining Out"
+
+    # The first spelling is the one stored; expenses hold its id
+    assert [category.name for category in db.query(models.Category)] == ["Dining Out"]
+    assert {expense.category_id for expense in db.query(models.Expense)} == {db.query(models.Category).one().id}
+    report = client.get("/expenses/report/monthly?category=dining%20out", headers=headers).json()["data"]
+    assert [row["total_spent"] for row in report] == [3.0]
+
+
+def test_unknown_category_filter_matches_nothing(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 1}])
+    assert client.get("/expenses/?category=Nope", headers=headers).json()["data"]["totalcount"] == 0
+
+
+def test_ensure_categories_inserts_only_new_names(db):
+    first = crud._ensure_categories(db, ["Food", "Rent"])
+    db.commit()
+    category_map.clear()
+    second = crud._ensure_categories(db, ["food", "Travel"])
+    db.commit()
+    assert second["food"] == first["food"]
+    assert db.query(models.Category).count() == 3
+
+
+def test_names_load_once_per_process(db, make_user, add_expenses):
+    user, _ = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 1}])
+    category_map.clear()
+
+    assert [expense.category for expense in crud.get_expenses(db, user.id)] == ["Food"]
+    assert category_map.id_for("FOOD") is not None
+    assert category_map.missing([category_map.id_for("food"), 999]) == {999}
+
+
+def test_category_map_lookups():
+    names = CategoryMap()
+    names.add(1, "Dining Out")
+    assert (names.name(1), names.id_for(" dining  out"), len(names)) == ("Dining Out", 1, 1)
+    names.clear()
+    assert names.name(1) is None
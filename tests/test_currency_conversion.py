@@ -0,0 +1,70 @@
+import datetime
+
+
+def test_batch_converts_against_one_table(client):
+    response = client.post("/currency/convert-batch/", json={"items": [
+        {"amount": 10, "from_currency": "usd", "to_currency": "EUR"},
+        {"amount": 1000, "from_currency": "JPY", "to_currency": "USD"},
+        {"amount": 1, "from_currency": "USD", "to_currency": "XYZ"},
+    ]})
+    assert response.status_code == 200
+    first, second, invalid = response.json()["data"]
+    assert (first["from"], first["converted_amount"], first["error"]) == ("USD", 9.2, None)
+    assert second["converted_amount"] == 6.61
+    # One bad pair does not fail the batch
+    assert invalid["converted_amount"] is None and invalid["error"] == "Invalid currency codes"
+
+
+def test_batch_rejects_empty_input(client):
+    # Validation errors use the app's 400 envelope
+    assert client.post("/currency/convert-batch/", json={"items": []}).status_code == 400
+
+
+def test_list_adds_converted_amounts(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 10, "currency": "USD"},
+                           {"category": "Food", "amount": 151.4 * 2, "currency": "JPY"}])
+
+    expenses = client.get("/expenses/?currency=eur", headers=headers).json()["data"]["expenses"]
+    assert {row["converted_currency"] for row in expenses} == {"EUR"}
+    assert sorted(row["converted_amount"] for row in expenses) == [1.84, 9.2]
+
+    # Sparse fields still get the conversion, which needs amount and currency behind the scenes
+    sparse = client.get("/expenses/?currency=EUR&fields=id", headers=headers).json()["data"]["expenses"]
+    assert sorted(row["converted_amount"] for row in sparse) == [1.84, 9.2]
+
+
+def test_monthly_report_sums_converted_totals(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [
+        {"category": "Food", "amount": 10, "currency": "USD"},
+        {"category": "Food", "amount": 9.2, "currency": "EUR"},
+        {"category": "Rent", "amount": 5, "currency": "USD", "date": datetime.datetime(2026, 2, 3)},
+    ])
+
+    report = client.get("/expenses/report/monthly?currency=USD", headers=headers).json()["data"]
+    assert sorted((row["month"], row["total_spent"], row["currency"]) for row in report) == [
+        ("2026-01", 20.0, "USD"), ("2026-02", 5.0, "USD")]
+
+
+def test_unsupported_currency_is_400(client, make_user):
+    _, headers = make_user()
+    for path in ("/expenses/?currency=XYZ", "/expenses/report/monthly?currency=XYZ"):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 400
+        assert response.json()["error"] == "Invalid currency"
+
+
+def test_report_refuses_totals_it_cannot_convert(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [
+        {"category": "Food", "amount": 10, "currency": "USD"},
+        {"category": "Food", "amount": 7, "currency": "XYZ"},
+    ])
+
+    response = client.get("/expenses/report/monthly?currency=USD", headers=headers)
+    assert response.status_code == 422
+    assert response.json()["error"] == "Unconvertible currency"
+    assert "XYZ" in response.json()["message"]
+    # The unconverted report is unaffected
+    assert client.get("/expenses/report/monthly", headers=headers).status_code == 200
@@ -0,0 +1,126 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import HTTPException
+from app.utils import currency
+from app.utils.currency import ExchangeRateService
+from app.utils.metrics import upstream_duration
+
+
+class StubProvider:
+    """Local stand-in for the rate API behind httpx.MockTransport.
+
+    `gate` holds responses back until set; `error` makes calls fail in transport.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.status = 200
+        self.error = None
+        self.gate = None
+        self.rates = {"USD": 1.0, "INR": 83.0, "EUR": 0.9}
+
+    async def handle(self, request: httpx.Request):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error("upstream failed", request=request)
+        return httpx.Response(self.status, json={"result": "success", "conversion_rates": dict(self.rates)})
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    provider = StubProvider()
+    monkeypatch.setattr(currency, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(provider.handle)))
+    return provider
+
+
+def _expire(service, seconds: float):
+    # Age the cached table rather than the clock, which the event loop also reads
+    service._table.fetched_at -= seconds
+
+
+def test_table_is_cached_for_its_ttl(provider):
+    service = ExchangeRateService("usd", ttl=60, stale_ttl=0)
+
+    async def scenario():
+        assert await service.get_rate("USD", "INR") == 83.0
+        assert await service.get_rate("inr", "eur") == pytest.approx(0.9 / 83.0)
+        provider.rates["INR"] = 84.0
+        _expire(service, 61)
+        return await service.get_rate("USD", "INR")
+
+    assert asyncio.run(scenario()) == 84.0
+    assert provider.calls == 2
+    assert (service.hits, service.misses) == (1, 2)
+
+
+def test_stale_table_is_served_while_one_refresh_runs(provider):
+    service = ExchangeRateService("USD", ttl=60, stale_ttl=600)
+
+    async def scenario():
+        await service.table()
+        _expire(service, 61)
+        provider.gate = asyncio.Event()
+        provider.rates["INR"] = 90.0
+        # The upstream is hanging, yet both callers get the stale table at once
+        stale = await asyncio.wait_for(asyncio.gather(service.get_rate("USD", "INR"), service.get_rate("USD", "INR")), 1)
+        provider.gate.set()
+        await service._inflight
+        return stale, await service.get_rate("USD", "INR")
+
+    stale, fresh = asyncio.run(scenario())
+    assert stale == [83.0, 83.0]
+    assert fresh == 90.0
+    assert provider.calls == 2
+    assert service.stale_hits == 2
+
+
+def test_concurrent_misses_share_one_upstream_call(provider):
+    service = ExchangeRateService("USD", ttl=60, stale_ttl=0)
+
+    async def scenario():
+        provider.gate = asyncio.Event()
+        callers = asyncio.gather(*(service.get_rate("USD", "INR") for _ in range(500)))
+        await asyncio.sleep(0.01)
+        provider.gate.set()
+        return await callers
+
+    assert set(asyncio.run(scenario())) == {83.0}
+    assert provider.calls == 1
+
+
+@pytest.mark.parametrize("status, error", [(503, None), (200, httpx.ConnectError), (200, httpx.ReadTimeout)])
+def test_upstream_failures_are_502(provider, status, error):
+    provider.status, provider.error = status, error
+    service = ExchangeRateService("USD", ttl=60, stale_ttl=0)
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(service.table())
+    assert raised.value.status_code == 502
+    # The next request tries again rather than caching the failure
+    provider.status, provider.error = 200, None
+    assert asyncio.run(service.get_rate("USD", "INR")) == 83.0
+
+
+def test_failed_refresh_keeps_serving_the_stale_table(provider):
+    service = ExchangeRateService("USD", ttl=60, stale_ttl=600)
+
+    async def scenario():
+        await service.table()
+        _expire(service, 61)
+        provider.error = httpx.ConnectError
+        rate = await service.get_rate("USD", "INR")
+        await asyncio.gather(service._inflight, return_exceptions=True)
+        return rate
+
+    assert asyncio.run(scenario()) == 83.0
+    assert service._table is not None and service._inflight is None
+
+
+def test_transport_errors_reach_clients_as_502(client, provider):
+    provider.error = httpx.ConnectError
+    response = client.get("/currency/convert-currency/?amount=10&from_currency=USD&to_currency=INR")
+    assert response.status_code == 502
+    assert 'outcome="transport_error"' in "\n".join(upstream_duration.render())
@@ -0,0 +1,96 @@
+import datetime
+from app import crud
+from app.routers.expenses import analytics_cache
+
+ROWS = [
+    {"category": "Food", "amount": 10, "date": datetime.datetime(2026, 1, 5)},
+    {"category": "Food", "amount": 20, "date": datetime.datetime(2026, 1, 20)},
+    {"category": "Rent", "amount": 500, "date": datetime.datetime(2026, 2, 1)},
+]
+
+
+def _report(client, headers, query=""):
+    response = client.get(f"/expenses/report/?{query}", headers=headers)
+    assert response.status_code == 200, response.json()
+    return response.json()["data"]
+
+
+def test_buckets_and_measures(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, ROWS)
+
+    months = _report(client, headers, "measures=sum,count,max")
+    assert [(row["period"][:7], row["sum"], row["count"], row["max"]) for row in months] == [
+        ("2026-01", 30, 2, 20), ("2026-02", 500, 1, 500)]
+
+    by_category = _report(client, headers, "group_by=category&measures=count")
+    assert [(row["period"][:7], row["category"], row["count"]) for row in by_category] == [
+        ("2026-01", "Food", 2), ("2026-02", "Rent", 1)]
+
+    days = _report(client, headers, "bucket=day&category=rent&measures=sum")
+    assert [(row["period"][:10], row["sum"]) for row in days] == [("2026-02-01", 500)]
+
+
+def test_week_and_year_buckets(client, make_user, add_expenses):
+    user, headers = make_user()
+    # 2026-01-05 is a Monday; the 4th closes the previous ISO week
+    add_expenses(user.id, ROWS + [{"category": "Food", "amount": 1, "date": datetime.datetime(2026, 1, 4, 23)}])
+
+    weeks = _report(client, headers, "bucket=week&measures=sum")
+    assert [(row["period"][:10], row["sum"]) for row in weeks] == [
+        ("2025-12-29", 1), ("2026-01-05", 10), ("2026-01-19", 20), ("2026-01-26", 500)]
+    years = _report(client, headers, "bucket=year&measures=count")
+    assert [(row["period"][:10], row["count"]) for row in years] == [("2026-01-01", 4)]
+
+
+def test_buckets_are_per_currency(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, ROWS[:2] + [
+        {"category": "Food", "amount": 1000, "currency": "JPY", "date": datetime.datetime(2026, 1, 8)},
+        {"category": "Food", "amount": 3000, "currency": "JPY", "date": datetime.datetime(2026, 1, 9)},
+    ])
+
+    months = _report(client, headers, "measures=sum,avg,max")
+    assert [(row["period"][:7], row["currency"], row["sum"], row["avg"], row["max"]) for row in months] == [
+        ("2026-01", "JPY", 4000, 2000, 3000), ("2026-01", "USD", 30, 15, 20)]
+
+    by_category = _report(client, headers, "group_by=category&measures=count")
+    assert [(row["category"], row["currency"], row["count"]) for row in by_category] == [
+        ("Food", "JPY", 2), ("Food", "USD", 2)]
+
+
+def test_invalid_parameters_are_400(client, make_user):
+    _, headers = make_user()
+    for query in ("bucket=decade", "measures=median", "group_by=currency", "percentile=1.5"):
+        response = client.get(f"/expenses/report/?{query}", headers=headers)
+        assert response.status_code == 400
+        assert response.json()["success"] is False
+
+
+def test_repeat_reports_come_from_the_cache(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, ROWS)
+    first = _report(client, headers)
+    hits = analytics_cache.hits
+    assert _report(client, headers) == first
+    assert analytics_cache.hits == hits + 1
+
+
+def test_writes_through_another_worker_invalidate_the_cache(client, db, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, ROWS[:1])
+    assert [row["count"] for row in _report(client, headers)] == [1]
+
+    # Another worker's write: new rows and a bumped version, nothing in this process's memory
+    add_expenses(user.id, ROWS[1:2])
+    crud._bump_expense_version(db, user.id)
+    db.commit()
+    assert [row["count"] for row in _report(client, headers)] == [2]
+
+
+def test_writes_through_the_api_invalidate_the_cache(client, make_user):
+    _, headers = make_user()
+    client.post("/expenses/", headers=headers, json={"amount": 4, "category": "Food"})
+    assert [row["sum"] for row in _report(client, headers)] == [4]
+    client.post("/expenses/", headers=headers, json={"amount": 6, "category": "Food"})
+    assert [row["sum"] for row in _report(client, headers)] == [10]
@@ -0,0 +1,54 @@
+import datetime
+from sqlalchemy import event
+from app import crud
+
+
+def _seed(make_user, add_expenses, count=23):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food" if index % 3 else "Rent", "amount": 2,
+                            "date": datetime.datetime(2026, 2, 1) + datetime.timedelta(days=index)} for index in range(count)])
+    return user, headers
+
+
+def test_page_and_total_share_one_query(env, db, make_user, add_expenses):
+    user, _ = _seed(make_user, add_expenses)
+    crud.get_expenses(db, user.id)  # warm the category map
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(env.engine, "before_cursor_execute", listener)
+    try:
+        expenses, total = crud.get_expenses_with_count(db, user.id, skip=10, limit=10)
+    finally:
+        event.remove(env.engine, "before_cursor_execute", listener)
+
+    assert (len(expenses), total) == (10, 23)
+    assert len([statement for statement in statements if "FROM expenses" in statement]) == 1
+
+
+def test_total_past_the_last_page_is_still_reported(db, make_user, add_expenses):
+    user, _ = _seed(make_user, add_expenses)
+    assert crud.get_expenses_with_count(db, user.id, skip=100, limit=10) == ([], 23)
+    assert crud.get_expenses_with_count(db, make_user("bob")[0].id) == ([], 0)
+
+
+def test_list_reports_filtered_total(client, make_user, add_expenses):
+    _, headers = _seed(make_user, add_expenses)
+    body = client.get("/expenses/?limit=5&category=rent", headers=headers).json()["data"]
+    assert body["totalcount"] == 8
+    assert body["totalcount_estimated"] is False
+    assert len(body["expenses"]) == 5
+
+
+def test_include_total_false_skips_the_count(client, make_user, add_expenses):
+    _, headers = _seed(make_user, add_expenses)
+    body = client.get("/expenses/?limit=5&include_total=false", headers=headers).json()["data"]
+    assert body["totalcount"] is None
+    assert len(body["expenses"]) == 5
+
+
+def test_approximate_total_is_flagged(client, make_user, add_expenses):
+    _, headers = _seed(make_user, add_expenses)
+    body = client.get("/expenses/?limit=5&approximate_total=true", headers=headers).json()["data"]
+    # Off Postgres there is no planner estimate, so the exact count stands in
+    assert body["totalcount"] == 23
+    assert body["totalcount_estimated"] is True
@@ -0,0 +1,109 @@
+import datetime
+from app import models, rollups
+
+JANUARY = datetime.datetime(2026, 1, 10)
+FEBRUARY = datetime.datetime(2026, 2, 10)
+
+
+def _report(client, headers, query=""):
+    return client.get(f"/expenses/report/monthly?{query}", headers=headers).json()["data"]
+
+
+def _rollup(db, user_id):
+    Rollup = models.ExpenseMonthlyRollup
+    db.expire_all()
+    return sorted((row.month, row.category_id, row.currency, row.total_minor, row.expense_count)
+                  for row in db.query(Rollup).filter(Rollup.user_id == user_id))
+
+
+def _assert_rollup_matches_rebuild(db, user_id):
+    incremental = _rollup(db, user_id)
+    rollups.rebuild(db, user_id=user_id)
+    assert _rollup(db, user_id) == incremental
+
+
+def test_report_after_update(client, db, make_user, add_expenses):
+    user, headers = make_user()
+    expense_id, _ = add_expenses(user.id, [{"category": "Food", "amount": 10}, {"category": "Food", "amount": 3}])
+
+    response = client.put(f"/expenses/{expense_id}/", headers=headers, json={"amount": 12, "category": "Travel"})
+    assert response.status_code == 200
+    assert (response.json()["data"]["amount"], response.json()["data"]["category"]) == (12.0, "Travel")
+
+    assert _report(client, headers) == [{"month": "2026-01", "total_spent": 15.0, "currency": "USD"}]
+    assert _report(client, headers, "category=Food") == [{"month": "2026-01", "total_spent": 3.0, "currency": "USD"}]
+    assert _report(client, headers, "category=Travel") == [{"month": "2026-01", "total_spent": 12.0, "currency": "USD"}]
+    _assert_rollup_matches_rebuild(db, user.id)
+
+
+def test_currency_change_moves_the_total(client, db, make_user, add_expenses):
+    user, headers = make_user()
+    expense_id, = add_expenses(user.id, [{"category": "Food", "amount": 10}])
+
+    client.put(f"/expenses/{expense_id}/", headers=headers, json={"amount": 500, "category": "Food", "currency": "JPY"})
+    assert _report(client, headers, "currency=JPY") == [{"month": "2026-01", "total_spent": 500.0, "currency": "JPY"}]
+    _assert_rollup_matches_rebuild(db, user.id)
+
+
+def test_recategorize_keeps_the_rollup_in_step(client, db, make_user, add_expenses):
+    user, headers = make_user()
+    ids = add_expenses(user.id, [
+        {"category": "Food", "amount": 1, "date": JANUARY},
+        {"category": "Food", "amount": 2, "date": FEBRUARY},
+        {"category": "Rent", "amount": 4, "date": FEBRUARY},
+    ])
+
+    response = client.post("/expenses/bulk/recategorize", headers=headers, json={"ids": ids[:2], "category": "Groceries"})
+    assert response.json()["data"]["updated"] == 2
+    assert _report(client, headers, "category=Food") == []
+    assert _report(client, headers, "category=groceries") == [
+        {"month": "2026-01", "total_spent": 1.0, "currency": "USD"}, {"month": "2026-02", "total_spent": 2.0, "currency": "USD"}]
+    assert _report(client, headers) == [{"month": "2026-01", "total_spent": 1.0, "currency": "USD"}, {"month": "2026-02", "total_spent": 6.0, "currency": "USD"}]
+    _assert_rollup_matches_rebuild(db, user.id)
+
+
+def test_updates_leave_other_users_alone(client, db, make_user, add_expenses):
+    user, headers = make_user()
+    other, _ = make_user("bob")
+    other_id, = add_expenses(other.id, [{"category": "Food", "amount": 5}])
+
+    response = client.post("/expenses/bulk/recategorize", headers=headers, json={"ids": [other_id], "category": "Rent"})
+    assert response.json()["data"]["updated"] == 0
+    assert client.put(f"/expenses/{other_id}/", headers=headers, json={"amount": 1, "category": "Food"}).status_code == 404
+    assert [row[3] for row in _rollup(db, other.id)] == [500]
+
+
+def test_update_of_a_missing_expense_adds_no_category(client, db, make_user, add_expenses):
+    user, headers = make_user()
+    other, _ = make_user("bob")
+    other_id, = add_expenses(other.id, [{"category": "Food", "amount": 5}])
+
+    for expense_id in (other_id, other_id + 1):
+        response = client.put(f"/expenses/{expense_id}/", headers=headers, json={"amount": 1, "category": "Brand New"})
+        assert response.status_code == 404
+    assert [name for name, in db.query(models.Category.name)] == ["Food"]
+
+
+def test_bulk_delete_by_filter(client, db, make_user, add_expenses):
+    user, headers = make_user()
+    ids = add_expenses(user.id, [
+        {"category": "Food", "amount": 1, "date": JANUARY},
+        {"category": "Food", "amount": 2, "date": FEBRUARY},
+        {"category": "Rent", "amount": 4, "date": FEBRUARY},
+    ])
+
+    response = client.post("/expenses/bulk/delete", headers=headers,
+                           json={"category": "food", "start_date": "2026-02-01T00:00:00"})
+    assert response.json()["data"]["deleted_ids"] == [ids[1]]
+    assert _report(client, headers) == [{"month": "2026-01", "total_spent": 1.0, "currency": "USD"}, {"month": "2026-02", "total_spent": 4.0, "currency": "USD"}]
+
+    response = client.post("/expenses/bulk/delete", headers=headers, json={"ids": [ids[0], ids[2]]})
+    assert sorted(response.json()["data"]["deleted_ids"]) == [ids[0], ids[2]]
+    assert _report(client, headers) == [] and _rollup(db, user.id) == []
+
+
+def test_bulk_delete_needs_criteria(client, make_user):
+    _, headers = make_user()
+    response = client.post("/expenses/bulk/delete", headers=headers, json={})
+    assert response.status_code == 400
+    assert response.json()["error"] == "Missing criteria"
@@ -0,0 +1,65 @@
+import csv
+import datetime
+import io
+import json
+from app.config import settings
+
+ROWS = [
+    {"category": "Food", "amount": 2.5, "description": "lunch, late", "date": datetime.datetime(2026, 1, 3)},
+    {"category": "Rent", "amount": 700, "currency": "EUR", "date": datetime.datetime(2026, 1, 1)},
+    {"category": "Food", "amount": 1000, "currency": "JPY", "date": datetime.datetime(2026, 1, 2)},
+]
+
+
+def _export(client, headers, query):
+    response = client.get(f"/expenses/export?{query}", headers=headers)
+    assert response.status_code == 200
+    return response
+
+
+def test_csv_export_in_date_order(client, make_user, add_expenses):
+    user, headers = make_user()
+    other, _ = make_user("bob")
+    add_expenses(user.id, ROWS)
+    add_expenses(other.id, ROWS[:1])
+
+    response = _export(client, headers, "format=csv")
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="expenses.csv"' in response.headers["content-disposition"]
+    header, *rows = csv.reader(io.StringIO(response.text))
+    assert header == ["id", "date", "category", "amount", "currency", "description"]
+    assert [(row[2], float(row[3]), row[4], row[5]) for row in rows] == [
+        ("Rent", 700.0, "EUR", ""), ("Food", 1000.0, "JPY", ""), ("Food", 2.5, "USD", "lunch, late")]
+
+
+def test_ndjson_export_with_category_filter(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, ROWS)
+
+    lines = _export(client, headers, "format=ndjson&category=FOOD").text.splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert [(row["amount"], row["currency"]) for row in rows] == [(1000, "JPY"), (2.5, "USD")]
+    assert rows[0]["date"].startswith("2026-01-02")
+
+
+def test_columnar_export_writes_one_object_per_batch(client, make_user, add_expenses, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    user, headers = make_user()
+    add_expenses(user.id, ROWS)
+
+    batches = [json.loads(line) for line in _export(client, headers, "format=columnar").text.splitlines()]
+    assert [len(batch["id"]) for batch in batches] == [2, 1]
+    assert sum((batch["category"] for batch in batches), []) == ["Rent", "Food", "Food"]
+
+
+def test_empty_export_has_only_the_header(client, make_user):
+    _, headers = make_user()
+    assert _export(client, headers, "format=csv").text.strip() == "id,date,category,amount,currency,description"
+    assert _export(client, headers, "format=ndjson").text == ""
+
+
+def test_unknown_format_is_400(client, make_user):
+    _, headers = make_user()
+    response = client.get("/expenses/export?format=xlsx", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["error"] == "Invalid export format"
@@ -0,0 +1,70 @@
+import datetime
+from app import crud
+
+
+def test_unchanged_list_is_304(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 1}])
+
+    first = client.get("/expenses/", headers=headers)
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    again = client.get("/expenses/", headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["ETag"] == etag and not again.content
+
+
+def test_writes_change_the_etag(client, db, make_user, add_expenses):
+    user, headers = make_user()
+    etag = client.get("/expenses/", headers=headers).headers["ETag"]
+
+    created = client.post("/expenses/", headers=headers, json={"amount": 2, "category": "Food"}).json()["data"]
+    response = client.get("/expenses/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+
+    etag = response.headers["ETag"]
+    client.put(f"/expenses/{created['id']}/", headers=headers, json={"amount": 3, "category": "Food"})
+    assert client.get("/expenses/", headers={**headers, "If-None-Match": etag}).status_code == 200
+
+    # The version lives in the database, so writes through another worker count too
+    etag = client.get("/expenses/", headers=headers).headers["ETag"]
+    crud._bump_expense_version(db, user.id)
+    db.commit()
+    assert client.get("/expenses/", headers={**headers, "If-None-Match": etag}).status_code == 200
+
+
+def test_invalid_list_requests_are_400_not_304(client, make_user):
+    _, headers = make_user()
+    etag = client.get("/expenses/", headers=headers).headers["ETag"]
+    conditional = {**headers, "If-None-Match": etag}
+    for query in ("page=0", "limit=0", "pagination=cursor&limit=0", "cursor=not-a-cursor"):
+        assert client.get(f"/expenses/?{query}", headers=conditional).status_code == 400, query
+
+
+def test_days_window_is_never_answered_with_304(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 1, "date": datetime.datetime.utcnow() - datetime.timedelta(days=6)}])
+    etag = client.get("/expenses/", headers=headers).headers["ETag"]
+
+    # Without a write the window can still lose rows as time passes, so it is always recomputed
+    response = client.get("/expenses/?days=7", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+    assert response.json()["data"]["totalcount"] == 1
+    assert client.get("/expenses/?days=5", headers=headers).json()["data"]["totalcount"] == 0
+
+
+def test_converted_lists_are_not_tagged(client, make_user):
+    _, headers = make_user()
+    etag = client.get("/expenses/", headers=headers).headers["ETag"]
+    response = client.get("/expenses/?currency=EUR", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200 and "ETag" not in response.headers
+
+
+def test_single_expense_and_monthly_report_revalidate(client, make_user, add_expenses):
+    user, headers = make_user()
+    expense_id, = add_expenses(user.id, [{"category": "Food", "amount": 1}])
+
+    for path in (f"/expenses/{expense_id}/", "/expenses/report/monthly"):
+        etag = client.get(path, headers=headers).headers["ETag"]
+        assert client.get(path, headers={**headers, "If-None-Match": etag}).status_code == 304
+        assert client.get(path, headers={**headers, "If-None-Match": 'W/"stale"'}).status_code == 200
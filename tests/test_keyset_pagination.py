@@ -0,0 +1,93 @@
+import datetime
+from app.utils.pagination import CURSOR_PREV, InvalidCursor, decode_cursor, encode_cursor
+import pytest
+
+
+def _seed(make_user, add_expenses, count=25):
+    user, headers = make_user()
+    start = datetime.datetime(2026, 3, 1)
+    # Pairs of rows share a timestamp, so the id has to break ties
+    add_expenses(user.id, [{"category": "Food", "amount": index + 1, "date": start + datetime.timedelta(hours=index // 2)}
+                           for index in range(count)])
+    return user, headers
+
+
+def _pages(client, headers, url):
+    # Follow next_cursor with the same query, as a client would
+    pages = [client.get(url, headers=headers).json()["data"]]
+    while pages[-1]["next_cursor"]:
+        pages.append(client.get(f"{url}&cursor={pages[-1]['next_cursor']}", headers=headers).json()["data"])
+    return pages
+
+
+def test_cursor_round_trip():
+    date = datetime.datetime(2026, 3, 1, 12, 30, 5, 123456)
+    assert decode_cursor(encode_cursor(date, 42, CURSOR_PREV)) == (date, 42, CURSOR_PREV)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime.datetime(2026, 1, 1), 1, "sideways")])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_cursor_pages_are_per_user_and_break_ties_by_id(client, make_user, add_expenses):
+    _seed(make_user, add_expenses)
+    headers = make_user("bob")[1]
+    assert client.get("/expenses/?pagination=cursor", headers=headers).json()["data"]["expenses"] == []
+
+    user, headers = make_user("carol")
+    ids = add_expenses(user.id, [{"category": "Rent", "amount": 1, "date": datetime.datetime(2026, 3, 1)}] * 3)
+    pages = _pages(client, headers, "/expenses/?pagination=cursor&limit=2")
+    assert [[row["id"] for row in page["expenses"]] for page in pages] == [sorted(ids, reverse=True)[:2], [min(ids)]]
+    assert pages[-1]["next_cursor"] is None
+
+
+def test_cursor_pages_match_full_ordering(client, make_user, add_expenses):
+    _, headers = _seed(make_user, add_expenses)
+    everything = client.get("/expenses/?limit=100", headers=headers).json()["data"]["expenses"]
+    expected = [row["id"] for row in sorted(everything, key=lambda row: (row["date"], row["id"]), reverse=True)]
+
+    pages = _pages(client, headers, "/expenses/?pagination=cursor&limit=7")
+    assert [len(page["expenses"]) for page in pages] == [7, 7, 7, 4]
+    assert [row["id"] for page in pages for row in page["expenses"]] == expected
+    assert pages[0]["prev_cursor"] is None and pages[1]["prev_cursor"] is not None
+
+
+def test_prev_cursor_returns_the_previous_page(client, make_user, add_expenses):
+    _, headers = _seed(make_user, add_expenses)
+    first = client.get("/expenses/?pagination=cursor&limit=5", headers=headers).json()["data"]
+    second = client.get(f"/expenses/?limit=5&cursor={first['next_cursor']}", headers=headers).json()["data"]
+    back = client.get(f"/expenses/?limit=5&cursor={second['prev_cursor']}", headers=headers).json()["data"]
+
+    assert back["expenses"] == first["expenses"]
+    assert back["prev_cursor"] is None
+    assert back["next_cursor"] is not None
+
+
+def test_cursor_pages_apply_filters_and_fields(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food" if index % 2 else "Rent", "amount": 5,
+                            "date": datetime.datetime(2026, 3, 1) + datetime.timedelta(days=index)} for index in range(10)])
+    pages = _pages(client, headers, "/expenses/?pagination=cursor&limit=2&category=food&fields=amount")
+
+    rows = [row for page in pages for row in page["expenses"]]
+    assert len(rows) == 5
+    # The cursor needs (date, id) from the query, but only asked-for fields are returned
+    assert all(set(row) == {"amount"} for row in rows)
+
+
+def test_invalid_cursor_and_limit_are_400(client, make_user):
+    _, headers = make_user()
+    response = client.get("/expenses/?cursor=garbage", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["error"] == "Invalid cursor"
+    assert client.get("/expenses/?pagination=cursor&limit=0", headers=headers).status_code == 400
+    assert client.get("/expenses/?pagination=pages", headers=headers).status_code == 400
+
+
+def test_offset_pagination_still_works(client, make_user, add_expenses):
+    _, headers = _seed(make_user, add_expenses)
+    body = client.get("/expenses/?page=3&limit=10", headers=headers).json()["data"]
+    assert body["page"] == 3
+    assert len(body["expenses"]) == 5
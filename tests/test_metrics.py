@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+from app.config import settings
+from app.utils import metrics
+from app.utils.profiler import SlowRequestProfiler
+
+TOKEN = "metrics-secret"
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", TOKEN)
+    return {"Authorization": f"Bearer {TOKEN}"}
+
+
+def test_metrics_are_hidden_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    for path in ("/metrics", "/metrics/pool", "/metrics/auth-cache"):
+        assert client.get(path, headers={"Authorization": "Bearer anything"}).status_code == 404
+
+
+def test_metrics_need_the_token(client, metrics_token):
+    for path in ("/metrics", "/metrics/pool", "/metrics/auth-cache"):
+        assert client.get(path).status_code == 401
+        assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+        assert client.get(path, headers=metrics_token).status_code == 200
+
+
+def test_requests_are_timed_by_route_template(client, make_user, add_expenses, metrics_token):
+    user, headers = make_user()
+    expense_id, = add_expenses(user.id, [{"category": "Food", "amount": 1}])
+    client.get(f"/expenses/{expense_id}/", headers=headers)
+
+    body = client.get("/metrics", headers=metrics_token).text
+    assert 'http_request_duration_seconds_count{method="GET",route="/expenses/{expense_id}/",status="200"}' in body
+    assert 'http_request_sql_statements_bucket{method="GET",route="/expenses/{expense_id}/"' in body
+    assert "db_pool_checkouts" in body
+
+
+class RecordingProfiler:
+    threshold = 0
+
+    def __init__(self):
+        self.calls = []
+
+    def dump(self, start, end, method, route):
+        self.calls.append((threading.current_thread() is threading.main_thread(), method, route))
+
+
+def test_slow_request_profiles_are_written_off_the_event_loop():
+    profiler = RecordingProfiler()
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def main():
+        transport = httpx.ASGITransport(app=metrics.MetricsMiddleware(endpoint, profiler=profiler))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/slow")
+
+    assert asyncio.run(main()).status_code == 204
+    # asyncio.run drives the loop from the main thread; the dump must not run there
+    assert profiler.calls == [(False, "GET", "unmatched")]
+
+
+def test_profiler_dumps_collapsed_stacks(tmp_path):
+    profiler = SlowRequestProfiler(threshold=0, interval=0.001, output_dir=str(tmp_path))
+    profiler.start()
+    start = time.time()
+    try:
+        deadline = time.monotonic() + 0.2
+        while time.monotonic() < deadline:
+            sum(range(1000))
+    finally:
+        profiler.stop()
+
+    path = profiler.dump(start, time.time(), "GET", "/expenses/{expense_id}/")
+    assert path is not None and path.endswith(".folded")
+    with open(path) as f:
+        line = f.readline()
+    stack, count = line.rsplit(" ", 1)
+    assert ";" in stack and int(count) >= 1
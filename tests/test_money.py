@@ -0,0 +1,95 @@
+from decimal import Decimal
+import pytest
+from app import models
+from app.utils import money
+
+
+@pytest.mark.parametrize("amount, currency, minor", [
+    (12.34, "USD", 1234), ("0.1", "usd", 10), (0.005, "USD", 1), (-0.005, "USD", -1),
+    (1999.5, "JPY", 2000), (1.2345, "KWD", 1235), (Decimal("7.00005"), "CLF", 70001),
+])
+def test_to_minor_rounds_half_away_from_zero(amount, currency, minor):
+    assert money.to_minor(amount, currency) == minor
+
+
+def test_to_major_is_exact():
+    assert money.to_major(1234, "USD") == Decimal("12.34")
+    assert money.to_major(1235, "KWD") == Decimal("1.235")
+    assert money.to_float(2000, "JPY") == 2000.0
+
+
+def test_conversions_round_to_the_target_minor_unit():
+    assert money.round_amount(10.005, "USD") == 10.01
+    assert money.round_amount(10.5, "JPY") == 11.0
+    assert money.convert(10, 0.1, "USD") == 1.0
+    assert money.convert(3, 151.37, "JPY") == 454.0
+
+
+def test_sums_stay_exact_through_the_api(client, make_user):
+    _, headers = make_user()
+    for amount in (0.1, 0.2, 0.7):
+        client.post("/expenses/", headers=headers, json={"amount": amount, "category": "Food"})
+    # Summed as integer cents: no 0.30000000000000004-style drift
+    assert [row["total_spent"] for row in client.get("/expenses/report/monthly", headers=headers).json()["data"]] == [1.0]
+    assert sorted(expense["amount"] for expense in client.get("/expenses/", headers=headers).json()["data"]["expenses"]) == [0.1, 0.2, 0.7]
+
+
+def test_amounts_follow_the_currency_exponent(client, db, make_user):
+    _, headers = make_user()
+    client.post("/expenses/", headers=headers, json={"amount": 1500, "category": "Food", "currency": "JPY"})
+    client.post("/expenses/", headers=headers, json={"amount": 1.234, "category": "Food", "currency": "KWD"})
+    stored = sorted((expense.currency, expense.amount_minor) for expense in db.query(models.Expense))
+    assert stored == [("JPY", 1500), ("KWD", 1234)]
+
+
+def test_non_finite_amounts_are_rejected(client, make_user):
+    _, headers = make_user()
+    response = client.post("/expenses/", headers=headers, content=b'{"amount": "NaN", "category": "Food"}')
+    assert response.status_code == 400
+
+
+def test_fits_minor_tracks_the_bigint_range():
+    assert money.fits_minor(Decimal(money.MAX_MINOR).scaleb(-2), "USD")
+    assert not money.fits_minor(Decimal(money.MAX_MINOR + 1).scaleb(-2), "USD")
+    assert not money.fits_minor(Decimal("1e400"), "JPY")
+    with pytest.raises(ValueError, match="too large"):
+        money.check_expense_amount(Decimal("-1e20"), "USD")
+    with pytest.raises(ValueError, match="greater than zero"):
+        money.check_expense_amount(Decimal("0.004"), "USD")
+
+
+def test_amounts_too_large_for_the_column_are_rejected(client, db, make_user):
+    _, headers = make_user()
+    response = client.post("/expenses/", headers=headers, json={"amount": 1e20, "category": "Food"})
+    assert response.status_code == 400 and "too large" in response.json()["message"]
+
+    expense_id = client.post("/expenses/", headers=headers, json={"amount": 5, "category": "Food"}).json()["data"]["id"]
+    response = client.put(f"/expenses/{expense_id}/", headers=headers, json={"amount": 1e20, "category": "Food"})
+    assert response.status_code == 400 and "too large" in response.json()["message"]
+
+    # One bad row is a row error, not a failed import
+    response = client.post("/expenses/bulk", headers=headers, json=[
+        {"amount": 1, "category": "Food"}, {"amount": 1e20, "category": "Food"}])
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert (data["inserted"], data["error_count"]) == (1, 1)
+    assert "too large" in data["errors"][0]["error"]
+    assert sorted(expense.amount_minor for expense in db.query(models.Expense)) == [100, 500]
+
+
+def test_amounts_below_one_minor_unit_are_rejected(client, db, make_user):
+    _, headers = make_user()
+    for amount, currency in ((0.004, "USD"), (0.4, "JPY"), (0.0004, "KWD")):
+        response = client.post("/expenses/", headers=headers, json={"amount": amount, "category": "Food", "currency": currency})
+        assert response.status_code == 400, currency
+
+    # Without a currency in the PUT the stored one decides the minor unit
+    expense_id = client.post("/expenses/", headers=headers,
+                             json={"amount": 500, "category": "Food", "currency": "JPY"}).json()["data"]["id"]
+    response = client.put(f"/expenses/{expense_id}/", headers=headers, json={"amount": 0.4, "category": "Food"})
+    assert response.status_code == 400 and response.json()["error"] == "Invalid amount"
+
+    response = client.post("/expenses/bulk", headers=headers, json=[{"amount": 0.001, "category": "Food"}])
+    assert response.json()["data"]["error_count"] == 1
+    db.expire_all()
+    assert [(expense.currency, expense.amount_minor) for expense in db.query(models.Expense)] == [("JPY", 500)]
@@ -0,0 +1,89 @@
+import datetime
+from app import models, rollups
+
+
+def _rollup(db, user_id):
+    Rollup = models.ExpenseMonthlyRollup
+    db.expire_all()
+    return sorted(
+        (row.month, row.category_id, row.currency, row.total_minor, row.expense_count)
+        for row in db.query(Rollup).filter(Rollup.user_id == user_id))
+
+
+def test_created_expenses_land_in_their_month(client, db, make_user):
+    user, headers = make_user()
+    for amount in (10.25, 4.75):
+        assert client.post("/expenses/", headers=headers, json={"amount": amount, "category": "Food"}).status_code == 200
+
+    # Expenses are dated when they are created
+    month = rollups.month_key(datetime.datetime.now())
+    report = client.get("/expenses/report/monthly", headers=headers).json()["data"]
+    assert report == [{"month": month, "total_spent": 15.0, "currency": "USD"}]
+    assert [(row[0], row[3], row[4]) for row in _rollup(db, user.id)] == [(month, 1500, 2)]
+
+
+def test_deleting_the_last_expense_drops_the_bucket(client, db, make_user):
+    user, headers = make_user()
+    created = client.post("/expenses/", headers=headers, json={"amount": 3, "category": "Food"}).json()["data"]
+    assert len(_rollup(db, user.id)) == 1
+
+    assert client.delete(f"/expenses/{created['id']}/", headers=headers).status_code == 200
+    assert _rollup(db, user.id) == []
+    assert client.get("/expenses/report/monthly", headers=headers).json()["data"] == []
+
+
+def test_category_filter_reads_the_rollup(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 2}, {"category": "Rent", "amount": 100}])
+    report = client.get("/expenses/report/monthly?category=food", headers=headers).json()["data"]
+    assert report == [{"month": "2026-01", "total_spent": 2.0, "currency": "USD"}]
+
+
+def test_mixed_currencies_stay_separate(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [
+        {"category": "Food", "amount": 10, "currency": "USD"},
+        {"category": "Food", "amount": 2.5, "currency": "USD"},
+        {"category": "Food", "amount": 500, "currency": "JPY"},
+        {"category": "Rent", "amount": 7.25, "currency": "EUR"},
+        {"category": "Rent", "amount": 3, "currency": "EUR", "date": datetime.datetime(2026, 2, 1)},
+    ])
+    report = client.get("/expenses/report/monthly", headers=headers).json()["data"]
+    assert report == [
+        {"month": "2026-01", "total_spent": 7.25, "currency": "EUR"},
+        {"month": "2026-01", "total_spent": 500.0, "currency": "JPY"},
+        {"month": "2026-01", "total_spent": 12.5, "currency": "USD"},
+        {"month": "2026-02", "total_spent": 3.0, "currency": "EUR"},
+    ]
+
+
+def test_apply_changes_folds_rows_per_bucket(db, make_user, add_expenses):
+    user, _ = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 5}])
+    (month, category_id, currency, _, _), = _rollup(db, user.id)
+    january, february = datetime.datetime(2026, 1, 2), datetime.datetime(2026, 2, 2)
+
+    # A move from January to February: one removal, one addition
+    rollups.apply_changes(db, user.id, removed=[(january, category_id, currency, 500)],
+                          added=[(february, category_id, currency, 500), (february, category_id, currency, 100)])
+    db.commit()
+    assert _rollup(db, user.id) == [("2026-02", category_id, currency, 600, 2)]
+
+
+def test_rebuild_matches_incremental_maintenance(client, db, make_user, add_expenses):
+    user, headers = make_user()
+    other, _ = make_user("bob")
+    add_expenses(user.id, [
+        {"category": "Food", "amount": 1.5},
+        {"category": "Food", "amount": 2.5, "currency": "EUR"},
+        {"category": "Rent", "amount": 700, "date": datetime.datetime(2025, 12, 31)},
+    ])
+    add_expenses(other.id, [{"category": "Food", "amount": 9}])
+    created = client.post("/expenses/", headers=headers, json={"amount": 4, "category": "Travel"}).json()["data"]
+    client.delete(f"/expenses/{created['id']}/", headers=headers)
+
+    incremental = _rollup(db, user.id), _rollup(db, other.id)
+    rollups.rebuild(db, user_id=user.id)
+    assert (_rollup(db, user.id), _rollup(db, other.id)) == incremental
+    rollups.rebuild(db)
+    assert (_rollup(db, user.id), _rollup(db, other.id)) == incremental
@@ -0,0 +1,172 @@
+import datetime
+import re
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import text
+from app import models, partitions
+
+CURRENT = partitions.month_start(datetime.datetime.utcnow())
+
+
+def _month(offset: int) -> datetime.datetime:
+    return partitions.add_months(CURRENT, offset)
+
+
+class _Rows:
+    def __init__(self, values):
+        self.values = list(values)
+
+    def scalar(self):
+        return self.values[0]
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.values
+
+    def __iter__(self):
+        return iter(self.values)
+
+
+class FakeCatalog:
+    """A session on the SQLite stand-in that answers the Postgres catalog queries and
+    partition DDL app.partitions issues. Partitions are plain tables; which of them are
+    attached to `expenses` is tracked here. Everything else runs for real."""
+
+    def __init__(self, db):
+        self.db = db
+        self.attached = {partitions.DEFAULT_PARTITION}
+        self.statements = []
+        self._create_table(partitions.DEFAULT_PARTITION)
+
+    def _create_table(self, name):
+        self.db.execute(text(f"CREATE TABLE IF NOT EXISTS {name} AS SELECT * FROM expenses WHERE 0"))
+
+    def add_rows(self, table, user_id, category_id, months):
+        for month in months:
+            self.db.execute(text(f"INSERT INTO {table} ({partitions.COLUMNS}) "
+                                 "VALUES (NULL, :category_id, 100, 'USD', NULL, :date, :user_id)"),
+                            {"category_id": category_id, "date": month.replace(day=15), "user_id": user_id})
+
+    def attach(self, month):
+        name = partitions.partition_name(month)
+        self._create_table(name)
+        self.attached.add(name)
+        return name
+
+    def months_in(self, table):
+        return sorted({row[:7] for row in self.db.execute(text(f"SELECT date FROM {table}")).scalars()})
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+    def commit(self):
+        self.db.commit()
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "pg_partitioned_table" in sql:
+            return _Rows([True])
+        if "pg_inherits" in sql:
+            return _Rows(sorted(self.attached))
+        if sql.startswith(("SELECT pg_advisory_xact_lock", "SET LOCAL")):
+            return None
+        if "date_trunc" in sql:
+            return _Rows(datetime.datetime.fromisoformat(value[:19]) for value in self.db.execute(statement).scalars())
+        created = re.match(r"CREATE TABLE (?:IF NOT EXISTS )?(\w+) PARTITION OF", sql)
+        if created:
+            self._create_table(created.group(1))
+            self.attached.add(created.group(1))
+            return None
+        detached = re.match(r"ALTER TABLE expenses DETACH PARTITION (\w+)", sql)
+        if detached:
+            self.attached.discard(detached.group(1))
+            return None
+        attached = re.match(r"ALTER TABLE expenses ATTACH PARTITION (\w+)", sql)
+        if attached:
+            self.attached.add(attached.group(1))
+            return None
+        return self.db.execute(statement, params)
+
+
+@pytest.fixture
+def catalog(db):
+    fake = FakeCatalog(db)
+    yield fake
+    db.rollback()
+    tables = db.execute(text("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'expenses\\_%' ESCAPE '\\'"))
+    for name in tables.scalars().all():
+        if name == partitions.DEFAULT_PARTITION or name.startswith(partitions.PREFIX):
+            db.execute(text(f"DROP TABLE {name}"))
+    db.commit()
+
+
+def test_month_arithmetic():
+    assert partitions.month_start(datetime.datetime(2026, 3, 31, 23, 59)) == datetime.datetime(2026, 3, 1)
+    assert partitions.add_months(datetime.datetime(2026, 11, 1), 3) == datetime.datetime(2027, 2, 1)
+    assert partitions.add_months(datetime.datetime(2026, 1, 1), -1) == datetime.datetime(2025, 12, 1)
+    assert partitions.add_months(datetime.datetime(2026, 1, 1), -24) == datetime.datetime(2024, 1, 1)
+
+
+def test_partition_names_sort_by_month():
+    months = [datetime.datetime(2025, 12, 1), datetime.datetime(2026, 1, 1), datetime.datetime(2026, 10, 1)]
+    names = [partitions.partition_name(month) for month in months]
+    assert names == ["expenses_p202512", "expenses_p202601", "expenses_p202610"]
+    assert sorted(names) == names
+
+
+def test_maintenance_is_a_no_op_without_partitioning(db):
+    assert not partitions.is_partitioned(db)
+    assert partitions.maintain(db, months_ahead=3, retain_months=12, drop=True) is None
+
+
+def test_rows_in_the_default_partition_are_carved_out_within_the_window(catalog, make_user):
+    user, _ = make_user()
+    backdated, ancient, far_future = _month(-2), _month(-partitions.MONTHS_BACK - 1), _month(12)
+    catalog.add_rows(partitions.DEFAULT_PARTITION, user.id, 1, [backdated, backdated, ancient, far_future])
+
+    created = partitions.ensure_partitions(catalog, months_ahead=1)
+    assert created == [partitions.partition_name(month) for month in (backdated, CURRENT, _month(1))]
+    assert catalog.months_in(partitions.partition_name(backdated)) == [f"{backdated:%Y-%m}"]
+    assert catalog.months_in(partitions.DEFAULT_PARTITION) == [f"{ancient:%Y-%m}", f"{far_future:%Y-%m}"]
+    # Only the month that had rows in the default partition needed it detached
+    assert sum("DETACH PARTITION" in sql for sql in catalog.statements) == 1
+    assert partitions.DEFAULT_PARTITION in catalog.attached
+
+
+def test_not_before_leaves_older_months_in_the_default_partition(catalog, make_user):
+    user, _ = make_user()
+    catalog.add_rows(partitions.DEFAULT_PARTITION, user.id, 1, [_month(-3)])
+    catalog.attach(CURRENT)
+
+    assert partitions.ensure_partitions(catalog, months_ahead=0, not_before=_month(-1)) == []
+    assert catalog.months_in(partitions.DEFAULT_PARTITION) == [f"{_month(-3):%Y-%m}"]
+
+
+def test_retention_detaches_old_partitions_and_only_their_rollups(catalog, db, make_user):
+    user, _ = make_user()
+    other, _ = make_user("bob")
+    for month in (_month(-14), _month(-13), _month(-1), CURRENT):
+        catalog.attach(month)
+    # A month older than the cutoff whose rows never got a partition
+    catalog.add_rows(partitions.DEFAULT_PARTITION, user.id, 1, [_month(-20)])
+    db.add_all([
+        models.ExpenseMonthlyRollup(user_id=user.id, month=f"{month:%Y-%m}", category_id=1, currency="USD",
+                                    total_minor=100, expense_count=1)
+        for month in (_month(-20), _month(-14), _month(-1))
+    ] + [models.ExpenseMonthlyRollup(user_id=other.id, month=f"{_month(-1):%Y-%m}", category_id=1,
+                                     currency="USD", total_minor=100, expense_count=1)])
+    db.commit()
+
+    result = partitions.maintain(catalog, months_ahead=0, retain_months=12, drop=True)
+    assert result == {"created": [], "detached": [partitions.partition_name(_month(-14)), partitions.partition_name(_month(-13))]}
+    assert catalog.months_in(partitions.DEFAULT_PARTITION) == [f"{_month(-20):%Y-%m}"]
+
+    db.expire_all()
+    remaining = sorted((row.user_id, row.month) for row in db.query(models.ExpenseMonthlyRollup))
+    assert remaining == sorted([(user.id, f"{_month(-20):%Y-%m}"), (user.id, f"{_month(-1):%Y-%m}"),
+                                (other.id, f"{_month(-1):%Y-%m}")])
+    # Only owners of dropped buckets see their expense version change
+    assert (db.get(models.User, user.id).expense_version, db.get(models.User, other.id).expense_version) == (1, 0)
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from passlib.context import CryptContext
+from app import auth, crud
+from app.utils import hashing
+from app.utils.hashing import PasswordHasher, PasswordHasherBusy
+
+PASSWORD = "Secret#123"
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    hasher = PasswordHasher(workers=1, queue_size=0)
+    monkeypatch.setattr(auth, "password_hasher", hasher)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_register_and_login_hash_in_the_pool(client, hasher):
+    response = client.post("/users/register/", json={"username": "alice", "password": PASSWORD})
+    assert response.status_code == 201
+
+    login = client.post("/users/token/", json={"username": "alice", "password": PASSWORD})
+    assert login.status_code == 200
+    assert login.json()["data"]["access_token"]
+    assert client.post("/users/token/", json={"username": "alice", "password": "Wrong#123"}).status_code == 400
+
+
+def test_full_pool_answers_503_without_queueing(client, db, hasher):
+    crud.create_user(db, "alice", hashing.pwd_context.hash(PASSWORD))
+    # Take the only admission slot, as an in-flight login would
+    assert hasher._slots.acquire(blocking=False)
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            asyncio.run(hasher.hash(PASSWORD))
+        response = client.post("/users/token/", json={"username": "alice", "password": PASSWORD})
+    finally:
+        hasher._slots.release()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_other_schemes_are_rehashed_on_login(monkeypatch):
+    bcrypt_hash = CryptContext(schemes=["bcrypt"]).hash(PASSWORD)
+    monkeypatch.setattr(hashing, "pwd_context", CryptContext(schemes=["argon2", "bcrypt"], default="argon2", deprecated="auto"))
+
+    verified, new_hash = hashing._verify_and_update(PASSWORD, bcrypt_hash)
+    assert verified and new_hash.startswith("$argon2")
+    # Already in the configured scheme: nothing to upgrade
+    assert hashing._verify_and_update(PASSWORD, new_hash) == (True, None)
+    assert hashing._verify_and_update("Wrong#123", bcrypt_hash) == (False, None)
+
+
+def test_login_stores_the_upgraded_hash(db, monkeypatch):
+    user = crud.create_user(db, "alice", "old-hash")
+
+    class UpgradingHasher:
+        async def verify_and_update(self, password, hashed_password):
+            return hashed_password == "old-hash", "new-hash"
+
+    monkeypatch.setattr(auth, "password_hasher", UpgradingHasher())
+    assert asyncio.run(auth.authenticate_user(db, "alice", PASSWORD)).id == user.id
+    db.expire_all()
+    assert crud.get_user_by_username(db, "alice").hashed_password == "new-hash"
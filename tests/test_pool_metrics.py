@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import NullPool
+from app import database
+from app.config import settings
+from app.utils.pool_metrics import PoolMetrics, TimedQueuePool, instrument_engine, pool_metrics
+
+
+@pytest.fixture
+def metrics():
+    # Checkout timing always lands in the process-wide counters
+    pool_metrics.reset()
+    yield pool_metrics
+    pool_metrics.reset()
+
+
+def test_pool_options_follow_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 3)
+    options = database._pool_options(TimedQueuePool)
+    assert options["poolclass"] is TimedQueuePool
+    assert (options["pool_size"], options["max_overflow"]) == (7, 3)
+
+    monkeypatch.setattr(settings, "DB_EXTERNAL_POOLER", True)
+    # Behind PgBouncer there is no app-side pool to size
+    assert database._pool_options(TimedQueuePool) == {"poolclass": NullPool, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+
+def test_checkouts_in_use_and_timeouts_are_counted(tmp_path, metrics):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.sqlite3'}", poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    instrument_engine(engine, metrics)
+
+    with engine.connect() as held:
+        held.execute(text("SELECT 1"))
+        assert metrics.snapshot(engine.pool)["in_use"] == 1
+        # The only connection is taken, so the next checkout waits out pool_timeout
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    snapshot = metrics.snapshot(engine.pool)
+    assert snapshot["checkouts"] == 1
+    assert snapshot["checkout_timeouts"] == 1
+    assert snapshot["in_use"] == 0
+    assert snapshot["connections_opened"] == 1
+    assert (snapshot["pool_size"], snapshot["idle"], snapshot["overflow"]) == (1, 1, 0)
+    engine.dispose()
+
+
+def test_snapshot_without_pool_has_only_counters():
+    snapshot = PoolMetrics().snapshot()
+    assert snapshot["checkout_wait_seconds_avg"] == 0.0
+    assert "pool_size" not in snapshot
@@ -0,0 +1,74 @@
+import asyncio
+import datetime
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from app import auth
+from app.config import settings
+from app.utils.principal_cache import InMemoryPrincipalBackend, Principal
+
+
+def _request(claims: dict):
+    token = auth.create_access_token(claims, datetime.timedelta(minutes=5))
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+def _current_user(claims: dict, db=None):
+    return asyncio.run(auth.get_current_user(_request(claims), db=db))
+
+
+def test_user_id_claim_needs_no_database():
+    before = auth.principal_cache.snapshot()["claim_hits"]
+    # db=None: any users lookup would fail
+    principal = _current_user({"sub": "alice", "uid": 7})
+    assert (principal.id, principal.username) == (7, "alice")
+    assert auth.principal_cache.snapshot()["claim_hits"] == before + 1
+
+
+def test_subject_only_tokens_are_looked_up_once(db, make_user):
+    user, _ = make_user()
+    before = auth.principal_cache.snapshot()
+    assert _current_user({"sub": "alice"}, db).id == user.id
+    assert _current_user({"sub": "alice"}, db=None).id == user.id
+
+    after = auth.principal_cache.snapshot()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+
+def test_claim_is_ignored_when_not_trusted(db, make_user, monkeypatch):
+    user, _ = make_user()
+    monkeypatch.setattr(settings, "AUTH_TRUST_USER_ID_CLAIM", False)
+    assert _current_user({"sub": "alice", "uid": user.id + 100}, db).id == user.id
+
+
+def test_user_changes_invalidate_the_cached_principal(db, make_user):
+    user, _ = make_user()
+    _current_user({"sub": "alice"}, db)
+    assert auth.principal_cache.local.get("alice") is not None
+
+    user.username = "alicia"
+    db.commit()
+    # Both the old and the new name are dropped
+    assert auth.principal_cache.local.get("alice") is None
+    with pytest.raises(HTTPException) as error:
+        _current_user({"sub": "alice"}, db)
+    assert error.value.status_code == 401
+
+
+def test_in_memory_backend_expires_and_evicts():
+    backend = InMemoryPrincipalBackend(maxsize=2, ttl=60)
+    for user_id, name in enumerate(("a", "b", "c")):
+        backend.set(Principal(user_id, name))
+    # Least recently used goes first
+    assert backend.get("a") is None and backend.get("c").id == 2
+
+    expired = InMemoryPrincipalBackend(ttl=0)
+    expired.set(Principal(1, "a"))
+    assert expired.get("a") is None
+
+
+def test_unknown_user_is_401(db):
+    with pytest.raises(HTTPException) as error:
+        _current_user({"sub": "nobody"}, db)
+    assert error.value.status_code == 401
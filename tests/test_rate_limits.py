@@ -0,0 +1,99 @@
+import asyncio
+import time
+import pytest
+from starlette.requests import Request
+from app.config import settings
+from app.rate_limits import limiter, offset_page_cost
+from app.utils.rate_limit import InMemoryRateLimitBackend, Limit, RateLimited, RateLimiter
+
+LOGIN = {"username": "nobody", "password": "wrong-password"}
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+
+
+def _request(query: str):
+    return Request({"type": "http", "headers": [], "query_string": query.encode()})
+
+
+def test_parse_limits():
+    limit = Limit.parse("10/minute")
+    assert (limit.count, limit.period) == (10, 60)
+    assert Limit.parse("") is None
+    for spec in ("10/fortnight", "0/second", "ten/minute"):
+        with pytest.raises(ValueError):
+            Limit.parse(spec)
+
+
+def test_login_is_limited_per_ip_with_retry_after(client, enabled):
+    count = Limit.parse(settings.RATE_LIMIT_AUTH).count
+    assert {client.post("/users/token/", json=LOGIN).status_code for _ in range(count)} == {400}
+
+    response = client.post("/users/token/", json=LOGIN)
+    assert response.status_code == 429
+    assert response.json()["error"] == "Too many requests"
+    assert int(response.headers["Retry-After"]) >= 1
+    # Registration shares the same per-IP budget
+    assert client.post("/users/register/", json=LOGIN).status_code == 429
+    assert limiter.snapshot()["limited"] >= 2
+
+
+def test_no_limit_when_disabled(client):
+    count = Limit.parse(settings.RATE_LIMIT_AUTH).count
+    assert {client.post("/users/token/", json=LOGIN).status_code for _ in range(count + 2)} == {400}
+
+
+def test_offset_page_cost(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_DEEP_PAGE_ROWS", 100)
+    assert offset_page_cost(_request("")) == 1
+    assert offset_page_cost(_request("page=3&limit=100")) == 3
+    assert offset_page_cost(_request("page=50&limit=100&pagination=cursor")) == 1
+    assert offset_page_cost(_request("page=abc")) == 1
+
+
+def test_deep_pages_spend_the_user_budget_faster(client, make_user, enabled, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_DEEP_PAGE_ROWS", 1)
+    _, headers = make_user()
+    _, other_headers = make_user("bob")
+    budget = Limit.parse(settings.RATE_LIMIT_EXPENSE_LIST).count
+    deep = f"/expenses/?page=2&limit={budget // 3}"
+
+    assert [client.get(deep, headers=headers).status_code for _ in range(3)] == [200, 200, 429]
+    # Shallow pages still fit in what is left, and other users are unaffected
+    assert client.get("/expenses/", headers=headers).status_code == 200
+    assert client.get(deep, headers=other_headers).status_code == 200
+
+
+class FailingBackend:
+    def hit(self, key, limit, cost=1):
+        raise ConnectionError("store unavailable")
+
+
+def test_shared_store_failure_falls_back_to_local_buckets():
+    rate_limiter = RateLimiter(InMemoryRateLimitBackend(), shared=FailingBackend())
+    limit = Limit(2, 60)
+
+    async def hits():
+        await rate_limiter.check("k", limit)
+        await rate_limiter.check("k", limit)
+        with pytest.raises(RateLimited) as exc:
+            await rate_limiter.check("k", limit)
+        return exc.value
+
+    limited = asyncio.run(hits())
+    assert limited.retry_after_header == "30"
+    assert rate_limiter.snapshot() == {"allowed": 2, "limited": 1, "shared_errors": 3}
+
+
+def test_buckets_refill_over_time(monkeypatch):
+    backend = InMemoryRateLimitBackend()
+    # Exactly representable, so the 10s step refills exactly one token
+    now = 1000.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    limit = Limit(1, 10)
+    assert backend.hit("k", limit) is None
+    assert backend.hit("k", limit) == pytest.approx(10)
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+    assert backend.hit("k", limit) is None
@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from app.utils.currency import RateTable, rate_service
+
+RATES = {"USD": 1.0, "EUR": 0.8, "INR": 80.0}
+
+
+def test_direct_inverse_and_cross_rates():
+    table = RateTable("USD", RATES, fetched_at=0)
+    assert table.rate("USD", "INR") == 80.0
+    assert table.rate("INR", "USD") == pytest.approx(1 / 80.0)
+    # Neither side is the base: derived from the same snapshot
+    assert table.rate("EUR", "INR") == pytest.approx(100.0)
+    assert table.rate("EUR", "EUR") == 1.0
+
+
+def test_unknown_codes_have_no_rate():
+    table = RateTable("USD", RATES, fetched_at=0)
+    assert table.rate("USD", "XYZ") is None
+    assert table.rate("XYZ", "USD") is None
+    # Codes are matched as given; callers upper-case them
+    assert table.rate("usd", "INR") is None
+
+
+def test_convert_many_matches_rate():
+    table = RateTable("USD", RATES, fetched_at=0)
+    converted = table.convert_many([10, 2, 5], ["USD", "EUR", "USD"], ["INR", "INR", "XYZ"])
+    assert converted[:2] == [pytest.approx(800.0), pytest.approx(200.0)]
+    assert converted[2] is None
+
+
+def test_every_pair_comes_from_one_upstream_call(env):
+    before = rate_service.upstream_calls
+
+    async def pairs():
+        return [await rate_service.get_rate(a, b) for a, b in (("usd", "inr"), ("INR", "EUR"), ("EUR", "JPY"))]
+
+    usd_inr, inr_eur, eur_jpy = asyncio.run(pairs())
+    assert usd_inr == pytest.approx(83.1)
+    assert inr_eur == pytest.approx(0.92 / 83.1)
+    assert eur_jpy == pytest.approx(151.4 / 0.92)
+    assert rate_service.upstream_calls == before + 1
+
+
+def test_convert_currency_endpoint(client):
+    response = client.get("/currency/convert-currency/?amount=10&from_currency=eur&to_currency=USD")
+    assert response.status_code == 200
+    assert response.json()["converted_amount"] == pytest.approx(10.87)
+
+    invalid = client.get("/currency/convert-currency/?amount=10&from_currency=USD&to_currency=XYZ")
+    assert invalid.status_code == 400
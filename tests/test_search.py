@@ -0,0 +1,68 @@
+from app import crud
+from app.routers.expenses import category_cache
+
+
+def _search(client, headers, q):
+    expenses = client.get(f"/expenses/?q={q}", headers=headers).json()["data"]["expenses"]
+    return sorted(expense["description"] or expense["category"] for expense in expenses)
+
+
+def test_search_matches_descriptions_and_categories(client, make_user, add_expenses):
+    user, headers = make_user()
+    other, _ = make_user("bob")
+    add_expenses(user.id, [
+        {"category": "Coffee", "amount": 3, "description": "flat white"},
+        {"category": "Groceries", "amount": 40, "description": "weekly shop"},
+        {"category": "Rent", "amount": 900, "description": "march"},
+    ])
+    add_expenses(other.id, [{"category": "Coffee", "amount": 3, "description": "espresso"}])
+
+    assert _search(client, headers, "shop") == ["weekly shop"]
+    # Partly typed words and category names both match
+    assert _search(client, headers, "cof") == ["flat white"]
+    assert _search(client, headers, "GROC") == ["weekly shop"]
+    assert _search(client, headers, "100%25") == []
+
+
+def test_search_combines_with_filters_and_keyset(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": amount, "description": f"lunch {amount}"} for amount in (1, 2, 3)]
+                 + [{"category": "Travel", "amount": 9, "description": "lunch on the train"}])
+
+    total = client.get("/expenses/?q=lunch&category=food", headers=headers).json()["data"]["totalcount"]
+    assert total == 3
+    page = client.get("/expenses/?q=lunch&pagination=cursor&limit=3", headers=headers).json()["data"]
+    rest = client.get(f"/expenses/?q=lunch&pagination=cursor&limit=3&cursor={page['next_cursor']}", headers=headers)
+    assert len(page["expenses"]) + len(rest.json()["data"]["expenses"]) == 4
+
+
+def test_autocomplete_puts_prefix_matches_first(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": name, "amount": 1} for name in ("Car Wash", "Cards", "Scarves", "Rent")])
+
+    response = client.get("/expenses/categories?prefix=car", headers=headers).json()
+    assert response["data"] == ["Car Wash", "Cards", "Scarves"]
+    assert client.get("/expenses/categories?prefix=car&limit=1", headers=headers).json()["data"] == ["Car Wash"]
+    assert client.get("/expenses/categories", headers=headers).json()["data"] == ["Car Wash", "Cards", "Rent", "Scarves"]
+
+
+def test_autocomplete_cache_follows_the_expense_version(client, db, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 1}])
+    assert client.get("/expenses/categories", headers=headers).json()["data"] == ["Food"]
+    hits = category_cache.hits
+    client.get("/expenses/categories?prefix=f", headers=headers)
+    assert category_cache.hits == hits + 1
+
+    # Another worker adds a category: the stored version moves, so this worker's list is not reused
+    add_expenses(user.id, [{"category": "Fuel", "amount": 1}])
+    crud._bump_expense_version(db, user.id)
+    db.commit()
+    assert client.get("/expenses/categories?prefix=f", headers=headers).json()["data"] == ["Food", "Fuel"]
+
+
+def test_autocomplete_limit_must_be_positive(client, make_user):
+    _, headers = make_user()
+    response = client.get("/expenses/categories?limit=0", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["error"] == "Invalid limit"
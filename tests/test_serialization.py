@@ -0,0 +1,49 @@
+import datetime
+import json
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app import crud, schemas
+from app.utils.responses import FastJSONResponse
+from benchmarks import micro
+
+
+def _expenses(db, make_user, add_expenses):
+    user, _ = make_user()
+    add_expenses(user.id, [
+        {"category": "Food", "amount": 12.3, "description": "lunch", "date": datetime.datetime(2026, 1, 2, 12, 30)},
+        {"category": "Rent", "amount": 500, "currency": "JPY"},
+    ])
+    return user, crud.get_expenses(db, user.id, limit=10)
+
+
+def test_adapter_dump_matches_jsonable_encoder(db, make_user, add_expenses):
+    user, expenses = _expenses(db, make_user, add_expenses)
+    encoded = jsonable_encoder([{
+        "id": expense.id, "category": expense.category, "amount": expense.amount, "currency": expense.currency,
+        "description": expense.description, "date": expense.date, "user_id": expense.user_id,
+    } for expense in expenses])
+
+    assert schemas.dump_expenses(expenses) == encoded
+    assert schemas.dump_expense(expenses[0]) == encoded[0]
+    assert encoded[0]["date"] == "2026-01-02T12:30:00" and encoded[1]["amount"] == 500.0
+
+
+def test_fast_response_renders_the_same_json(db, make_user, add_expenses):
+    _, expenses = _expenses(db, make_user, add_expenses)
+    content = {"data": schemas.dump_expenses(expenses), "success": True}
+    assert json.loads(FastJSONResponse(content).body) == json.loads(JSONResponse(content).body)
+
+
+def test_sparse_fields_keep_only_what_was_asked(db, make_user, add_expenses):
+    user, _ = _expenses(db, make_user, add_expenses)
+    rows = crud.get_expenses(db, user.id, limit=10, fields=("id", "amount"))
+    assert [set(row) for row in schemas.dump_expense_fields(rows, ("id", "amount"))] == [{"id", "amount"}] * 2
+
+
+def test_serialization_benchmarks_render_1000_rows(env, db, make_user, add_expenses):
+    user, _ = _expenses(db, make_user, add_expenses)
+    benchmarks = micro.serialization_benchmarks(env, user.id)
+    assert "serialize_1000_jsonable_encoder" in benchmarks
+    assert any(name.startswith("serialize_1000_adapter_") for name in benchmarks)
+    for render in benchmarks.values():
+        render()
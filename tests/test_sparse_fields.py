@@ -0,0 +1,55 @@
+from sqlalchemy import event
+
+
+def _list(client, headers, query):
+    response = client.get(f"/expenses/?{query}", headers=headers)
+    assert response.status_code == 200, response.json()
+    return response.json()["data"]
+
+
+def test_fields_limit_each_expense(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 12.5, "description": "lunch"},
+                           {"category": "Rent", "amount": 300, "currency": "JPY"}])
+
+    data = _list(client, headers, "fields=amount,category,id")
+    # In the order they were asked for
+    assert [list(row) for row in data["expenses"]] == [["amount", "category", "id"]] * 2
+    assert sorted((row["category"], row["amount"]) for row in data["expenses"]) == [("Food", 12.5), ("Rent", 300.0)]
+    assert data["totalcount"] == 2
+
+
+def test_fields_on_keyset_pages(client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": amount} for amount in (1, 2, 3)])
+
+    first = _list(client, headers, "pagination=cursor&limit=2&fields=id,date")
+    assert [set(row) for row in first["expenses"]] == [{"id", "date"}] * 2
+    second = _list(client, headers, f"pagination=cursor&limit=2&fields=id,date&cursor={first['next_cursor']}")
+    ids = [row["id"] for row in first["expenses"] + second["expenses"]]
+    assert len(set(ids)) == 3
+
+
+def test_sparse_page_selects_only_the_needed_columns(env, client, make_user, add_expenses):
+    user, headers = make_user()
+    add_expenses(user.id, [{"category": "Food", "amount": 1, "description": "not selected"}])
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(env.engine, "before_cursor_execute", record)
+    try:
+        _list(client, headers, "fields=id,amount")
+    finally:
+        event.remove(env.engine, "before_cursor_execute", record)
+    page_query = next(statement for statement in statements if "FROM expenses" in statement)
+    assert "amount_minor" in page_query and "description" not in page_query
+
+
+def test_unknown_fields_are_400(client, make_user):
+    _, headers = make_user()
+    for fields in ("id,password", ",", "hashed_password"):
+        response = client.get(f"/expenses/?fields={fields}", headers=headers)
+        assert response.status_code == 400
+        assert response.json()["error"] == "Invalid fields"
@@ -0,0 +1,68 @@
+import datetime
+import time
+import pytest
+from app import auth
+from app.utils.tokens import JoseBackend, PyJWTBackend, TokenError, VerifiedTokenCache
+
+
+def _token(minutes=5, **claims):
+    return auth.create_access_token({"sub": "alice", "uid": 1, **claims}, datetime.timedelta(minutes=minutes))
+
+
+def test_repeated_tokens_are_verified_once(monkeypatch):
+    token = _token()
+    calls = []
+    decode = auth.jwt_backend.decode
+    monkeypatch.setattr(auth.jwt_backend, "decode", lambda *args: calls.append(args) or decode(*args))
+    hits = auth.token_cache.snapshot()["hits"]
+
+    assert [auth.decode_access_token(token)["sub"] for _ in range(3)] == ["alice"] * 3
+    assert len(calls) == 1
+    assert auth.token_cache.snapshot()["hits"] == hits + 2
+
+
+def test_entries_expire_with_the_token(monkeypatch):
+    cache = VerifiedTokenCache()
+    now = time.time()
+    cache.set("live", {"sub": "alice", "exp": now + 60})
+    cache.set("no-expiry", {"sub": "alice"})
+    assert cache.get("live") == {"sub": "alice", "exp": now + 60}
+    assert cache.get("no-expiry") is None
+
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("live") is None
+    assert cache.snapshot()["size"] == 0
+
+
+def test_expired_tokens_are_rejected_not_served_from_cache():
+    token = _token(minutes=-1)
+    with pytest.raises(TokenError):
+        auth.decode_access_token(token)
+    assert auth.token_cache.snapshot()["size"] == 0
+
+
+def test_cache_is_bounded_lru():
+    cache = VerifiedTokenCache(maxsize=2)
+    expires = time.time() + 60
+    for token in ("a", "b"):
+        cache.set(token, {"exp": expires})
+    cache.get("a")
+    cache.set("c", {"exp": expires})
+    assert [cache.get(token) is not None for token in ("a", "b", "c")] == [True, False, True]
+    assert VerifiedTokenCache(maxsize=0).get("a") is None
+
+
+@pytest.mark.parametrize("issuer, verifier", [(JoseBackend, PyJWTBackend), (PyJWTBackend, JoseBackend)])
+def test_backends_accept_each_others_tokens(issuer, verifier):
+    expires = int(time.time()) + 60
+    token = issuer().encode({"sub": "alice", "uid": 1, "exp": expires}, auth.SECRET_KEY, auth.ALGORITHM)
+    assert verifier().decode(token, auth.SECRET_KEY, auth.ALGORITHM) == {"sub": "alice", "uid": 1, "exp": expires}
+    with pytest.raises(TokenError):
+        verifier().decode(token, "another-key", auth.ALGORITHM)
+
+
+def test_tampered_token_is_401(client, make_user):
+    _, headers = make_user()
+    assert client.get("/expenses/", headers=headers).status_code == 200
+    tampered = {"Authorization": headers["Authorization"][:-2] + "xx"}
+    assert client.get("/expenses/", headers=tampered).status_code == 401